@@ -0,0 +1,33 @@
+"""Entity version counters
+
+Revision ID: 3c1f9a7d2b4e
+Revises: f210aef05d21
+Create Date: 2026-10-18 10:12:41.204518
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "3c1f9a7d2b4e"
+down_revision: Union[str, Sequence[str], None] = "f210aef05d21"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # No seed rows: the first write of a family inserts its row (upsert), a missing row reads as version 0
+    op.create_table(
+        "entity_version",
+        sa.Column("name", sa.String(length=64), nullable=False),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("entity_version")
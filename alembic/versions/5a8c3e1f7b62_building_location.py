@@ -0,0 +1,35 @@
+"""Spatial building location
+
+Revision ID: 5a8c3e1f7b62
+Revises: b7e3c91d5f20
+Create Date: 2026-10-18 13:05:42.118406
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "5a8c3e1f7b62"
+down_revision: Union[str, Sequence[str], None] = "b7e3c91d5f20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Stored generated column: MySQL keeps it in sync with latitude/longitude on every write.
+    # A spatial index needs NOT NULL and a fixed SRID, which Alembic's add_column can't express.
+    op.execute(
+        """
+        ALTER TABLE building
+        ADD COLUMN location POINT AS (ST_SRID(POINT(longitude, latitude), 4326)) STORED NOT NULL SRID 4326
+        """
+    )
+    op.execute("CREATE SPATIAL INDEX ix_building_location ON building (location)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_building_location", table_name="building")
+    op.drop_column("building", "location")
@@ -0,0 +1,50 @@
+"""Activity closure table
+
+Revision ID: 8d4b2e6f1a93
+Revises: 3c1f9a7d2b4e
+Create Date: 2026-10-18 11:03:27.518032
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "8d4b2e6f1a93"
+down_revision: Union[str, Sequence[str], None] = "3c1f9a7d2b4e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "activity_closure",
+        sa.Column("ancestor_id", sa.Integer(), nullable=False),
+        sa.Column("descendant_id", sa.Integer(), nullable=False),
+        sa.Column("depth", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["ancestor_id"], ["activity.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["descendant_id"], ["activity.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("ancestor_id", "descendant_id"),
+    )
+    op.create_index(op.f("ix_activity_closure_descendant_id"), "activity_closure", ["descendant_id"], unique=False)
+    # Backfill from the existing parent_id links
+    op.execute(
+        """
+        INSERT INTO activity_closure (ancestor_id, descendant_id, depth)
+        WITH RECURSIVE tree (ancestor_id, descendant_id, depth) AS (
+            SELECT id, id, 0 FROM activity
+            UNION ALL
+            SELECT tree.ancestor_id, activity.id, tree.depth + 1
+            FROM tree JOIN activity ON activity.parent_id = tree.descendant_id
+        )
+        SELECT ancestor_id, descendant_id, depth FROM tree
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_activity_closure_descendant_id"), table_name="activity_closure")
+    op.drop_table("activity_closure")
@@ -0,0 +1,44 @@
+"""Full-text name indexes
+
+Revision ID: 9f2d6b4a8c17
+Revises: 5a8c3e1f7b62
+Create Date: 2026-10-18 14:22:31.540918
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "9f2d6b4a8c17"
+down_revision: Union[str, Sequence[str], None] = "5a8c3e1f7b62"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # ngram parser: every 2-character token is indexed, so a phrase search finds names containing
+    # the text anywhere, as LIKE '%text%' does, instead of whole words only
+    op.create_index(
+        "ix_organization_name_ft",
+        "organization",
+        ["name"],
+        unique=False,
+        mysql_prefix="FULLTEXT",
+        mysql_with_parser="ngram",
+    )
+    op.create_index(
+        "ix_activity_name_ft",
+        "activity",
+        ["name"],
+        unique=False,
+        mysql_prefix="FULLTEXT",
+        mysql_with_parser="ngram",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_activity_name_ft", table_name="activity")
+    op.drop_index("ix_organization_name_ft", table_name="organization")
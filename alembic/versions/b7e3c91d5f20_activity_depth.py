@@ -0,0 +1,37 @@
+"""Stored activity depth
+
+Revision ID: b7e3c91d5f20
+Revises: 8d4b2e6f1a93
+Create Date: 2026-10-18 11:47:09.301754
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "b7e3c91d5f20"
+down_revision: Union[str, Sequence[str], None] = "8d4b2e6f1a93"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("activity", sa.Column("depth", sa.Integer(), nullable=False, server_default="1"))
+    # Depth is the number of ancestors including the activity itself
+    op.execute(
+        """
+        UPDATE activity
+        SET depth = (SELECT COUNT(*) FROM activity_closure WHERE activity_closure.descendant_id = activity.id)
+        """
+    )
+    op.alter_column("activity", "depth", existing_type=sa.Integer(), existing_nullable=False, server_default=None)
+    op.create_index(op.f("ix_activity_depth"), "activity", ["depth"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_activity_depth"), table_name="activity")
+    op.drop_column("activity", "depth")
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from typing import Annotated, Any
+
+from fastapi import Body, Query
+from pydantic import BeforeValidator
+
+from app.config.settings import settings
+
+
+def split_ids(value: Any) -> Any:
+    # ?ids=1,2,3 as well as repeated ?ids=1&ids=2
+    if isinstance(value, list):
+        return [part.strip() for item in value for part in str(item).split(",") if part.strip()]
+    return value
+
+
+BatchIdsQuery = Annotated[
+    list[int],
+    BeforeValidator(split_ids),
+    Query(
+        min_length=1,
+        max_length=settings.batch_max_ids,
+        description=f"ID через запятую (или повтором параметра), не больше {settings.batch_max_ids}",
+    ),
+]
+
+BatchIdsBody = Annotated[
+    list[int],
+    Body(embed=True, min_length=1, max_length=settings.batch_max_ids, description="Список ID"),
+]
@@ -0,0 +1,342 @@
+from __future__ import annotations
+
+import functools
+import hashlib
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, TypeVar
+from urllib.parse import urlencode
+
+from fastapi import Request, Response, status
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.api.serialization import JsonListRoute, dump_json, shared_parameter
+from app.config.replicas import is_replica
+from app.crud.versions import async_get_versions, get_versions, has_pending_bump, on_version_commit
+
+
+# HIT or MISS on responses of cached endpoints
+CACHE_HEADER = "X-Cache"
+
+# Keyword parameters added to endpoints that do not take the Request / Response themselves
+_REQUEST = "_cache_request"
+_RESPONSE = "_cache_response"
+
+EndpointT = TypeVar("EndpointT", bound=Callable[..., Any])
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    headers: dict[str, str]
+    # Versions of the endpoint's entity families the body was built from
+    versions: tuple[int | None, ...]
+    expires_at: float
+
+    def response(self, cache_status: str, validators: dict[str, str]) -> Response:
+        headers = {**self.headers, **validators, CACHE_HEADER: cache_status}
+        return Response(self.body, media_type="application/json", headers=headers)
+
+
+class ResponseCache:
+    """
+    Process-local LRU of serialized GET responses, keyed by path and sorted query parameters.
+
+    The cache tracks the ``entity_version`` of the families cached endpoints read: commits of this
+    process replace those versions right away, writes of other workers are picked up by reading
+    ``entity_version`` at most once per ``check_interval`` seconds. Versions only move forward, so
+    a read from a lagging replica can't take them back. Every entry (and every ETag) is tied to
+    the versions it was built from; an entry built from other versions is a miss. Responses read
+    from a replica may predate writes the versions already count, so they are kept apart from the
+    primary's: a client pinned to the primary never gets one, nor a 304 for its ETag. ``ttl``
+    bounds the age of an entry regardless. Version tracking and ETags work with the cache itself
+    disabled.
+    """
+
+    def __init__(
+        self,
+        ttl: float | None = None,
+        max_entries: int | None = None,
+        check_interval: float | None = None,
+        enabled: bool | None = None,
+    ) -> None:
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._check_interval = check_interval
+        self._enabled = enabled
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        self._versions: dict[str, int] = {}
+        self._families: set[str] = set()
+        self._checked_at: float | None = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.not_modified = 0
+
+    def _setting(self, attr: str, name: str) -> Any:
+        # Imported lazily: scripts load .env only after importing the API modules
+        if getattr(self, attr) is None:
+            from app.config.settings import settings
+
+            setattr(self, attr, getattr(settings, name))
+        return getattr(self, attr)
+
+    @property
+    def enabled(self) -> bool:
+        return self._setting("_enabled", "response_cache_enabled")
+
+    @property
+    def ttl(self) -> float:
+        return self._setting("_ttl", "response_cache_ttl")
+
+    @property
+    def max_entries(self) -> int:
+        return self._setting("_max_entries", "response_cache_max_entries")
+
+    @property
+    def check_interval(self) -> float:
+        return self._setting("_check_interval", "response_cache_check_interval")
+
+    def register(self, families: Iterable[str]) -> None:
+        self._families.update(families)
+
+    @staticmethod
+    def tracks(db: Session | AsyncSession, families: Iterable[str]) -> bool:
+        """
+        Whether the known versions describe what ``db`` reads: a session with uncommitted changes
+        of a family must see them, so it gets neither cached responses nor validators.
+        """
+        return not any(has_pending_bump(db, family) for family in families)
+
+    def _needs_check(self) -> bool:
+        return self._checked_at is None or time.monotonic() - self._checked_at >= self.check_interval
+
+    def _apply_versions(self, versions: dict[str, int]) -> None:
+        with self._lock:
+            for family, version in versions.items():
+                self._versions[family] = max(version, self._versions.get(family, version))
+            self._checked_at = time.monotonic()
+
+    def refresh(self, db: Session) -> None:
+        if self._needs_check():
+            self._apply_versions(get_versions(db, sorted(self._families)))
+
+    async def async_refresh(self, db: AsyncSession) -> None:
+        if self._needs_check():
+            self._apply_versions(await async_get_versions(db, sorted(self._families)))
+
+    def invalidate(self, bumped: dict[str, tuple[int | None, int]]) -> None:
+        """Version commit hook body: entries built from the previous versions stop matching."""
+        with self._lock:
+            for family, (_, new) in bumped.items():
+                self._versions[family] = new
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+            self._checked_at = None
+            self.hits = self.misses = self.evictions = self.not_modified = 0
+
+    @staticmethod
+    def key(request: Request, db: Session | AsyncSession) -> str:
+        source = "replica:" if is_replica(db) else ""
+        return f"{source}{request.url.path}?{urlencode(sorted(request.query_params.multi_items()))}"
+
+    def snapshot(self, families: Iterable[str]) -> tuple[int | None, ...]:
+        with self._lock:
+            return tuple(self._versions.get(family) for family in families)
+
+    def get(self, key: str, versions: tuple[int | None, ...]) -> CachedResponse | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry.versions != versions or entry.expires_at <= time.monotonic()):
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: str, versions: tuple[int | None, ...], body: bytes, headers: dict[str, str]) -> CachedResponse:
+        entry = CachedResponse(body, headers, versions, time.monotonic() + self.ttl)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def count_not_modified(self) -> None:
+        with self._lock:
+            self.not_modified += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "not_modified": self.not_modified,
+                "hit_ratio": self.hits / requests if requests else 0.0,
+            }
+
+
+response_cache = ResponseCache()
+
+
+@on_version_commit
+def _invalidate_cache(session: Session, bumped: dict[str, tuple[int | None, int]]) -> None:
+    response_cache.invalidate(bumped)
+
+
+def cached(*families: str) -> Callable[[EndpointT], EndpointT]:
+    """Cache the GET endpoint (of a ``CachedRoute`` router); ``families`` are the entities its response reads."""
+
+    def mark(endpoint: EndpointT) -> EndpointT:
+        endpoint.cache_families = families
+        return endpoint
+
+    return mark
+
+
+def _session(values: Iterable[Any]) -> Session | AsyncSession | None:
+    return next((value for value in values if isinstance(value, (Session, AsyncSession))), None)
+
+
+def etag(key: str, versions: tuple[int | None, ...]) -> str:
+    """Strong validator of a response: the same query over the same family versions gives the same body."""
+    digest = hashlib.blake2b(f"{key}|{versions}".encode(), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: str | None, tag: str) -> bool:
+    # If-None-Match uses the weak comparison: W/ prefixes are ignored
+    if not if_none_match:
+        return False
+    candidates = {candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")}
+    return "*" in candidates or tag in candidates
+
+
+def cache_control() -> str:
+    from app.config.settings import settings
+
+    # Responses depend on the API key, so only the client may keep them
+    if settings.http_cache_max_age:
+        return f"private, max-age={settings.http_cache_max_age}"
+    return "private, no-cache"
+
+
+def _lookup(request: Request, key: str, versions: tuple[int | None, ...]) -> tuple[dict[str, str], Response | None]:
+    """Validator headers of the response, and the response to send without running the handler, if any."""
+    validators = {"ETag": etag(key, versions), "Cache-Control": cache_control()}
+    if etag_matches(request.headers.get("if-none-match"), validators["ETag"]):
+        response_cache.count_not_modified()
+        return validators, Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validators)
+    if response_cache.enabled:
+        entry = response_cache.get(key, versions)
+        if entry is not None:
+            return validators, entry.response("HIT", validators)
+    return validators, None
+
+
+def _respond(
+    adapter: TypeAdapter,
+    result: Any,
+    response: Response,
+    key: str,
+    versions: tuple[int | None, ...],
+    validators: dict[str, str],
+) -> Any:
+    if not response_cache.enabled:
+        # FastAPI serializes the result and adds the headers of the Response parameter
+        response.headers.update(validators)
+        return result
+    # Headers the handler set on its Response parameter, e.g. the next page cursor
+    headers = {name: value for name, value in response.headers.items() if name != "content-length"}
+    entry = response_cache.put(key, versions, dump_json(adapter, result), headers)
+    return entry.response("MISS", validators)
+
+
+def cache_endpoint(endpoint: Callable[..., Any], families: tuple[str, ...], response_model: Any) -> Callable[..., Any]:
+    """
+    Wrap ``endpoint`` with conditional GET and, when enabled, ``response_cache``.
+
+    The wrapper runs after FastAPI has resolved the dependencies (API key, session), so a 304 or a
+    cache hit skips only the handler body. The ETag is derived from the query and the versions of
+    ``families``, so it is known before the handler runs. Cached responses are serialized here with
+    the route's response model.
+    """
+    adapter = TypeAdapter(response_model)
+    signature = inspect.signature(endpoint, eval_str=True)
+    parameters = list(signature.parameters.values())
+    request_name = shared_parameter(parameters, Request, _REQUEST)
+    response_name = shared_parameter(parameters, Response, _RESPONSE)
+
+    def take(kwargs: dict[str, Any]) -> tuple[Request, Response]:
+        request, response = kwargs[request_name], kwargs[response_name]
+        kwargs.pop(_REQUEST, None)
+        kwargs.pop(_RESPONSE, None)
+        return request, response
+
+    if inspect.iscoroutinefunction(endpoint):
+
+        @functools.wraps(endpoint)
+        async def wrapper(**kwargs: Any) -> Any:
+            request, response = take(kwargs)
+            db = _session(kwargs.values())
+            if not isinstance(db, AsyncSession) or not response_cache.tracks(db, families):
+                return await endpoint(**kwargs)
+            await response_cache.async_refresh(db)
+            key, versions = response_cache.key(request, db), response_cache.snapshot(families)
+            validators, early = _lookup(request, key, versions)
+            if early is not None:
+                return early
+            return _respond(adapter, await endpoint(**kwargs), response, key, versions, validators)
+
+    else:
+
+        @functools.wraps(endpoint)
+        def wrapper(**kwargs: Any) -> Any:
+            request, response = take(kwargs)
+            db = _session(kwargs.values())
+            if not isinstance(db, Session) or not response_cache.tracks(db, families):
+                return endpoint(**kwargs)
+            response_cache.refresh(db)
+            key, versions = response_cache.key(request, db), response_cache.snapshot(families)
+            validators, early = _lookup(request, key, versions)
+            if early is not None:
+                return early
+            return _respond(adapter, endpoint(**kwargs), response, key, versions, validators)
+
+    wrapper.__signature__ = signature.replace(parameters=parameters)
+    # functools.wraps copied the marker; include_router rebuilds routes from the wrapped endpoint
+    del wrapper.cache_families
+    return wrapper
+
+
+class CachedRoute(JsonListRoute):
+    """
+    Route class of the v1 routers: endpoints marked with ``cached`` go through ``response_cache``. The
+    cache wraps the handler inside the list serialization, so hits and 304s skip both.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any) -> None:
+        families = getattr(endpoint, "cache_families", None)
+        if families is not None:
+            response_cache.register(families)
+            endpoint = cache_endpoint(endpoint, families, kwargs["response_model"])
+        super().__init__(path, endpoint, **kwargs)
@@ -1,13 +1,16 @@
 from __future__ import annotations
 
+from typing import AsyncIterator
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.config.db import SqlAlchemyConfig
+from app.api.replica_routing import async_request_session, request_session
 
 
 def get_db() -> Session:
-    with SqlAlchemyConfig.session(autoflush=False, autocommit=False, expire_on_commit=False) as db:
+    # A read replica for GET requests when DB_REPLICAS is set (ReplicaRoutingMiddleware), otherwise the primary
+    with request_session(autoflush=False, autocommit=False, expire_on_commit=False) as db:
         try:
             yield db
         except Exception:
@@ -15,3 +18,14 @@ def get_db() -> Session:
             raise
         else:
             db.commit()
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    async with await async_request_session(autoflush=False, expire_on_commit=False) as db:
+        try:
+            yield db
+        except Exception:
+            await db.rollback()
+            raise
+        else:
+            await db.commit()
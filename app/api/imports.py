@@ -0,0 +1,320 @@
+from __future__ import annotations
+
+import codecs
+import csv
+import io
+import json
+from typing import Any, AsyncIterator, Awaitable, Callable, Sequence, get_args, get_origin
+
+from fastapi import HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from pydantic import ValidationError as SchemaError
+from sqlalchemy.exc import DataError, DBAPIError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.api.ndjson import NDJSON_MEDIA_TYPE
+from app.crud.base import ValidationError
+from app.schemas.bulk import ImportBatchOut, ImportOut, ImportRowError
+
+
+CSV_MEDIA_TYPE = "text/csv"
+
+# Separator of list values (phones, activity_ids) inside one CSV cell
+CSV_LIST_SEPARATOR = ";"
+
+# Request body of the import endpoints in the OpenAPI schema: FastAPI reads no body itself
+IMPORT_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {NDJSON_MEDIA_TYPE: {"schema": {"type": "string"}}, CSV_MEDIA_TYPE: {"schema": {"type": "string"}}},
+    }
+}
+
+BatchWriter = Callable[[list[dict[str, Any]]], Awaitable[list[int]]]
+
+# Parsed in place of a record longer than the limit, whose text was dropped while it arrived
+OVERSIZED = object()
+
+
+def _max_record_length(max_length: int | None) -> int:
+    if max_length is None:
+        from app.config.settings import settings
+
+        max_length = settings.import_max_record_length
+    return max_length
+
+
+class _RecordBuffer:
+    """Text of the record being read, kept up to ``max_length`` characters and dropped past that."""
+
+    def __init__(self, max_length: int) -> None:
+        self.max_length = max_length
+        self._parts: list[str] = []
+        self._length = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def add(self, text: str) -> None:
+        self._length += len(text)
+        if self._length > self.max_length:
+            self._parts.clear()
+        else:
+            self._parts.append(text)
+
+    def take(self) -> str | object:
+        raw = OVERSIZED if self._length > self.max_length else "".join(self._parts)
+        self._parts, self._length = [], 0
+        return raw
+
+    def oversized_error(self) -> ValueError:
+        return ValueError(f"record longer than {self.max_length} characters")
+
+
+class NdjsonParser:
+    """Splits the body into JSON documents as chunks arrive; blank lines are skipped."""
+
+    def __init__(self, max_length: int | None = None) -> None:
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self._line = _RecordBuffer(_max_record_length(max_length))
+
+    def feed(self, chunk: bytes, final: bool = False) -> list[str | object]:
+        *lines, tail = self._decoder.decode(chunk, final).split("\n")
+        raws = []
+        for line in lines:
+            self._line.add(line)
+            raws.append(self._line.take())
+        self._line.add(tail)
+        if final:
+            raws.append(self._line.take())
+        return [raw for raw in raws if raw is OVERSIZED or raw.strip()]
+
+    def record(self, raw: str | object) -> dict[str, Any]:
+        if raw is OVERSIZED:
+            raise self._line.oversized_error()
+        value = json.loads(raw)
+        if not isinstance(value, dict):
+            raise ValueError("expected a JSON object")
+        return value
+
+
+class CsvParser:
+    """
+    Splits the body into CSV records as chunks arrive; the first record is the header. A quoted field
+    may span lines, so a record ends at a line break preceded by an even number of quotes. Empty cells
+    fall back to the schema defaults, list fields are split on ``CSV_LIST_SEPARATOR``. A record past
+    ``max_length`` characters (e.g. after a stray quote) is dropped as it arrives and reported.
+    """
+
+    def __init__(self, schema: type[BaseModel], max_length: int | None = None) -> None:
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self._record = _RecordBuffer(_max_record_length(max_length))
+        # Quotes in the record so far: only the text added is counted, never the whole record again
+        self._quotes = 0
+        self._header: list[str] | None = None
+        self._lists = {name for name, info in schema.model_fields.items() if _is_list(info.annotation)}
+
+    def _add(self, text: str) -> None:
+        self._quotes += text.count('"')
+        self._record.add(text)
+
+    def _end(self) -> list[list[str] | object]:
+        raw = self._record.take()
+        self._quotes = 0
+        if raw is not OVERSIZED:
+            return self._split(raw)
+        if self._header is None:
+            # Rows after a header too long to read can't be matched to columns
+            self._header = []
+        return [raw]
+
+    def feed(self, chunk: bytes, final: bool = False) -> list[list[str] | object]:
+        # Records end at \n (optionally after \r) only: str.splitlines would also break a cell at form feeds,
+        # \x1c-\x1e or \u2028, which are plain data in CSV
+        *lines, tail = self._decoder.decode(chunk, final).split("\n")
+        records = []
+        for line in lines:
+            self._add(line + "\n")
+            if self._quotes % 2 == 0:
+                records.extend(self._end())
+        self._add(tail)
+        if final and len(self._record):
+            records.extend(self._end())
+        return records
+
+    def _split(self, text: str) -> list[list[str]]:
+        fields = next(csv.reader(io.StringIO(text)), None)
+        if not fields or fields == [""]:
+            return []
+        if self._header is None:
+            self._header = [name.strip() for name in fields]
+            return []
+        return [fields]
+
+    def record(self, raw: list[str] | object) -> dict[str, Any]:
+        if raw is OVERSIZED:
+            raise self._record.oversized_error()
+        if not self._header:
+            raise ValueError("no CSV header")
+        if len(raw) != len(self._header):
+            raise ValueError(f"expected {len(self._header)} columns, got {len(raw)}")
+        record: dict[str, Any] = {}
+        for name, value in zip(self._header, raw):
+            if value == "":
+                continue
+            if name in self._lists:
+                record[name] = [item.strip() for item in value.split(CSV_LIST_SEPARATOR) if item.strip()]
+            else:
+                record[name] = value
+        return record
+
+
+def _is_list(annotation: Any) -> bool:
+    return get_origin(annotation) is list or any(get_origin(arg) is list for arg in get_args(annotation))
+
+
+def _schema_error(exc: SchemaError) -> str:
+    return "; ".join(f"{'.'.join(map(str, error['loc'])) or 'row'}: {error['msg']}" for error in exc.errors())
+
+
+def _database_error(exc: DBAPIError) -> str:
+    # The driver's message, without the statement and its parameters
+    return f"{type(exc).__name__}: {exc.orig}"
+
+
+class Importer:
+    """
+    Validates parsed records with ``schema`` and hands them to ``write`` in batches of ``batch_size``,
+    so only one batch is held at a time. Invalid records are skipped and reported; a batch ``write``
+    rejects (a ``ValidationError`` or a constraint / data error of the database) is rolled back on its own
+    and reported, batches written before it stay.
+    """
+
+    def __init__(
+        self,
+        parser: NdjsonParser | CsvParser,
+        schema: type[BaseModel],
+        write: BatchWriter,
+        batch_size: int,
+        max_errors: int,
+    ) -> None:
+        self.parser = parser
+        self.schema = schema
+        self.write = write
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+        self.rows = 0
+        self.failed = 0
+        self.batches: list[ImportBatchOut] = []
+        self.errors: list[ImportRowError] = []
+        self._pending: list[dict[str, Any]] = []
+        self._pending_rows: list[int] = []
+
+    def _error(self, row: int, error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append(ImportRowError(row=row, error=error))
+
+    async def _add(self, raw: Any) -> None:
+        self.rows += 1
+        try:
+            item = self.schema.model_validate(self.parser.record(raw))
+        except SchemaError as exc:
+            self._error(self.rows, _schema_error(exc))
+            return
+        except ValueError as exc:
+            self._error(self.rows, str(exc))
+            return
+        self._pending.append(item.model_dump())
+        self._pending_rows.append(self.rows)
+        if len(self._pending) >= self.batch_size:
+            await self._flush()
+
+    async def _flush(self) -> None:
+        if not self._pending:
+            return
+        rows, numbers = self._pending, self._pending_rows
+        self._pending, self._pending_rows = [], []
+        batch = ImportBatchOut(batch=len(self.batches) + 1, first_row=numbers[0], last_row=numbers[-1], rows=len(rows))
+        try:
+            batch.written = len(await self.write(rows))
+        except ValidationError as exc:
+            batch.error = str(exc)
+            self.failed += len(rows)
+        except (IntegrityError, DataError) as exc:
+            # E.g. an id that is already taken or a value too long for its column; the writer rolled back
+            batch.error = _database_error(exc)
+            self.failed += len(rows)
+        self.batches.append(batch)
+
+    async def run(self, chunks: AsyncIterator[bytes]) -> ImportOut:
+        async for chunk in chunks:
+            for raw in self.parser.feed(chunk):
+                await self._add(raw)
+        for raw in self.parser.feed(b"", final=True):
+            await self._add(raw)
+        await self._flush()
+        return ImportOut(
+            rows=self.rows,
+            written=sum(batch.written for batch in self.batches),
+            failed=self.failed,
+            batches=self.batches,
+            errors=self.errors,
+        )
+
+
+def parser_for(request: Request, schema: type[BaseModel]) -> NdjsonParser | CsvParser:
+    media_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if media_type in (NDJSON_MEDIA_TYPE, "application/jsonl", "application/json-lines"):
+        return NdjsonParser()
+    if media_type == CSV_MEDIA_TYPE:
+        return CsvParser(schema)
+    raise HTTPException(
+        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        detail=f"Expected {NDJSON_MEDIA_TYPE} or {CSV_MEDIA_TYPE} body",
+    )
+
+
+def batch_writer(db: Session, write: Callable[[Session, Sequence[dict[str, Any]]], list[int]]) -> BatchWriter:
+    """Run ``write`` in the threadpool and commit every batch on its own."""
+
+    def commit_batch(rows: list[dict[str, Any]]) -> list[int]:
+        try:
+            ids = write(db, rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return ids
+
+    async def run(rows: list[dict[str, Any]]) -> list[int]:
+        return await run_in_threadpool(commit_batch, rows)
+
+    return run
+
+
+def async_batch_writer(
+    db: AsyncSession, write: Callable[[AsyncSession, Sequence[dict[str, Any]]], Awaitable[list[int]]]
+) -> BatchWriter:
+    """Commit every batch of ``write`` on its own."""
+
+    async def commit_batch(rows: list[dict[str, Any]]) -> list[int]:
+        try:
+            ids = await write(db, rows)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+        return ids
+
+    return commit_batch
+
+
+async def import_rows(request: Request, schema: type[BaseModel], write: BatchWriter, batch_size: int) -> ImportOut:
+    """Parse the NDJSON or CSV body of ``request`` while it arrives and write it in batches."""
+    from app.config.settings import settings
+
+    importer = Importer(parser_for(request, schema), schema, write, batch_size, settings.import_max_errors)
+    return await importer.run(request.stream())
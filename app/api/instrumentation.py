@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import json
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+logger = logging.getLogger(__name__)
+
+SERVER_TIMING_HEADER = "Server-Timing"
+
+# Start times of the statements in flight on a connection
+_STARTED = "sql_timing_started"
+
+EndpointT = TypeVar("EndpointT", bound=Callable[..., Any])
+
+
+class QueryBudgetExceeded(Exception):
+    """An endpoint ran more statements than its ``query_budget`` (raised in strict mode only)."""
+
+
+@dataclass
+class SqlStats:
+    """SQL work of one request: statements, time spent in the database and rows the driver reported."""
+
+    statements: int = 0
+    db_time: float = 0.0
+    rows: int = 0
+    # Statement texts, kept in strict mode for the budget error
+    sql: list[str] | None = None
+
+    def record(self, statement: str, elapsed: float, rowcount: int) -> None:
+        self.statements += 1
+        self.db_time += elapsed
+        # -1 where the driver doesn't know (SQLite SELECTs, server-side cursors)
+        self.rows += max(rowcount, 0)
+        if self.sql is not None:
+            self.sql.append(statement)
+
+    def server_timing(self, total: float) -> str:
+        return (
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.statements} statements, {self.rows} rows", '
+            f"app;dur={total * 1000:.2f}"
+        )
+
+
+_current: ContextVar[SqlStats | None] = ContextVar("sql_stats", default=None)
+# ASGI scope of the request being served; routing fills in the route before the endpoint runs
+_scope: ContextVar[Scope | None] = ContextVar("sql_stats_scope", default=None)
+
+
+def current_stats() -> SqlStats | None:
+    """Stats of the request being served; sync endpoints and dependencies share them through the context copy."""
+    return _current.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _current.get() is not None:
+        conn.info.setdefault(_STARTED, []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    stats, started = _current.get(), conn.info.get(_STARTED)
+    if stats is not None and started:
+        stats.record(statement, time.perf_counter() - started.pop(), cursor.rowcount)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context) -> None:
+    started = context.connection.info.get(_STARTED) if context.connection is not None else None
+    if started:
+        started.pop()
+
+
+def query_budget(statements: int) -> Callable[[EndpointT], EndpointT]:
+    """Declare how many SQL statements a request to the endpoint may run; see ``SqlTimingMiddleware``."""
+
+    def mark(endpoint: EndpointT) -> EndpointT:
+        endpoint.query_budget = statements
+        return endpoint
+
+    return mark
+
+
+def current_route() -> str | None:
+    """``METHOD /route/template`` of the request being served, for logs of code that has no request at hand."""
+    scope = _scope.get()
+    if scope is None:
+        return None
+    return f"{scope['method']} {route_template(scope) or scope['path']}"
+
+
+def route_template(scope: Scope) -> str | None:
+    """Path template of the matched route with the prefixes of the included routers, e.g. ``/api/v1/buildings``."""
+    # FastAPI keeps the route of an included router as declared and its full path in the route context
+    context = scope.get("fastapi", {}).get("effective_route_context")
+    if context is not None:
+        return context.path
+    return getattr(scope.get("route"), "path", None)
+
+
+def _setting(name: str) -> Any:
+    # Imported lazily, like the other request-time settings of app.api
+    from app.config.settings import settings
+
+    return getattr(settings, name)
+
+
+class SqlTimingMiddleware:
+    """
+    Counts the statements, database time and rows of every request (through engine events, so every
+    session and engine is covered), sends them as a ``Server-Timing`` header and logs one JSON line per
+    request. A request over the ``query_budget`` of its endpoint is logged as a warning, or raises
+    ``QueryBudgetExceeded`` with ``SQL_BUDGET_STRICT`` on (tests).
+
+    The header goes out with the response start, so statements of a streamed body and of the session
+    commit after it are in the log only.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        strict = _setting("sql_budget_strict")
+        stats = SqlStats(sql=[] if strict else None)
+        token, scope_token = _current.set(stats), _scope.set(scope)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                timing = stats.server_timing(time.perf_counter() - started)
+                MutableHeaders(scope=message).append(SERVER_TIMING_HEADER, timing)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            _scope.reset(scope_token)
+            self.report(scope, status, stats, time.perf_counter() - started, strict)
+
+    @staticmethod
+    def report(scope: Scope, status: int, stats: SqlStats, total: float, strict: bool) -> None:
+        record = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "route": route_template(scope),
+            "status": status,
+            "statements": stats.statements,
+            "db_ms": round(stats.db_time * 1000, 3),
+            "rows": stats.rows,
+            "duration_ms": round(total * 1000, 3),
+        }
+        logger.info(json.dumps(record, ensure_ascii=False))
+
+        budget = getattr(scope.get("endpoint"), "query_budget", None)
+        if budget is None or stats.statements <= budget:
+            return
+        message = f"{scope['method']} {scope['path']} ran {stats.statements} SQL statements, budget {budget}"
+        if strict:
+            raise QueryBudgetExceeded("\n".join([message, *(stats.sql or ())]))
+        logger.warning(message)
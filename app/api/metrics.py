@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import os
+import time
+from typing import Any
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+from sqlalchemy.pool import Pool
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.api.cache import CACHE_HEADER
+from app.api.instrumentation import route_template
+from app.config.db import SqlAlchemyConfig
+from app.config.replicas import replicas
+
+
+# prometheus_client switches every metric to per-process files in this directory when it is set at import
+# time; /metrics then sums the files of all workers. The directory must be emptied before the server starts.
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+# Label of requests no route matched, so unknown paths don't create series
+UNMATCHED_ROUTE = "<unmatched>"
+
+_CACHE_HEADER_KEY = CACHE_HEADER.lower().encode()
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Time to serve a request, body included",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+RESPONSES = Counter("http_responses", "Responses sent", ["method", "route", "status"])
+IN_FLIGHT = Gauge("http_requests_in_flight", "Requests being served", multiprocess_mode="livesum")
+RESPONSE_CACHE = Counter(
+    "http_response_cache_lookups", "Cached GET endpoint responses by cache result (hit, miss, not_modified)",
+    ["route", "result"],
+)
+
+# ``engine`` label of the primary's pool; replica pools are labeled with their DB_REPLICAS entry
+PRIMARY_ENGINE = "primary"
+
+# Pool state is sampled per worker and engine: the sizes add up across workers, the longest wait is the max of them
+POOL_GAUGES = {
+    name: Gauge(f"db_pool_{name}", documentation, ["engine"], multiprocess_mode=mode)
+    for name, documentation, mode in (
+        ("size", "Pooled connections kept open", "livesum"),
+        ("checked_out", "Connections in use", "livesum"),
+        ("overflow", "Connections open above the pool size", "livesum"),
+        ("checkouts", "Connections handed out since the worker started", "livesum"),
+        ("timeouts", "Checkouts that timed out since the worker started", "livesum"),
+        ("wait_seconds", "Time spent waiting for a free connection since the worker started", "livesum"),
+        ("wait_max_seconds", "Longest wait for a free connection", "max"),
+        ("connects", "Connections opened since the worker started", "livesum"),
+        ("connect_seconds", "Time spent opening connections since the worker started", "livesum"),
+    )
+}
+
+
+def multiprocess_mode() -> bool:
+    return MULTIPROC_DIR_ENV in os.environ
+
+
+def engine_pools() -> dict[str, Pool]:
+    """Pools of this worker by ``engine`` label: the primary's and those of the replicas used so far."""
+    from app.config.settings import settings
+
+    pools = {PRIMARY_ENGINE: SqlAlchemyConfig.pool()}
+    for replica in replicas.replicas:
+        pool = replica.pool(asyncio=settings.db_async)
+        if pool is not None:
+            pools[replica.entry] = pool
+    return pools
+
+
+def sample_pool() -> None:
+    for engine, pool in engine_pools().items():
+        status = SqlAlchemyConfig.pool_status(pool)
+        waits = status["checkouts"] + status["timeouts"]
+        values = {
+            "size": status["size"],
+            "checked_out": status["checked_out"],
+            "overflow": status["overflow"],
+            "checkouts": status["checkouts"],
+            "timeouts": status["timeouts"],
+            "wait_seconds": status["wait_avg_ms"] * waits / 1000,
+            "wait_max_seconds": status["wait_max_ms"] / 1000,
+            "connects": status["connects"],
+            "connect_seconds": status["connect_avg_ms"] * status["connects"] / 1000,
+        }
+        for name, value in values.items():
+            POOL_GAUGES[name].labels(engine).set(value)
+
+
+def mark_process_dead(pid: int | None = None) -> None:
+    """Drop the live gauges of a stopped worker from the multiprocess files (call on worker shutdown)."""
+    if multiprocess_mode():
+        multiprocess.mark_process_dead(pid or os.getpid())
+
+
+class _RouteMetrics:
+    """Metric children of one (method, route): ``labels()`` takes the metric lock, so they are looked up once."""
+
+    def __init__(self, method: str, route: str) -> None:
+        self.method, self.route = method, route
+        self.latency = REQUEST_LATENCY.labels(method, route)
+        self.statuses: dict[int, Any] = {}
+        self.cache: dict[str, Any] = {}
+
+    def observe(self, status: int, cache_result: str | None, elapsed: float) -> None:
+        self.latency.observe(elapsed)
+        counter = self.statuses.get(status)
+        if counter is None:
+            counter = self.statuses[status] = RESPONSES.labels(self.method, self.route, str(status))
+        counter.inc()
+        if cache_result is not None:
+            counter = self.cache.get(cache_result)
+            if counter is None:
+                counter = self.cache[cache_result] = RESPONSE_CACHE.labels(self.route, cache_result)
+            counter.inc()
+
+
+class MetricsMiddleware:
+    """
+    Records latency, status and response cache result per route template, requests in flight, and
+    samples the connection pools at most every ``pool_interval`` seconds (each worker has its own pools).
+    """
+
+    def __init__(self, app: ASGIApp, pool_interval: float = 1.0) -> None:
+        self.app = app
+        self.pool_interval = pool_interval
+        self._routes: dict[tuple[str, str], _RouteMetrics] = {}
+        self._pool_sampled_at: float | None = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status, cache_result = 500, None
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status, cache_result
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                cache_result = self._cache_result(status, message.get("headers", ()))
+            await send(message)
+
+        IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            IN_FLIGHT.dec()
+            self._route(scope).observe(status, cache_result, time.perf_counter() - started)
+            self._sample_pool()
+
+    @staticmethod
+    def _cache_result(status: int, headers: Any) -> str | None:
+        if status == 304:
+            return "not_modified"
+        value = next((v for k, v in headers if k == _CACHE_HEADER_KEY), None)
+        return value.decode().lower() if value is not None else None
+
+    def _route(self, scope: Scope) -> _RouteMetrics:
+        key = (scope["method"], route_template(scope) or UNMATCHED_ROUTE)
+        metrics = self._routes.get(key)
+        if metrics is None:
+            metrics = self._routes[key] = _RouteMetrics(*key)
+        return metrics
+
+    def _sample_pool(self) -> None:
+        now = time.monotonic()
+        if self._pool_sampled_at is None or now - self._pool_sampled_at >= self.pool_interval:
+            self._pool_sampled_at = now
+            sample_pool()
+
+
+def metrics_response(request: Request) -> Response:
+    """Prometheus text exposition of this worker, or of all workers in multiprocess mode."""
+    sample_pool()
+    if multiprocess_mode():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import json
+from typing import Any, AsyncIterator, Iterable, Iterator
+
+from fastapi.responses import StreamingResponse
+
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def encode(records: Iterable[dict[str, Any]]) -> bytes:
+    """One JSON document per line."""
+    return "".join(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n" for record in records).encode()
+
+
+def ndjson_response(batches: Iterator[list[dict[str, Any]]] | AsyncIterator[list[dict[str, Any]]]) -> StreamingResponse:
+    """Stream ``batches`` as NDJSON, one chunk per batch, without collecting them."""
+    if isinstance(batches, AsyncIterator):
+
+        async def chunks() -> AsyncIterator[bytes]:
+            async for batch in batches:
+                yield encode(batch)
+
+        return StreamingResponse(chunks(), media_type=NDJSON_MEDIA_TYPE)
+    return StreamingResponse(map(encode, batches), media_type=NDJSON_MEDIA_TYPE)
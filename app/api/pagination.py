@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from fastapi import Query, Response
+
+from app.crud.pagination import Page
+
+
+# Keyset pagination hands the cursor of the next page back in a header, so list bodies keep their shape
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def cursor_query() -> str | None:
+    return Query(
+        None,
+        description=f"Курсор следующей страницы из заголовка {NEXT_CURSOR_HEADER} предыдущего ответа; "
+        "не сочетается с offset",
+    )
+
+
+def set_next_cursor(response: Response, page: Page) -> None:
+    if page.next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import cookie_parser
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config.db import SqlAlchemyConfig
+from app.config.replicas import replicas
+from app.crud.versions import has_writes
+
+
+# Read-your-writes pin: set on responses to requests that wrote, sent back by the client to read the primary
+PRIMARY_HEADER = "X-Read-Primary"
+PRIMARY_COOKIE = "read_primary"
+
+READ_METHODS = ("GET", "HEAD")
+
+
+@dataclass
+class RequestRouting:
+    reads_replica: bool
+    # Sessions handed out to the request, looked at for writes when the response starts
+    sessions: list[Session | AsyncSession] = field(default_factory=list)
+
+    def wrote(self) -> bool:
+        return any(has_writes(db) for db in self.sessions)
+
+
+_current: ContextVar[RequestRouting | None] = ContextVar("replica_routing", default=None)
+
+
+def pinned(scope: Scope) -> bool:
+    headers = Headers(scope=scope)
+    return bool(headers.get(PRIMARY_HEADER)) or PRIMARY_COOKIE in cookie_parser(headers.get("cookie", ""))
+
+
+def request_session(**kwargs: Any) -> Session:
+    """Session of the current request: a replica for reads routed to one, otherwise the primary."""
+    routing = _current.get()
+    replica = replicas.pick() if routing is not None and routing.reads_replica else None
+    db = replica.session(**kwargs) if replica is not None else SqlAlchemyConfig.session(**kwargs)
+    if routing is not None:
+        routing.sessions.append(db)
+    return db
+
+
+async def async_request_session(**kwargs: Any) -> AsyncSession:
+    routing = _current.get()
+    replica = await replicas.async_pick() if routing is not None and routing.reads_replica else None
+    db = replica.async_session(**kwargs) if replica is not None else SqlAlchemyConfig.async_session(**kwargs)
+    if routing is not None:
+        routing.sessions.append(db)
+    return db
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Routes the ``get_db`` sessions of GET / HEAD requests to a read replica, unless the client sends the
+    read-your-writes pin (``X-Read-Primary`` header or ``read_primary`` cookie). A successful response to a
+    request that wrote through the CRUD (bumped an entity version) sets the pin for ``pin_seconds``, so
+    the client's next reads see its writes even on replicas that are still behind.
+    """
+
+    def __init__(self, app: ASGIApp, pin_seconds: int) -> None:
+        self.app = app
+        self.pin_seconds = pin_seconds
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        routing = RequestRouting(reads_replica=scope["method"] in READ_METHODS and not pinned(scope))
+        token = _current.set(routing)
+
+        async def send_with_pin(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400 and routing.wrote():
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Set-Cookie",
+                    f"{PRIMARY_COOKIE}=1; Max-Age={self.pin_seconds}; Path=/; HttpOnly; SameSite=Lax",
+                )
+                headers[PRIMARY_HEADER] = str(self.pin_seconds)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_pin)
+        finally:
+            _current.reset(token)
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import functools
+import inspect
+import typing
+from typing import Any, Callable
+
+from fastapi import Response
+from fastapi.routing import APIRoute
+from pydantic import TypeAdapter
+
+
+# Keyword parameter added to list endpoints that do not take the Response themselves
+_RESPONSE = "_json_response"
+
+_SKIPPED_HEADERS = (b"content-length", b"content-type")
+
+
+def shared_parameter(parameters: list[inspect.Parameter], annotation: type, default_name: str) -> str:
+    """
+    Name of the endpoint parameter FastAPI injects ``annotation`` (Request / Response) into. FastAPI fills
+    one parameter only, so a wrapper shares the endpoint's own one, or appends a keyword-only ``default_name``.
+    """
+    own = next((p.name for p in parameters if p.annotation is annotation), None)
+    if own is not None:
+        return own
+    parameters.append(inspect.Parameter(default_name, inspect.Parameter.KEYWORD_ONLY, annotation=annotation))
+    return default_name
+
+
+def dump_json(adapter: TypeAdapter, result: Any) -> bytes:
+    """
+    JSON body of ``result`` for the response model of ``adapter``. Items may be models, dicts or projection
+    rows (read by attribute); one validation pass in pydantic-core builds the models, which it serializes.
+    """
+    return adapter.dump_json(adapter.validate_python(result, from_attributes=True), by_alias=True)
+
+
+def json_response(adapter: TypeAdapter, result: Any, response: Response, status_code: int) -> Response:
+    """``result`` serialized into a response with the headers the handler set on its Response parameter."""
+    if isinstance(result, Response):
+        return result
+    out = Response(
+        dump_json(adapter, result), status_code=response.status_code or status_code, media_type="application/json"
+    )
+    out.raw_headers.extend(header for header in response.raw_headers if header[0] not in _SKIPPED_HEADERS)
+    return out
+
+
+def is_list_model(response_model: Any) -> bool:
+    return typing.get_origin(response_model) is list
+
+
+def serialize_endpoint(endpoint: Callable[..., Any], response_model: Any, status_code: int) -> Callable[..., Any]:
+    """
+    Wrap a list endpoint so it returns its JSON body as bytes. FastAPI would validate the returned items
+    against the response model in a second step (in the threadpool for sync handlers) and serialize
+    them afterwards; here both happen in the handler call. The route keeps its ``response_model``, so
+    the OpenAPI schema does not change.
+    """
+    adapter = TypeAdapter(response_model)
+    signature = inspect.signature(endpoint, eval_str=True)
+    parameters = list(signature.parameters.values())
+    response_name = shared_parameter(parameters, Response, _RESPONSE)
+
+    def take(kwargs: dict[str, Any]) -> Response:
+        response = kwargs[response_name]
+        kwargs.pop(_RESPONSE, None)
+        return response
+
+    if inspect.iscoroutinefunction(endpoint):
+
+        @functools.wraps(endpoint)
+        async def wrapper(**kwargs: Any) -> Any:
+            response = take(kwargs)
+            return json_response(adapter, await endpoint(**kwargs), response, status_code)
+
+    else:
+
+        @functools.wraps(endpoint)
+        def wrapper(**kwargs: Any) -> Any:
+            response = take(kwargs)
+            return json_response(adapter, endpoint(**kwargs), response, status_code)
+
+    wrapper.__signature__ = signature.replace(parameters=parameters)
+    # Routes rebuilt from this endpoint (include_router) must not wrap it again
+    wrapper.serializes_json = True
+    return wrapper
+
+
+class JsonListRoute(APIRoute):
+    """Route class whose list endpoints serialize their response with ``serialize_endpoint``."""
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any) -> None:
+        from app.config.settings import settings
+
+        response_model = kwargs.get("response_model")
+        wrapped = getattr(endpoint, "serializes_json", False)
+        if settings.fast_list_serialization and is_list_model(response_model) and not wrapped:
+            endpoint = serialize_endpoint(endpoint, response_model, kwargs.get("status_code") or 200)
+        super().__init__(path, endpoint, **kwargs)
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine
+
+from app.api.instrumentation import current_route
+
+
+# Plan of a slow statement, by dialect; other dialects get no plan
+EXPLAIN_PREFIXES = {"mysql": "EXPLAIN FORMAT=JSON ", "sqlite": "EXPLAIN QUERY PLAN "}
+EXPLAINABLE = ("select", "with", "insert", "replace", "update", "delete")
+
+# Items of a list parameter (IN lists of bulk writes) kept in a capture
+MAX_PARAMETER_ITEMS = 100
+
+# Start times of the statements in flight on a connection
+_STARTED = "slow_query_started"
+
+
+@dataclass(frozen=True)
+class SlowQuery:
+    at: str
+    duration_ms: float
+    route: str | None
+    statement: str
+    parameters: Any
+    # EXPLAIN output: a JSON document on MySQL, plan rows on SQLite; None when the statement can't be explained
+    plan: Any
+    pid: int
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        items = [_jsonable(v) for v in value[:MAX_PARAMETER_ITEMS]]
+        if len(value) > MAX_PARAMETER_ITEMS:
+            items.append(f"... {len(value) - MAX_PARAMETER_ITEMS} more")
+        return items
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def explain(conn: Connection, statement: str, parameters: Any, context: Any) -> Any:
+    """
+    Plan of a statement that has just run, through a separate DB-API cursor of the same connection (no
+    engine events, same transaction). A streamed result still holds the connection, so it is not explained.
+    """
+    prefix = EXPLAIN_PREFIXES.get(conn.dialect.name)
+    if prefix is None or context is None or context.executemany:
+        return None
+    if not statement.lstrip().lower().startswith(EXPLAINABLE):
+        return None
+    if context.execution_options.get("stream_results") or context.execution_options.get("yield_per"):
+        return None
+
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        rows = cursor.fetchall()
+    except Exception as exc:  # a plan is best effort: the statement itself has succeeded
+        return {"error": str(exc)}
+    finally:
+        cursor.close()
+    if conn.dialect.name == "mysql":
+        return json.loads(rows[0][0])
+    return [list(row) for row in rows]
+
+
+class SlowQueryLog:
+    """
+    Opt-in recorder of statements slower than ``threshold_ms``: SQL, parameters, route of the request
+    and the plan, kept in a ring buffer of ``max_entries`` and appended to a JSON-lines file per day in
+    ``log_dir`` when one is set. Hooks into the cursor events of every engine.
+    """
+
+    def __init__(
+        self,
+        enabled: bool | None = None,
+        threshold_ms: float | None = None,
+        max_entries: int | None = None,
+        log_dir: str | None = None,
+    ) -> None:
+        self._enabled = enabled
+        self._threshold_ms = threshold_ms
+        self._max_entries = max_entries
+        self._log_dir = log_dir
+        self._entries: deque[SlowQuery] | None = None
+        self._file_lock = threading.Lock()
+
+    def _setting(self, attr: str, name: str) -> Any:
+        # Imported lazily: scripts load .env only after importing the API modules
+        if getattr(self, attr) is None:
+            from app.config.settings import settings
+
+            setattr(self, attr, getattr(settings, name))
+        return getattr(self, attr)
+
+    @property
+    def enabled(self) -> bool:
+        return self._setting("_enabled", "slow_query_log_enabled")
+
+    @property
+    def threshold_ms(self) -> float:
+        return self._setting("_threshold_ms", "slow_query_threshold_ms")
+
+    @property
+    def max_entries(self) -> int:
+        return self._setting("_max_entries", "slow_query_max_entries")
+
+    @property
+    def log_dir(self) -> str:
+        return self._setting("_log_dir", "slow_query_log_dir")
+
+    @property
+    def entries(self) -> deque[SlowQuery]:
+        if self._entries is None:
+            self._entries = deque(maxlen=self.max_entries)
+        return self._entries
+
+    def recent(self, limit: int | None = None) -> list[SlowQuery]:
+        """Captures, newest first."""
+        entries = list(self.entries)[::-1]
+        return entries[:limit] if limit is not None else entries
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+    def record(self, conn: Connection, statement: str, parameters: Any, context: Any, elapsed: float) -> SlowQuery:
+        query = SlowQuery(
+            at=datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            duration_ms=round(elapsed * 1000, 3),
+            route=current_route(),
+            statement=statement,
+            parameters=_jsonable(parameters),
+            plan=explain(conn, statement, parameters, context),
+            pid=os.getpid(),
+        )
+        # deque.append is atomic: readers and other threads need no lock
+        self.entries.append(query)
+        if self.log_dir:
+            self.write(query)
+        return query
+
+    def write(self, query: SlowQuery) -> None:
+        path = Path(self.log_dir) / f"slow-queries-{query.at[:10]}.jsonl"
+        line = json.dumps(asdict(query), ensure_ascii=False, default=str) + "\n"
+        with self._file_lock:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # One append per line: lines of several workers sharing the file don't interleave
+            with path.open("a", encoding="utf-8") as f:
+                f.write(line)
+
+
+slow_query_log = SlowQueryLog()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if slow_query_log.enabled:
+        conn.info.setdefault(_STARTED, []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started = conn.info.get(_STARTED)
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    if elapsed * 1000 >= slow_query_log.threshold_ms:
+        slow_query_log.record(conn, statement, parameters, context, elapsed)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context) -> None:
+    started = context.connection.info.get(_STARTED) if context.connection is not None else None
+    if started:
+        started.pop()
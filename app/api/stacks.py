@@ -0,0 +1,100 @@
+"""
+The two stacks the v1 API runs on: ``Session`` handlers in the threadpool and native asyncio handlers on
+``AsyncSession`` (``DB_ASYNC=true``). The routers are written once against a ``Stack``.
+"""
+
+from __future__ import annotations
+
+import functools
+import inspect
+from dataclasses import dataclass
+from typing import Any, Callable, Generator
+
+from app.api.deps import get_async_db, get_db
+from app.api.imports import BatchWriter, async_batch_writer, batch_writer
+from app.crud.activity import AsyncCRUDActivity, CRUDActivity, activity_crud, async_activity_crud
+from app.crud.building import AsyncCRUDBuilding, CRUDBuilding, async_building_crud, building_crud
+from app.crud.organization import AsyncCRUDOrganization, CRUDOrganization, async_organization_crud, organization_crud
+
+
+def _run(steps: Generator[Any, Any, Any]) -> Any:
+    try:
+        result = next(steps)
+        while True:
+            result = steps.send(result)
+    except StopIteration as stop:
+        return stop.value
+
+
+async def _async_run(steps: Generator[Any, Any, Any]) -> Any:
+    try:
+        call = next(steps)
+        while True:
+            call = steps.send(await call)
+    except StopIteration as stop:
+        return stop.value
+
+
+@dataclass(frozen=True)
+class Stack:
+    """Session dependency and CRUD objects of one stack."""
+
+    is_async: bool
+    get_db: Callable[..., Any]
+    activity: CRUDActivity | AsyncCRUDActivity
+    building: CRUDBuilding | AsyncCRUDBuilding
+    organization: CRUDOrganization | AsyncCRUDOrganization
+    batch_writer: Callable[..., BatchWriter]
+
+    def endpoint(self, handler: Callable[..., Any]) -> Callable[..., Any]:
+        """
+        FastAPI endpoint of ``handler`` on this stack. A handler that talks to the database is a generator
+        yielding each CRUD call: the sync stack sends the result straight back, the asyncio stack awaits it
+        first. Coroutine handlers are used as they are; other handlers run on the event loop of the asyncio
+        stack instead of the threadpool.
+        """
+        if inspect.iscoroutinefunction(handler) or not (self.is_async or inspect.isgeneratorfunction(handler)):
+            return handler
+
+        if not inspect.isgeneratorfunction(handler):
+
+            @functools.wraps(handler)
+            async def endpoint(**kwargs: Any) -> Any:
+                return handler(**kwargs)
+
+        elif self.is_async:
+
+            @functools.wraps(handler)
+            async def endpoint(**kwargs: Any) -> Any:
+                return await _async_run(handler(**kwargs))
+
+        else:
+
+            @functools.wraps(handler)
+            def endpoint(**kwargs: Any) -> Any:
+                return _run(handler(**kwargs))
+
+        # FastAPI unwraps endpoints and would stream the generator handler as JSON Lines; annotations are
+        # strings resolved in the handler's module, not in this one
+        del endpoint.__wrapped__
+        endpoint.__signature__ = inspect.signature(handler, eval_str=True)
+        return endpoint
+
+
+sync_stack = Stack(
+    is_async=False,
+    get_db=get_db,
+    activity=activity_crud,
+    building=building_crud,
+    organization=organization_crud,
+    batch_writer=batch_writer,
+)
+
+async_stack = Stack(
+    is_async=True,
+    get_db=get_async_db,
+    activity=async_activity_crud,
+    building=async_building_crud,
+    organization=async_organization_crud,
+    batch_writer=async_batch_writer,
+)
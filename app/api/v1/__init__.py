@@ -1,12 +1,21 @@
 from fastapi import APIRouter, Depends
 
 from app.security.api_key import require_api_key
-from .organizations import router as organizations_router
-from .activities import router as activities_router
-from .buildings import router as buildings_router
+from .organizations import async_router as async_organizations_router, router as organizations_router
+from .activities import async_router as async_activities_router, router as activities_router
+from .buildings import async_router as async_buildings_router, router as buildings_router
+from .system import router as system_router
 
 
 api_v1_router = APIRouter(dependencies=[Depends(require_api_key)])
 api_v1_router.include_router(organizations_router, prefix="/organizations", tags=["Organizations"])
 api_v1_router.include_router(activities_router, prefix="/activities", tags=["Activities"])
 api_v1_router.include_router(buildings_router, prefix="/buildings", tags=["Buildings"])
+api_v1_router.include_router(system_router, prefix="/system", tags=["System"])
+
+# Same API served by asyncio handlers on AsyncSession, selected with settings.db_async
+api_v1_async_router = APIRouter(dependencies=[Depends(require_api_key)])
+api_v1_async_router.include_router(async_organizations_router, prefix="/organizations", tags=["Organizations"])
+api_v1_async_router.include_router(async_activities_router, prefix="/activities", tags=["Activities"])
+api_v1_async_router.include_router(async_buildings_router, prefix="/buildings", tags=["Buildings"])
+api_v1_async_router.include_router(system_router, prefix="/system", tags=["System"])
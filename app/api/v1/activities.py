@@ -1,47 +1,102 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, Path, Query
+from fastapi import APIRouter, Body, Depends, Path, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db
-from app.crud.activity import activity_crud
-from app.schemas.activity import ActivityCreate, ActivityOut, ActivityUpdate
-
-
-router = APIRouter()
-
-
-@router.post("", response_model=ActivityOut, summary="Создание активности")
-def create_activity(payload: ActivityCreate, db: Session = Depends(get_db)):
-    """
-    Данный метод позволяет создать новую активность. Нужен для проверки ограничений вложенности активностей.
-    """
-    obj = activity_crud.create(db, payload.model_dump(exclude_unset=True))
-    return ActivityOut.model_validate(obj.__dict__)
-
-
-@router.put("/{activity_id}", response_model=ActivityOut, summary="Обновление активности")
-def update_activity(
-    payload: ActivityUpdate,
-    activity_id: int = Path(..., ge=1),
-    db: Session = Depends(get_db),
-):
-    """
-    Данный метод позволяет обновить активность. Нужен для проверки ограничений вложенности активностей.
-    """
-    obj = activity_crud.require(db, activity_id)
-    obj = activity_crud.update(db, obj, payload.model_dump(exclude_unset=True))
-    return ActivityOut.model_validate(obj.__dict__)
-
-
-@router.get("", response_model=list[ActivityOut], summary="Получение всех активностей")
-def get_activities(
-    limit: int = Query(50, ge=0, le=1000, description="Количество активностей на странице"),
-    offset: int = Query(0, ge=0, description="Смещение для пагинации"),
-    db: Session = Depends(get_db),
-):
-    """
-    Данный метод позволяет получить все активности.
-    """
-    objs = activity_crud.list(db, offset=offset, limit=limit)
-    return [ActivityOut.model_validate(o.__dict__) for o in objs]
+from app.api.cache import CachedRoute, cached
+from app.api.imports import IMPORT_OPENAPI, import_rows
+from app.api.instrumentation import query_budget
+from app.api.pagination import cursor_query, set_next_cursor
+from app.api.stacks import Stack, async_stack, sync_stack
+from app.config.settings import settings
+from app.schemas.activity import ActivityBulkItem, ActivityCreate, ActivityOut, ActivityUpdate
+from app.schemas.bulk import BulkOut, ImportOut
+
+
+def build_router(stack: Stack) -> APIRouter:
+    router = APIRouter(route_class=CachedRoute)
+    activity_crud = stack.activity
+
+    @router.post("", response_model=ActivityOut, summary="Создание активности")
+    @stack.endpoint
+    def create_activity(payload: ActivityCreate, db: Session | AsyncSession = Depends(stack.get_db)):
+        """
+        Данный метод позволяет создать новую активность. Нужен для проверки ограничений вложенности активностей.
+        """
+        obj = yield activity_crud.create(db, payload.model_dump(exclude_unset=True))
+        return ActivityOut.model_validate(obj.__dict__)
+
+    @router.post("/bulk", response_model=BulkOut, summary="Массовое создание активностей")
+    @stack.endpoint
+    def bulk_create_activities(
+        payload: list[ActivityBulkItem] = Body(..., max_length=settings.bulk_max_items),
+        db: Session | AsyncSession = Depends(stack.get_db),
+    ):
+        """
+        Данный метод позволяет создать пачку активностей под существующими родителями или под записями этой же
+        пачки: запись с указанным ID может быть родителем следующих за ней записей. Ограничение вложенности
+        проверяется одним запросом на всю пачку. Возвращает ID в порядке входных данных.
+        """
+        ids = yield activity_crud.bulk_create(db, [item.model_dump() for item in payload])
+        return BulkOut(ids=ids)
+
+    @router.post(
+        "/import", response_model=ImportOut, summary="Потоковый импорт активностей", openapi_extra=IMPORT_OPENAPI
+    )
+    async def import_activities(
+        request: Request,
+        batch_size: int = Query(
+            settings.import_batch_size, ge=1, le=settings.bulk_max_items, description="Записей в одной транзакции"
+        ),
+        db: Session | AsyncSession = Depends(stack.get_db),
+    ):
+        """
+        Данный метод позволяет загрузить активности из NDJSON (``application/x-ndjson``) или CSV (``text/csv``,
+        первая строка - заголовок). Тело разбирается по мере получения, записи пишутся пачками по
+        ``batch_size``, каждая пачка в своей транзакции. Возвращает ход записи по пачкам и ошибки отдельных
+        записей.
+        """
+        writer = stack.batch_writer(db, activity_crud.bulk_create)
+        return await import_rows(request, ActivityBulkItem, writer, batch_size)
+
+    @router.put("/{activity_id}", response_model=ActivityOut, summary="Обновление активности")
+    @stack.endpoint
+    def update_activity(
+        payload: ActivityUpdate,
+        activity_id: int = Path(..., ge=1),
+        db: Session | AsyncSession = Depends(stack.get_db),
+    ):
+        """
+        Данный метод позволяет обновить активность. Нужен для проверки ограничений вложенности активностей.
+        """
+        obj = yield activity_crud.require(db, activity_id)
+        obj = yield activity_crud.update(db, obj, payload.model_dump(exclude_unset=True))
+        return ActivityOut.model_validate(obj.__dict__)
+
+    @router.get("", response_model=list[ActivityOut], summary="Получение всех активностей")
+    @query_budget(2)
+    @cached(activity_crud.family)
+    @stack.endpoint
+    def get_activities(
+        response: Response,
+        limit: int = Query(50, ge=0, le=1000, description="Количество активностей на странице"),
+        offset: int = Query(0, ge=0, description="Смещение для пагинации"),
+        depth: int | None = Query(None, ge=1, description="Уровень вложенности активности"),
+        cursor: str | None = cursor_query(),
+        db: Session | AsyncSession = Depends(stack.get_db),
+    ):
+        """
+        Данный метод позволяет получить все активности.
+        """
+        page = yield activity_crud.list_page(
+            db, cursor=cursor, offset=offset, limit=limit, options="row", depth=depth
+        )
+        set_next_cursor(response, page)
+        return page.items
+
+    return router
+
+
+router = build_router(sync_stack)
+async_router = build_router(async_stack)
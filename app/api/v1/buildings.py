@@ -1,20 +1,92 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Body, Depends, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db
-from app.crud.building import building_crud
-from app.schemas.building import BuildingOut
+from app.api.batch import BatchIdsBody, BatchIdsQuery
+from app.api.cache import CachedRoute, cached
+from app.api.imports import IMPORT_OPENAPI, import_rows
+from app.api.instrumentation import query_budget
+from app.api.pagination import cursor_query, set_next_cursor
+from app.api.stacks import Stack, async_stack, sync_stack
+from app.config.settings import settings
+from app.schemas.building import BuildingBatchOut, BuildingBulkItem, BuildingOut
+from app.schemas.bulk import BulkOut, ImportOut
 
 
-router = APIRouter()
+def build_router(stack: Stack) -> APIRouter:
+    router = APIRouter(route_class=CachedRoute)
+    building_crud = stack.building
 
+    @router.get("", response_model=list[BuildingOut], summary="List buildings")
+    @query_budget(2)
+    @cached(building_crud.family)
+    @stack.endpoint
+    def list_buildings(
+        response: Response,
+        limit: int = Query(50, ge=1, le=1000),
+        offset: int = Query(0, ge=0),
+        cursor: str | None = cursor_query(),
+        db: Session | AsyncSession = Depends(stack.get_db),
+    ):
+        page = yield building_crud.list_page(db, cursor=cursor, offset=offset, limit=limit, options="row")
+        set_next_cursor(response, page)
+        return page.items
 
-@router.get("", response_model=list[BuildingOut], summary="List buildings")
-def list_buildings(
-    limit: int = Query(50, ge=1, le=1000),
-    offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db),
-):
-    return building_crud.list(db, limit=limit, offset=offset)
+    @router.get("/batch", response_model=BuildingBatchOut, summary="Buildings by id list")
+    @query_budget(2)
+    @cached(building_crud.family)
+    @stack.endpoint
+    def get_buildings_batch(ids: BatchIdsQuery, db: Session | AsyncSession = Depends(stack.get_db)):
+        """
+        Buildings of the given ids in one query, in the order of the ids (a repeated id once); ids that don't
+        exist are listed in ``missing``.
+        """
+        items, missing = yield building_crud.get_many(db, ids, options="row")
+        return {"items": items, "missing": missing}
+
+    @router.post("/batch", response_model=BuildingBatchOut, summary="Buildings by id list in the request body")
+    @query_budget(1)
+    @stack.endpoint
+    def post_buildings_batch(ids: BatchIdsBody, db: Session | AsyncSession = Depends(stack.get_db)):
+        """Same as ``GET /batch``, for long id lists in the request body."""
+        items, missing = yield building_crud.get_many(db, ids, options="row")
+        return {"items": items, "missing": missing}
+
+    @router.post("/bulk", response_model=BulkOut, summary="Bulk create or replace buildings")
+    @stack.endpoint
+    def bulk_buildings(
+        payload: list[BuildingBulkItem] = Body(..., max_length=settings.bulk_max_items),
+        db: Session | AsyncSession = Depends(stack.get_db),
+    ):
+        """
+        Items with an id overwrite that building (or create it with that id), the others are created.
+        Returns the ids in input order.
+        """
+        ids = yield building_crud.bulk_upsert(db, [item.model_dump() for item in payload])
+        return BulkOut(ids=ids)
+
+    @router.post(
+        "/import", response_model=ImportOut, summary="Streaming import of buildings", openapi_extra=IMPORT_OPENAPI
+    )
+    async def import_buildings(
+        request: Request,
+        batch_size: int = Query(
+            settings.import_batch_size, ge=1, le=settings.bulk_max_items, description="Rows per transaction"
+        ),
+        db: Session | AsyncSession = Depends(stack.get_db),
+    ):
+        """
+        NDJSON (``application/x-ndjson``) or CSV (``text/csv``, header row) of buildings, parsed while the body
+        arrives. Rows are validated one by one and written in batches of ``batch_size``, each in its own
+        transaction; rows with an id overwrite that building. Invalid rows and failed batches are reported.
+        """
+        writer = stack.batch_writer(db, building_crud.bulk_upsert)
+        return await import_rows(request, BuildingBulkItem, writer, batch_size)
+
+    return router
+
+
+router = build_router(sync_stack)
+async_router = build_router(async_stack)
@@ -1,143 +1,217 @@
 from __future__ import annotations
 
-from typing import Iterable
+from typing import Annotated
 
-from fastapi import APIRouter, Depends, Query
-from pydantic import BaseModel, Field
-from sqlalchemy import func, select
+from fastapi import APIRouter, Body, Depends, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db
-from app.crud.activity import MAX_DEPTH
-from app.model.activity import Activity
-from app.model.building import Building
-from app.model.organization import Organization
-from app.schemas.organization import OrganizationOut
-
-
-router = APIRouter()
-
-
-def _collect_activity_subtree_ids(db: Session, roots: Iterable[int]) -> set[int]:
-    all_ids: set[int] = set(int(r) for r in roots)
-    frontier: set[int] = set(all_ids)
-    for _ in range(MAX_DEPTH):
-        if not frontier:
-            break
-        rows = db.execute(select(Activity.id).where(Activity.parent_id.in_(frontier))).scalars().all()
-        new_ids = set(rows) - all_ids
-        if not new_ids:
-            break
-        all_ids |= new_ids
-        frontier = new_ids
-    return all_ids
-
-
-@router.get("/search", response_model=list[OrganizationOut], summary="Поиск организаций по названию активности")
-def get_organization(
-    activity_name: str = Query(description="Название активности"),
-    limit: int = Query(50, ge=0, le=1000, description="Количество организаций на странице"),
-    offset: int = Query(0, ge=0, description="Смещение для пагинации"),
-    db: Session = Depends(get_db),
-):
-    """
-    Данный метод позволяет найти все организации, активность которых входит в дерево заданной активности.
-    """
-    stmt = select(Organization)
-    roots: list[int] = []
-    rows = db.execute(select(Activity.id).where(func.lower(Activity.name) == func.lower(activity_name))).scalars().all()
-    roots.extend(rows)
-    if roots:
-        activity_ids = _collect_activity_subtree_ids(db, roots)
-
-        if activity_ids:
-            stmt = stmt.join(Organization.activities).where(Activity.id.in_(activity_ids))
-
-    stmt = stmt.offset(offset).limit(limit)
-
-    objs = list(db.scalars(stmt))
-    return [OrganizationOut.model_validate(o.__dict__) for o in objs]
-
-
-class OrganizationFilter(BaseModel):
-    building_id: int | None = Field(default=None, description="ID здания")
-    organization_id: int | None = Field(default=None, description="ID организации")
-    organization_name: str | None = Field(default=None, min_length=1, description="Название организации")
-    activity_name: str | None = Field(default=None, min_length=1, description="Название активности")
-
-
-@router.post("/filter", response_model=list[OrganizationOut], summary="Фильтрация организаций")
-def get_organization_by_filter(
-    payload: OrganizationFilter,
-    limit: int = Query(50, ge=0, le=1000, description="Количество организаций на странице"),
-    offset: int = Query(0, ge=0, description="Смещение для пагинации"),
-    db: Session = Depends(get_db),
-):
-    """
-    Данный метод позволяет найти все организации, которые соответствуют указанным фильтрам.
-    """
-    stmt = select(Organization)
-
-    if payload.organization_id:
-        stmt = stmt.where(Organization.id == payload.organization_id)
-
-    if payload.organization_name:
-        like = f"%{payload.organization_name}%"
-        stmt = stmt.where(func.lower(Organization.name).like(func.lower(like)))
-
-    if payload.building_id:
-        stmt = stmt.where(Organization.building_id == payload.building_id)
-
-    if payload.activity_name:
-        like = f"%{payload.activity_name}%"
-        stmt = stmt.join(Organization.activities).where(func.lower(Activity.name).like(func.lower(like)))
-
-    stmt = stmt.offset(offset).limit(limit)
-
-    objs = list(db.scalars(stmt))
-    return [OrganizationOut.model_validate(o.__dict__) for o in objs]
-
-
-@router.get("/nearby/radius", response_model=list[OrganizationOut], summary="Организации в заданном радиусе")
-def organizations_nearby_radius(
-    center_lat: float = Query(..., description="Широта центра"),
-    center_lon: float = Query(..., description="Долгота центра"),
-    radius: float = Query(..., ge=0, description="Радиус"),
-    limit: int = Query(50, ge=1, le=1000, description="Количество организаций на странице"),
-    offset: int = Query(0, ge=0, description="Смещение для пагинации"),
-    db: Session = Depends(get_db),
-):
-    """
-    Данный метод позволяет найти все организации, которые находятся в заданном радиусе.
-    """
-    stmt = select(Organization).join(Organization.building)
-    center = func.Point(center_lon, center_lat)
-    location = func.Point(Building.longitude, Building.latitude)
-    distance = func.ST_Distance_Sphere(center, location)
-    stmt = stmt.where(distance <= radius)
-    stmt = stmt.offset(offset).limit(limit)
-    objs = list(db.scalars(stmt))
-    return [OrganizationOut.model_validate(o.__dict__) for o in objs]
-
-
-@router.get("/nearby/square", response_model=list[OrganizationOut], summary="Организации в заданном прямоугольнике")
-def organizations_nearby_square(
-    lat_min: float = Query(..., description="Широта от"),
-    lat_max: float = Query(..., description="Широта до"),
-    lon_min: float = Query(..., description="Долгота от"),
-    lon_max: float = Query(..., description="Долгота до"),
-    limit: int = Query(50, ge=1, le=1000, description="Количество организаций на странице"),
-    offset: int = Query(0, ge=0, description="Смещение для пагинации"),
-    db: Session = Depends(get_db),
-):
-    """
-    Данный метод позволяет найти все организации, которые находятся в заданном прямоугольнике.
-    """
-    stmt = select(Organization).join(Organization.building)
-    stmt = stmt.where(
-        Building.latitude.between(lat_min, lat_max),
-        Building.longitude.between(lon_min, lon_max),
+from app.api.batch import BatchIdsBody, BatchIdsQuery
+from app.api.cache import CachedRoute, cached
+from app.api.imports import IMPORT_OPENAPI, import_rows
+from app.api.instrumentation import query_budget
+from app.api.ndjson import NDJSON_MEDIA_TYPE, ndjson_response
+from app.api.pagination import cursor_query, set_next_cursor
+from app.api.stacks import Stack, async_stack, sync_stack
+from app.config.settings import settings
+from app.crud.organization import KNN_STEPS, RADIUS_WALK_BATCHES
+from app.schemas.bulk import BulkOut, ImportOut
+from app.schemas.organization import (
+    OrganizationBatchOut,
+    OrganizationBulkItem,
+    OrganizationExport,
+    OrganizationFilter,
+    OrganizationNearbyOut,
+    OrganizationOut,
+)
+
+
+def build_router(stack: Stack) -> APIRouter:
+    router = APIRouter(route_class=CachedRoute)
+    activity_crud, building_crud, organization_crud = stack.activity, stack.building, stack.organization
+
+    @router.get("/search", response_model=list[OrganizationOut], summary="Поиск организаций по названию активности")
+    @query_budget(4)
+    @cached(organization_crud.family, activity_crud.family)
+    @stack.endpoint
+    def get_organization(
+        response: Response,
+        activity_name: str = Query(description="Название активности"),
+        limit: int = Query(50, ge=0, le=1000, description="Количество организаций на странице"),
+        offset: int = Query(0, ge=0, description="Смещение для пагинации"),
+        cursor: str | None = cursor_query(),
+        db: Session | AsyncSession = Depends(stack.get_db),
+    ):
+        """
+        Данный метод позволяет найти все организации, активность которых входит в дерево заданной активности.
+        """
+        activity_ids = yield activity_crud.search_ids(db, activity_name)
+        stmt = organization_crud.search_stmt(activity_ids, options="row")
+
+        page = yield organization_crud.page(db, stmt, cursor=cursor, offset=offset, limit=limit)
+        set_next_cursor(response, page)
+        return page.items
+
+    @router.post("/filter", response_model=list[OrganizationOut], summary="Фильтрация организаций")
+    @query_budget(1)
+    @stack.endpoint
+    def get_organization_by_filter(
+        payload: OrganizationFilter,
+        response: Response,
+        limit: int = Query(50, ge=0, le=1000, description="Количество организаций на странице"),
+        offset: int = Query(0, ge=0, description="Смещение для пагинации"),
+        cursor: str | None = cursor_query(),
+        db: Session | AsyncSession = Depends(stack.get_db),
+    ):
+        """
+        Данный метод позволяет найти все организации, которые соответствуют указанным фильтрам.
+        """
+        stmt = organization_crud.filter_stmt(**payload.model_dump(), options="row")
+        keyset = organization_crud.filter_keyset(payload.organization_name, payload.search_mode)
+
+        page = yield organization_crud.page(db, stmt, cursor=cursor, offset=offset, limit=limit, keyset=keyset)
+        set_next_cursor(response, page)
+        return page.items
+
+    @router.get(
+        "/export",
+        summary="Выгрузка организаций в NDJSON",
+        responses={200: {"content": {NDJSON_MEDIA_TYPE: {}}, "description": "Одна организация на строку"}},
     )
-    stmt = stmt.offset(offset).limit(limit)
-    objs = list(db.scalars(stmt))
-    return [OrganizationOut.model_validate(o.__dict__) for o in objs]
+    @query_budget(1)
+    @stack.endpoint
+    def export_organizations(
+        params: Annotated[OrganizationExport, Query()],
+        db: Session | AsyncSession = Depends(stack.get_db),
+    ):
+        """
+        Данный метод позволяет выгрузить все организации, которые соответствуют фильтрам, по одной на строку
+        (NDJSON) в порядке ID. Строки читаются из БД курсором на стороне сервера и отдаются по мере чтения.
+        """
+        stmt = organization_crud.export_stmt(**params.model_dump())
+        return ndjson_response(organization_crud.export_batches(db, stmt, settings.export_batch_size))
+
+    @router.get("/nearby/radius", response_model=list[OrganizationOut], summary="Организации в заданном радиусе")
+    # Cache versions, a geo index reload (versions and rows), the walk; past the walk one SQL page instead
+    @query_budget(3 + RADIUS_WALK_BATCHES)
+    @cached(organization_crud.family, building_crud.family)
+    @stack.endpoint
+    def organizations_nearby_radius(
+        response: Response,
+        center_lat: float = Query(..., ge=-90, le=90, description="Широта центра"),
+        center_lon: float = Query(..., ge=-180, le=180, description="Долгота центра"),
+        radius: float = Query(..., ge=0, description="Радиус, м"),
+        limit: int = Query(50, ge=1, le=1000, description="Количество организаций на странице"),
+        offset: int = Query(0, ge=0, description="Смещение для пагинации"),
+        cursor: str | None = cursor_query(),
+        db: Session | AsyncSession = Depends(stack.get_db),
+    ):
+        """
+        Данный метод позволяет найти все организации, которые находятся в заданном радиусе.
+        """
+        page = yield organization_crud.radius_page(
+            db, center_lat, center_lon, radius, cursor=cursor, offset=offset, limit=limit, options="row"
+        )
+        set_next_cursor(response, page)
+        return page.items
+
+    @router.get("/nearby/knn", response_model=list[OrganizationNearbyOut], summary="Ближайшие организации")
+    # As /nearby/radius, then one query per radius of the SQL search when the walk gives up
+    @query_budget(3 + RADIUS_WALK_BATCHES + KNN_STEPS)
+    @cached(organization_crud.family, building_crud.family)
+    @stack.endpoint
+    def organizations_nearby_knn(
+        lat: float = Query(..., ge=-90, le=90, description="Широта точки"),
+        lon: float = Query(..., ge=-180, le=180, description="Долгота точки"),
+        k: int = Query(10, ge=1, le=1000, description="Количество ближайших организаций"),
+        db: Session | AsyncSession = Depends(stack.get_db),
+    ):
+        """
+        Данный метод позволяет найти k ближайших к точке организаций с расстоянием до каждой, от ближайшей.
+        """
+        rows = yield organization_crud.nearest(db, lat, lon, k, options="row")
+        return [{**o._mapping, "distance_m": distance} for o, distance in rows]
+
+    @router.get("/nearby/square", response_model=list[OrganizationOut], summary="Организации в заданном прямоугольнике")
+    @query_budget(4)
+    @cached(organization_crud.family, building_crud.family)
+    @stack.endpoint
+    def organizations_nearby_square(
+        response: Response,
+        lat_min: float = Query(..., description="Широта от"),
+        lat_max: float = Query(..., description="Широта до"),
+        lon_min: float = Query(..., description="Долгота от"),
+        lon_max: float = Query(..., description="Долгота до"),
+        limit: int = Query(50, ge=1, le=1000, description="Количество организаций на странице"),
+        offset: int = Query(0, ge=0, description="Смещение для пагинации"),
+        cursor: str | None = cursor_query(),
+        db: Session | AsyncSession = Depends(stack.get_db),
+    ):
+        """
+        Данный метод позволяет найти все организации, которые находятся в заданном прямоугольнике.
+        """
+        page = yield organization_crud.square_page(
+            db, lat_min, lat_max, lon_min, lon_max, cursor=cursor, offset=offset, limit=limit, options="row"
+        )
+        set_next_cursor(response, page)
+        return page.items
+
+    @router.get("/batch", response_model=OrganizationBatchOut, summary="Организации по списку ID")
+    @query_budget(2)
+    @cached(organization_crud.family)
+    @stack.endpoint
+    def get_organizations_batch(ids: BatchIdsQuery, db: Session | AsyncSession = Depends(stack.get_db)):
+        """
+        Данный метод позволяет получить организации по списку ID одним запросом. Организации возвращаются в
+        порядке ID в запросе (повторы - один раз), ID, которых нет, перечислены в ``missing``.
+        """
+        items, missing = yield organization_crud.get_many(db, ids, options="row")
+        return {"items": items, "missing": missing}
+
+    @router.post("/batch", response_model=OrganizationBatchOut, summary="Организации по списку ID в теле запроса")
+    @query_budget(1)
+    @stack.endpoint
+    def post_organizations_batch(ids: BatchIdsBody, db: Session | AsyncSession = Depends(stack.get_db)):
+        """То же, что ``GET /batch``, для длинных списков ID в теле запроса."""
+        items, missing = yield organization_crud.get_many(db, ids, options="row")
+        return {"items": items, "missing": missing}
+
+    @router.post("/bulk", response_model=BulkOut, summary="Массовое создание и перезапись организаций")
+    @stack.endpoint
+    def bulk_organizations(
+        payload: list[OrganizationBulkItem] = Body(..., max_length=settings.bulk_max_items),
+        db: Session | AsyncSession = Depends(stack.get_db),
+    ):
+        """
+        Данный метод позволяет создать пачку организаций вместе со связями с активностями. Организации с
+        указанным ID перезаписываются (или создаются с этим ID) вместе со списком активностей. Возвращает ID в
+        порядке входных данных.
+        """
+        ids = yield organization_crud.bulk_upsert(db, [item.model_dump() for item in payload])
+        return BulkOut(ids=ids)
+
+    @router.post(
+        "/import", response_model=ImportOut, summary="Потоковый импорт организаций", openapi_extra=IMPORT_OPENAPI
+    )
+    async def import_organizations(
+        request: Request,
+        batch_size: int = Query(
+            settings.import_batch_size, ge=1, le=settings.bulk_max_items, description="Записей в одной транзакции"
+        ),
+        db: Session | AsyncSession = Depends(stack.get_db),
+    ):
+        """
+        Данный метод позволяет загрузить организации вместе со связями с активностями из NDJSON
+        (``application/x-ndjson``) или CSV (``text/csv``, первая строка - заголовок, списки через ``;``). Тело
+        разбирается по мере получения, записи пишутся пачками по ``batch_size``, каждая пачка в своей
+        транзакции; организации с указанным ID перезаписываются. Возвращает ход записи по пачкам и ошибки
+        отдельных записей.
+        """
+        writer = stack.batch_writer(db, organization_crud.bulk_upsert)
+        return await import_rows(request, OrganizationBulkItem, writer, batch_size)
+
+    return router
+
+
+router = build_router(sync_stack)
+async_router = build_router(async_stack)
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from dataclasses import asdict
+
+from fastapi import APIRouter, Query, status
+
+from app.api.cache import response_cache
+from app.api.instrumentation import query_budget
+from app.api.slow_queries import slow_query_log
+from app.config.db import SqlAlchemyConfig
+from app.schemas.system import PoolStatusOut, ResponseCacheOut, SlowQueryOut
+
+
+router = APIRouter()
+
+
+@router.get("/db-pool", response_model=PoolStatusOut, summary="Состояние пула соединений с БД")
+@query_budget(0)
+def get_db_pool_status():
+    """
+    Данный метод возвращает загрузку пула соединений и время ожидания соединения. Нужен для подбора размера пула.
+    """
+    return PoolStatusOut(**SqlAlchemyConfig.pool_status())
+
+
+@router.get("/response-cache", response_model=ResponseCacheOut, summary="Статистика кэша ответов")
+@query_budget(0)
+def get_response_cache_status():
+    """
+    Данный метод возвращает заполнение кэша GET-ответов и счетчики попаданий и промахов.
+    """
+    return ResponseCacheOut(**response_cache.stats())
+
+
+@router.get("/slow-queries", response_model=list[SlowQueryOut], summary="Медленные SQL-запросы")
+@query_budget(0)
+def get_slow_queries(limit: int = Query(50, ge=1, le=1000, description="Количество запросов, от последнего")):
+    """
+    Данный метод возвращает последние SQL-запросы этого процесса дольше ``SLOW_QUERY_THRESHOLD_MS`` вместе с
+    параметрами, маршрутом и планом выполнения. Запись включается ``SLOW_QUERY_LOG_ENABLED``.
+    """
+    return [SlowQueryOut(**asdict(query)) for query in slow_query_log.recent(limit)]
+
+
+@router.delete("/slow-queries", status_code=status.HTTP_204_NO_CONTENT, summary="Очистка медленных SQL-запросов")
+def clear_slow_queries():
+    """
+    Данный метод очищает буфер медленных SQL-запросов этого процесса (файлы JSON-lines не трогаются).
+    """
+    slow_query_log.clear()
@@ -1,13 +1,94 @@
 import os
+import threading
+import time
+from typing import Any
 
 from sqlalchemy import URL, create_engine
 from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+
+URL_ARGS = ("database", "dialect", "driver", "host", "password", "port", "query_args", "user")
+
+
+class PoolStats:
+    """Checkout wait and connect statistics collected by :class:`InstrumentedQueuePool`."""
+
+    def __init__(self, max_overflow: int) -> None:
+        self.max_overflow = max_overflow
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.connects = 0
+        self.connect_total = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, waited: float, timed_out: bool = False, connected: float | None = None) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_total += waited
+            if waited > self.wait_max:
+                self.wait_max = waited
+            if connected is not None:
+                self.connects += 1
+                self.connect_total += connected
+
+
+# Attribute of a new connection record holding the time it took to open, until its checkout reads it
+_CONNECT_SECONDS = "_connect_seconds"
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that measures how long each checkout waits for a connection. A checkout that opens a new
+    connection (a pool miss) has the connect time counted apart, so the wait is only the time spent
+    queueing for a free slot.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats(kwargs.get("max_overflow", 10))
+
+    def _create_connection(self):
+        started = time.perf_counter()
+        record = super()._create_connection()
+        setattr(record, _CONNECT_SECONDS, time.perf_counter() - started)
+        return record
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.observe(time.perf_counter() - started, timed_out=True)
+            raise
+        connected = record.__dict__.pop(_CONNECT_SECONDS, None)
+        self.stats.observe(time.perf_counter() - started - (connected or 0.0), connected=connected)
+        return record
+
+
+class InstrumentedAsyncQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    """Asyncio flavour of :class:`InstrumentedQueuePool` used by the async engine."""
 
 
 class SqlAlchemyConfig:  # pragma: no cover
+    _engine: Engine | None = None
+    _session_maker: sessionmaker | None = None
+    _pid: int | None = None
+    _async_engine: AsyncEngine | None = None
+    _async_session_maker: async_sessionmaker | None = None
+    _async_pid: int | None = None
+    _lock = threading.Lock()
+
     @staticmethod
-    def create_engine(
+    def url(
         database: str = None,
         dialect: str = None,
         driver: str = None,
@@ -16,8 +97,7 @@ class SqlAlchemyConfig:  # pragma: no cover
         port: int = None,
         query_args: str = None,
         user: str = None,
-        **kwargs,
-    ) -> Engine:
+    ) -> URL:
         database = database or os.environ["SqlAlchemyDatabase"]
         dialect = dialect or os.environ["SqlAlchemyDialect"]
         driver = driver or os.environ["SqlAlchemyDriver"]
@@ -29,7 +109,10 @@ class SqlAlchemyConfig:  # pragma: no cover
         # Assemble drivername according to SQLAlchemy scheme: "dialect+driver"
         # If driver is not provided, use only the dialect part
         drivername = f"{dialect}+{driver}" if driver else dialect
-        url = URL.create(
+        if dialect == "sqlite":
+            # Local stand-in: SQLite only understands the database file path
+            return URL.create(drivername=drivername, database=database)
+        return URL.create(
             drivername=drivername,
             username=user,
             password=password,
@@ -38,7 +121,31 @@ class SqlAlchemyConfig:  # pragma: no cover
             database=database,
             query=query_args,
         )
-        return create_engine(url, **kwargs)
+
+    @classmethod
+    def create_engine(cls, **kwargs) -> Engine:
+        url_args = {k: kwargs.pop(k) for k in list(kwargs) if k in URL_ARGS}
+        return create_engine(cls.url(**url_args), **kwargs)
+
+    @classmethod
+    def create_async_engine(cls, **kwargs) -> AsyncEngine:
+        url_args = {k: kwargs.pop(k) for k in list(kwargs) if k in URL_ARGS}
+        url_args.setdefault("driver", os.environ.get("SqlAlchemyAsyncDriver", "aiomysql"))
+        return create_async_engine(cls.url(**url_args), **kwargs)
+
+    @staticmethod
+    def pool_options(asyncio: bool = False) -> dict[str, Any]:
+        # Imported lazily: scripts load .env only after importing this module
+        from app.config.settings import settings
+
+        return {
+            "poolclass": InstrumentedAsyncQueuePool if asyncio else InstrumentedQueuePool,
+            "pool_size": settings.db_pool_size,
+            "max_overflow": settings.db_max_overflow,
+            "pool_pre_ping": settings.db_pool_pre_ping,
+            "pool_recycle": settings.db_pool_recycle,
+            "pool_timeout": settings.db_pool_timeout,
+        }
 
     @classmethod
     def create_session_maker(cls, **kwargs) -> sessionmaker:
@@ -46,8 +153,105 @@ class SqlAlchemyConfig:  # pragma: no cover
 
     @classmethod
     def engine(cls, **kwargs) -> Engine:
-        return cls.create_engine(**kwargs)
+        """
+        Process-wide engine shared by all sessions.
+
+        Passing keyword arguments builds a dedicated engine that is not cached.
+        """
+        if kwargs:
+            return cls.create_engine(**kwargs)
+        if cls._engine is None or cls._pid != os.getpid():
+            with cls._lock:
+                if cls._engine is None or cls._pid != os.getpid():
+                    if cls._engine is not None:
+                        # Inherited from the parent process: drop the pool without closing its sockets
+                        cls._engine.dispose(close=False)
+                    cls._engine = cls.create_engine(**cls.pool_options())
+                    cls._session_maker = sessionmaker(cls._engine)
+                    cls._pid = os.getpid()
+        return cls._engine
+
+    @classmethod
+    def session_maker(cls) -> sessionmaker:
+        cls.engine()
+        return cls._session_maker
 
     @classmethod
     def session(cls, **kwargs) -> Session:
-        return cls.create_session_maker(**kwargs)()
+        return cls.session_maker()(**kwargs)
+
+    @classmethod
+    def async_engine(cls, **kwargs) -> AsyncEngine:
+        """
+        Process-wide asyncio engine shared by all async sessions.
+
+        Passing keyword arguments builds a dedicated engine that is not cached.
+        """
+        if kwargs:
+            return cls.create_async_engine(**kwargs)
+        if cls._async_engine is None or cls._async_pid != os.getpid():
+            with cls._lock:
+                if cls._async_engine is None or cls._async_pid != os.getpid():
+                    if cls._async_engine is not None:
+                        cls._async_engine.sync_engine.dispose(close=False)
+                    cls._async_engine = cls.create_async_engine(**cls.pool_options(asyncio=True))
+                    cls._async_session_maker = async_sessionmaker(cls._async_engine)
+                    cls._async_pid = os.getpid()
+        return cls._async_engine
+
+    @classmethod
+    def async_session_maker(cls) -> async_sessionmaker:
+        cls.async_engine()
+        return cls._async_session_maker
+
+    @classmethod
+    def async_session(cls, **kwargs) -> AsyncSession:
+        return cls.async_session_maker()(**kwargs)
+
+    @classmethod
+    def reset(cls) -> None:
+        """Dispose the cached engines so the next call rebuilds them from the current environment."""
+        with cls._lock:
+            if cls._engine is not None:
+                cls._engine.dispose()
+            if cls._async_engine is not None:
+                # Closing asyncio connections needs their event loop; just forget the pool here
+                cls._async_engine.sync_engine.dispose(close=False)
+            cls._engine = None
+            cls._session_maker = None
+            cls._pid = None
+            cls._async_engine = None
+            cls._async_session_maker = None
+            cls._async_pid = None
+
+    @classmethod
+    def pool(cls) -> Pool:
+        """Pool of the primary engine of the stack in use (``DB_ASYNC``)."""
+        from app.config.settings import settings
+
+        return cls.async_engine().sync_engine.pool if settings.db_async else cls.engine().pool
+
+    @classmethod
+    def pool_status(cls, pool: Pool | None = None) -> dict[str, Any]:
+        """Load and checkout statistics of ``pool``, by default the primary's."""
+        pool = cls.pool() if pool is None else pool
+        stats: PoolStats | None = getattr(pool, "stats", None)
+        size = pool.size()
+        checked_out = pool.checkedout()
+        max_overflow = max(stats.max_overflow, 0) if stats else 0
+        checkouts = stats.checkouts if stats else 0
+        waits = checkouts + (stats.timeouts if stats else 0)
+        return {
+            "size": size,
+            "max_overflow": max_overflow,
+            "checked_in": pool.checkedin(),
+            "checked_out": checked_out,
+            "overflow": max(pool.overflow(), 0),
+            "saturation": checked_out / (size + max_overflow) if size + max_overflow else 0.0,
+            "checkouts": checkouts,
+            "timeouts": stats.timeouts if stats else 0,
+            "wait_avg_ms": (stats.wait_total / waits * 1000) if waits else 0.0,
+            "wait_max_ms": stats.wait_max * 1000 if stats else 0.0,
+            "connects": stats.connects if stats else 0,
+            "connect_avg_ms": (stats.connect_total / stats.connects * 1000) if stats and stats.connects else 0.0,
+        }
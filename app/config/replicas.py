@@ -0,0 +1,212 @@
+import itertools
+import logging
+import math
+import os
+import threading
+import time
+from typing import Any
+
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import Pool
+
+from app.config.db import SqlAlchemyConfig
+
+
+logger = logging.getLogger(__name__)
+
+# Session.info key holding the entry of the replica a session reads
+REPLICA_KEY = "replica"
+
+
+def replica_url_args(entry: str) -> dict[str, Any]:
+    """URL arguments of a ``host[:port][/database]`` replica entry; the parts left out are the primary's."""
+    address, _, database = entry.strip().partition("/")
+    host, _, port = address.partition(":")
+    args = {"host": host, "port": int(port) if port else None, "database": database}
+    return {name: value for name, value in args.items() if value}
+
+
+def is_replica(db: Session | AsyncSession) -> bool:
+    return REPLICA_KEY in db.info
+
+
+def probe_lag(conn: Connection) -> float:
+    """
+    Seconds the server behind ``conn`` is behind its replication source. A server that is not a replica
+    (the stand-in databases of tests and local runs) is in sync; stopped replication is infinitely behind.
+    """
+    if conn.dialect.name != "mysql":
+        return 0.0
+    status = conn.exec_driver_sql("SHOW REPLICA STATUS").mappings().first()
+    if status is None:
+        return 0.0
+    behind = status["Seconds_Behind_Source"]
+    return math.inf if behind is None else float(behind)
+
+
+class Replica:
+    """Engines of one read replica (process-wide, like the primary's) and its last measured lag."""
+
+    def __init__(self, entry: str) -> None:
+        self.entry = entry
+        self.url_args = replica_url_args(entry)
+        self.lag = math.inf
+        self.checked_at: float | None = None
+        self._engine: Engine | None = None
+        self._session_maker: sessionmaker | None = None
+        self._pid: int | None = None
+        self._async_engine: AsyncEngine | None = None
+        self._async_session_maker: async_sessionmaker | None = None
+        self._async_pid: int | None = None
+        self._lock = threading.Lock()
+
+    def engine(self) -> Engine:
+        if self._engine is None or self._pid != os.getpid():
+            with self._lock:
+                if self._engine is None or self._pid != os.getpid():
+                    if self._engine is not None:
+                        # Inherited from the parent process: drop the pool without closing its sockets
+                        self._engine.dispose(close=False)
+                    self._engine = SqlAlchemyConfig.create_engine(**self.url_args, **SqlAlchemyConfig.pool_options())
+                    self._session_maker = sessionmaker(self._engine)
+                    self._pid = os.getpid()
+        return self._engine
+
+    def async_engine(self) -> AsyncEngine:
+        if self._async_engine is None or self._async_pid != os.getpid():
+            with self._lock:
+                if self._async_engine is None or self._async_pid != os.getpid():
+                    if self._async_engine is not None:
+                        self._async_engine.sync_engine.dispose(close=False)
+                    options = SqlAlchemyConfig.pool_options(asyncio=True)
+                    self._async_engine = SqlAlchemyConfig.create_async_engine(**self.url_args, **options)
+                    self._async_session_maker = async_sessionmaker(self._async_engine)
+                    self._async_pid = os.getpid()
+        return self._async_engine
+
+    def pool(self, asyncio: bool = False) -> Pool | None:
+        """Pool of this process's engine of the stack, None while no session has used the replica."""
+        if asyncio:
+            built = self._async_engine is not None and self._async_pid == os.getpid()
+            return self._async_engine.sync_engine.pool if built else None
+        return self._engine.pool if self._engine is not None and self._pid == os.getpid() else None
+
+    def session(self, **kwargs) -> Session:
+        self.engine()
+        db = self._session_maker(**kwargs)
+        db.info[REPLICA_KEY] = self.entry
+        return db
+
+    def async_session(self, **kwargs) -> AsyncSession:
+        self.async_engine()
+        db = self._async_session_maker(**kwargs)
+        db.info[REPLICA_KEY] = self.entry
+        return db
+
+    def due(self, interval: float) -> bool:
+        return self.checked_at is None or time.monotonic() - self.checked_at >= interval
+
+    def checked(self, lag: float) -> float:
+        self.lag, self.checked_at = lag, time.monotonic()
+        return lag
+
+    def check(self) -> float:
+        try:
+            with self.engine().connect() as conn:
+                return self.checked(probe_lag(conn))
+        except Exception:
+            # Unreachable: reads go to the primary until the next check
+            logger.warning("Replica %s is unreachable", self.entry, exc_info=True)
+            return self.checked(math.inf)
+
+    async def async_check(self) -> float:
+        try:
+            async with self.async_engine().connect() as conn:
+                return self.checked(await conn.run_sync(probe_lag))
+        except Exception:
+            logger.warning("Replica %s is unreachable", self.entry, exc_info=True)
+            return self.checked(math.inf)
+
+    def dispose(self) -> None:
+        if self._engine is not None:
+            self._engine.dispose()
+        if self._async_engine is not None:
+            self._async_engine.sync_engine.dispose(close=False)
+
+
+class ReplicaSet:
+    """
+    Read replicas of the primary (``DB_REPLICAS``, comma separated ``host[:port][/database]`` entries).
+    ``pick`` takes them round robin and skips those more than ``max_lag`` seconds behind, measuring the lag
+    of a replica at most every ``check_interval``; None sends the read to the primary.
+
+    Concurrent requests may measure the same replica twice around an interval boundary; the probe is one
+    cheap statement, so it is not locked.
+    """
+
+    def __init__(
+        self,
+        entries: str | None = None,
+        max_lag: float | None = None,
+        check_interval: float | None = None,
+    ) -> None:
+        self._entries = entries
+        self._max_lag = max_lag
+        self._check_interval = check_interval
+        self._replicas: list[Replica] | None = None
+        self._turn = itertools.count()
+
+    def _setting(self, attr: str, name: str) -> Any:
+        # Imported lazily: scripts load .env only after importing this module
+        if getattr(self, attr) is None:
+            from app.config.settings import settings
+
+            setattr(self, attr, getattr(settings, name))
+        return getattr(self, attr)
+
+    @property
+    def max_lag(self) -> float:
+        return self._setting("_max_lag", "db_replica_max_lag")
+
+    @property
+    def check_interval(self) -> float:
+        return self._setting("_check_interval", "db_replica_check_interval")
+
+    @property
+    def replicas(self) -> list[Replica]:
+        if self._replicas is None:
+            entries = self._setting("_entries", "db_replicas")
+            self._replicas = [Replica(entry) for entry in entries.split(",") if entry.strip()]
+        return self._replicas
+
+    def rotation(self) -> list[Replica]:
+        replicas = self.replicas
+        if not replicas:
+            return []
+        start = next(self._turn) % len(replicas)
+        return replicas[start:] + replicas[:start]
+
+    def pick(self) -> Replica | None:
+        for replica in self.rotation():
+            lag = replica.check() if replica.due(self.check_interval) else replica.lag
+            if lag <= self.max_lag:
+                return replica
+        return None
+
+    async def async_pick(self) -> Replica | None:
+        for replica in self.rotation():
+            lag = await replica.async_check() if replica.due(self.check_interval) else replica.lag
+            if lag <= self.max_lag:
+                return replica
+        return None
+
+    def reset(self) -> None:
+        """Dispose the replica engines; the next ``pick`` builds new ones."""
+        for replica in self._replicas or []:
+            replica.dispose()
+        self._replicas = None
+
+
+replicas = ReplicaSet()
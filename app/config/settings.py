@@ -12,6 +12,79 @@ class Settings(BaseSettings):
     app_host: str = Field("0.0.0.0", env="APP_HOST")
     app_port: int = Field(8000, env="APP_PORT")
 
+    # Serve v1 endpoints from native asyncio handlers backed by an AsyncEngine
+    db_async: bool = Field(False, env="DB_ASYNC")
+
+    # Connection pool of the process-wide engine
+    db_pool_size: int = Field(10, env="DB_POOL_SIZE")
+    db_max_overflow: int = Field(20, env="DB_MAX_OVERFLOW")
+    db_pool_pre_ping: bool = Field(True, env="DB_POOL_PRE_PING")
+    db_pool_recycle: int = Field(1800, env="DB_POOL_RECYCLE")
+    db_pool_timeout: float = Field(30.0, env="DB_POOL_TIMEOUT")
+
+    # Read replicas of GET requests: comma separated "host[:port][/database]", other URL parts are the primary's
+    db_replicas: str = Field("", env="DB_REPLICAS")
+    # Replicas further behind the primary (seconds) are skipped; their lag is measured at most every interval
+    db_replica_max_lag: float = Field(5.0, ge=0, env="DB_REPLICA_MAX_LAG")
+    db_replica_check_interval: float = Field(1.0, ge=0, env="DB_REPLICA_CHECK_INTERVAL")
+    # How long a client reads from the primary after a request of its wrote; keep it >= DB_REPLICA_MAX_LAG
+    db_replica_pin_seconds: int = Field(5, ge=0, env="DB_REPLICA_PIN_SECONDS")
+
+    # Items accepted by one POST .../bulk request
+    bulk_max_items: int = Field(10000, ge=1, env="BULK_MAX_ITEMS")
+
+    # Ids accepted by one GET / POST .../batch request
+    batch_max_ids: int = Field(1000, ge=1, env="BATCH_MAX_IDS")
+
+    # Rows fetched from the server-side cursor per chunk of GET /organizations/export
+    export_batch_size: int = Field(1000, ge=1, env="EXPORT_BATCH_SIZE")
+
+    # POST .../import: default rows per transaction and row errors listed in the response
+    import_batch_size: int = Field(1000, ge=1, env="IMPORT_BATCH_SIZE")
+    import_max_errors: int = Field(1000, ge=0, env="IMPORT_MAX_ERRORS")
+    # Characters of one NDJSON line or CSV record; longer records are dropped and reported as row errors
+    import_max_record_length: int = Field(1_000_000, ge=1, env="IMPORT_MAX_RECORD_LENGTH")
+
+    # Per-request SQL counters: Server-Timing header and a JSON log line per request
+    sql_instrumentation_enabled: bool = Field(True, env="SQL_INSTRUMENTATION_ENABLED")
+    # Raise instead of logging a warning when an endpoint runs more statements than its query_budget (tests)
+    sql_budget_strict: bool = Field(False, env="SQL_BUDGET_STRICT")
+
+    # Prometheus /metrics; PROMETHEUS_MULTIPROC_DIR (read by prometheus_client) aggregates several workers
+    metrics_enabled: bool = Field(True, env="METRICS_ENABLED")
+    # How often a worker samples its connection pool gauges
+    metrics_pool_interval: float = Field(1.0, ge=0, env="METRICS_POOL_INTERVAL")
+
+    # Statements slower than the threshold are kept with their plan (GET /system/slow-queries)
+    slow_query_log_enabled: bool = Field(False, env="SLOW_QUERY_LOG_ENABLED")
+    slow_query_threshold_ms: float = Field(200.0, ge=0, env="SLOW_QUERY_THRESHOLD_MS")
+    slow_query_max_entries: int = Field(200, ge=1, env="SLOW_QUERY_MAX_ENTRIES")
+    # Directory of the slow-queries-YYYY-MM-DD.jsonl files; not written when unset
+    slow_query_log_dir: str | None = Field(None, env="SLOW_QUERY_LOG_DIR")
+
+    # In-memory activity tree used by /organizations/search
+    activity_index_enabled: bool = Field(True, env="ACTIVITY_INDEX_ENABLED")
+    activity_index_check_interval: float = Field(1.0, env="ACTIVITY_INDEX_CHECK_INTERVAL")
+
+    # In-memory building coordinates (NumPy grid) answering /organizations/nearby/*
+    geo_index_enabled: bool = Field(False, env="GEO_INDEX_ENABLED")
+    geo_index_check_interval: float = Field(1.0, env="GEO_INDEX_CHECK_INTERVAL")
+    geo_index_cell_size: float = Field(0.05, gt=0, env="GEO_INDEX_CELL_SIZE")
+    # Larger rectangles go to MySQL instead of an IN list of building ids
+    geo_index_max_buildings: int = Field(5000, ge=1, env="GEO_INDEX_MAX_BUILDINGS")
+
+    # Serialized GET responses kept in process, dropped when the CRUD changes their entity families
+    response_cache_enabled: bool = Field(False, env="RESPONSE_CACHE_ENABLED")
+    response_cache_ttl: float = Field(30.0, gt=0, env="RESPONSE_CACHE_TTL")
+    response_cache_max_entries: int = Field(1024, ge=1, env="RESPONSE_CACHE_MAX_ENTRIES")
+    # How often other workers' writes are looked up in entity_version
+    response_cache_check_interval: float = Field(1.0, env="RESPONSE_CACHE_CHECK_INTERVAL")
+    # Cache-Control max-age of cached GET endpoints; 0 makes clients revalidate with If-None-Match every time
+    http_cache_max_age: int = Field(0, ge=0, env="HTTP_CACHE_MAX_AGE")
+
+    # List endpoints validate and dump their items to JSON bytes in the handler instead of FastAPI's response step
+    fast_list_serialization: bool = Field(True, env="FAST_LIST_SERIALIZATION")
+
 
 def _parse_origins(value: List[str] | str) -> List[str]:
     if isinstance(value, list):
@@ -1,40 +1,335 @@
 from __future__ import annotations
 
-from typing import Any
+from typing import Any, Iterable, Sequence
 
-from sqlalchemy.orm import Session
+from sqlalchemy import Delete, Insert, Select, Update, delete, exists, func, insert, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased, load_only, selectinload
 
-from app.crud.base import CRUDBase, ValidationError
+from app.crud.activity_tree import FAMILY, activity_tree_index
+from app.crud.base import AsyncCRUDBase, CRUDBase, CRUDCore, ValidationError
 from app.model.activity import Activity
+from app.model.activity_closure import ActivityClosure
 
 
 MAX_DEPTH = 3
 
 
-def check_depth(db: Session, parent_id: int | None, current_id: int | None) -> None:
+def _depth_error(parent_id: int, current_id: int | None, depth: int) -> ValidationError:
+    return ValidationError(
+        f"CRUD error for Activity object {current_id or ''} in parent category {parent_id}: nesting depth must be <= {MAX_DEPTH}. Parent depth: {depth}"
+    )
+
+
+def placement_stmt(parent_id: int, current_id: int | None) -> Select:
+    """Parent depth, height of the moved subtree and whether the parent lies inside it, in one statement."""
+    parent_depth = select(Activity.depth).where(Activity.id == parent_id).scalar_subquery()
+    if current_id is None:
+        return select(parent_depth, literal(0), literal(False))
+    height = (
+        select(func.coalesce(func.max(ActivityClosure.depth), 0))
+        .where(ActivityClosure.ancestor_id == current_id)
+        .scalar_subquery()
+    )
+    cycle = exists().where(ActivityClosure.ancestor_id == current_id, ActivityClosure.descendant_id == parent_id)
+    return select(parent_depth, height, cycle)
+
+
+def _validate_placement(parent_id: int, current_id: int | None, row: tuple[int | None, int, bool]) -> int:
+    parent_depth, height, cycle = row
+    if parent_depth is None:
+        raise ValidationError(f"Activity({parent_id}) not found")
+    if cycle:
+        raise ValidationError(f"CRUD error for Activity object {current_id}: cannot be moved under its own descendant")
+    if parent_depth + 1 + height > MAX_DEPTH:
+        raise _depth_error(parent_id, current_id, parent_depth)
+    return parent_depth + 1
+
+
+def check_depth(db: Session, parent_id: int | None, current_id: int | None) -> int:
+    """Validate placing the activity (and its subtree) under ``parent_id``; returns its new depth."""
+    if parent_id is None:
+        return 1
+    return _validate_placement(parent_id, current_id, tuple(db.execute(placement_stmt(parent_id, current_id)).one()))
+
+
+async def async_check_depth(db: AsyncSession, parent_id: int | None, current_id: int | None) -> int:
     if parent_id is None:
-        return
-    parent = db.get(Activity, parent_id)
-    if parent.depth == MAX_DEPTH:
-        raise ValidationError(
-            f"CRUD error for Activity object {current_id or ''} in parent category {parent_id}: nesting depth must be <= {MAX_DEPTH}. Parent depth: {parent.depth}"
+        return 1
+    row = (await db.execute(placement_stmt(parent_id, current_id))).one()
+    return _validate_placement(parent_id, current_id, tuple(row))
+
+
+class ActivityQueries(CRUDCore[Activity]):
+    family = FAMILY
+    load_profiles = {
+        "out": (load_only(Activity.id, Activity.name, Activity.parent_id),),
+        "tree": (selectinload(Activity.childrens),),
+        "organizations": (selectinload(Activity.organizations),),
+    }
+    projections = {"row": (Activity.id, Activity.name, Activity.parent_id)}
+
+    def ids_by_name_stmt(self, name: str) -> Select:
+        return select(Activity.id).where(func.lower(Activity.name) == func.lower(name))
+
+    def subtree_ids_stmt(self, roots: Iterable[int]) -> Select:
+        return select(ActivityClosure.descendant_id).where(ActivityClosure.ancestor_id.in_(list(roots))).distinct()
+
+    def ancestor_ids_stmt(self, activity_id: int) -> Select:
+        return (
+            select(ActivityClosure.ancestor_id)
+            .where(ActivityClosure.descendant_id == activity_id, ActivityClosure.depth > 0)
+            .order_by(ActivityClosure.depth)
+        )
+
+    def subtree_ids_by_name_stmt(self, name: str) -> Select:
+        return (
+            select(ActivityClosure.descendant_id)
+            .join(Activity, Activity.id == ActivityClosure.ancestor_id)
+            .where(func.lower(Activity.name) == func.lower(name))
+            .distinct()
+        )
+
+    @staticmethod
+    def closure_link_stmt(activity_id: int, parent_id: int | None) -> Insert:
+        # Self link plus one link from every ancestor of the parent
+        stmt = select(literal(activity_id), literal(activity_id), literal(0))
+        if parent_id is not None:
+            stmt = stmt.union_all(
+                select(ActivityClosure.ancestor_id, literal(activity_id), ActivityClosure.depth + 1).where(
+                    ActivityClosure.descendant_id == parent_id
+                )
+            )
+        return insert(ActivityClosure).from_select(["ancestor_id", "descendant_id", "depth"], stmt)
+
+    @staticmethod
+    def closure_detach_stmt(subtree: set[int]) -> Delete:
+        # Links from the old ancestors into the subtree; links inside the subtree stay valid
+        return delete(ActivityClosure).where(
+            ActivityClosure.descendant_id.in_(subtree), ActivityClosure.ancestor_id.not_in(subtree)
+        )
+
+    @staticmethod
+    def closure_attach_stmt(activity_id: int, parent_id: int) -> Insert:
+        above = aliased(ActivityClosure)
+        below = aliased(ActivityClosure)
+        stmt = select(above.ancestor_id, below.descendant_id, above.depth + below.depth + 1).where(
+            above.descendant_id == parent_id, below.ancestor_id == activity_id
+        )
+        return insert(ActivityClosure).from_select(["ancestor_id", "descendant_id", "depth"], stmt)
+
+    @staticmethod
+    def shift_depth_stmt(activity_id: int, delta: int) -> Update:
+        subtree = select(ActivityClosure.descendant_id).where(
+            ActivityClosure.ancestor_id == activity_id, ActivityClosure.depth > 0
+        )
+        return (
+            update(Activity)
+            .where(Activity.id.in_(subtree))
+            .values(stored_depth=Activity.stored_depth + delta)
+            .execution_options(synchronize_session="fetch")
+        )
+
+    @staticmethod
+    def closure_remove_stmt(subtree: set[int]) -> Delete:
+        return delete(ActivityClosure).where(ActivityClosure.descendant_id.in_(subtree))
+
+    @staticmethod
+    def split_parent(obj: Activity, data: dict[str, Any]) -> tuple[int | None, dict[str, Any]]:
+        """
+        Parent the update moves the activity to, and the other fields. ``update`` of the base class skips
+        None values, so the parent is applied here: an explicit ``parent_id: None`` detaches to a root.
+        """
+        parent_id = data["parent_id"] if "parent_id" in data else obj.parent_id
+        return parent_id, {key: value for key, value in data.items() if key != "parent_id"}
+
+    @staticmethod
+    def check_not_own_parent(obj: Activity, parent_id: int | None) -> None:
+        if obj.id is not None and parent_id == obj.id:
+            raise ValidationError(f"CRUD error for Activity object {obj.id}: cannot be parent of itself")
+
+    @staticmethod
+    def ancestry_stmt(parent_ids: Iterable[int]) -> Select:
+        return select(ActivityClosure.descendant_id, ActivityClosure.ancestor_id, ActivityClosure.depth).where(
+            ActivityClosure.descendant_id.in_(list(parent_ids))
         )
 
+    @staticmethod
+    def bulk_placement(
+        rows: Sequence[dict[str, Any]], ancestry: Iterable[tuple[int, int, int]]
+    ) -> tuple[list[dict[str, Any]], dict[int, list[tuple[int, int]]]]:
+        """
+        Rows with their depth, checked against the closure rows of all their parents at once. A row may
+        carry its ``id`` and be the parent of rows after it in the same batch, so a tree goes in one batch.
+        """
+        ancestors: dict[int, list[tuple[int, int]]] = {}
+        for descendant_id, ancestor_id, depth in ancestry:
+            ancestors.setdefault(descendant_id, []).append((ancestor_id, depth))
+        placed = []
+        batch_ids: set[int] = set()
+        for row in rows:
+            id_, parent_id = row.get("id"), row.get("parent_id")
+            if id_ is not None:
+                if id_ in batch_ids:
+                    raise ValidationError(f"Activity({id_}) appears twice in the batch")
+                batch_ids.add(id_)
+            if parent_id is None:
+                above: list[tuple[int, int]] = []
+            elif parent_id in ancestors:
+                # One closure row per ancestor of the parent, its self link included
+                above = ancestors[parent_id]
+            else:
+                raise ValidationError(
+                    f"Activity({parent_id}) not found; a parent from the same batch must come before its children"
+                )
+            if len(above) + 1 > MAX_DEPTH:
+                raise _depth_error(parent_id, id_, len(above))
+            placed.append({**row, "stored_depth": len(above) + 1})
+            if id_ is not None:
+                ancestors[id_] = [(id_, 0), *((ancestor_id, depth + 1) for ancestor_id, depth in above)]
+        return placed, ancestors
+
+    @staticmethod
+    def bulk_closure_rows(
+        ids: Sequence[int], rows: Sequence[dict[str, Any]], ancestors: dict[int, list[tuple[int, int]]]
+    ) -> list[dict[str, int]]:
+        links = []
+        for id_, row in zip(ids, rows):
+            links.append({"ancestor_id": id_, "descendant_id": id_, "depth": 0})
+            for ancestor_id, depth in ancestors.get(row.get("parent_id"), ()):
+                links.append({"ancestor_id": ancestor_id, "descendant_id": id_, "depth": depth + 1})
+        return links
+
+    def stage_bulk(self, db: Session | AsyncSession, ids: Sequence[int], rows: Sequence[dict[str, Any]]) -> None:
+        for id_, row in zip(ids, rows):
+            activity_tree_index.stage(db, "put", id_, row["name"], row.get("parent_id"))
+
 
-class CRUDActivity(CRUDBase[Activity]):
+class CRUDActivity(ActivityQueries, CRUDBase[Activity]):
     def __init__(self) -> None:
         super().__init__(Activity)
 
     def create(self, db: Session, data: dict[str, Any]) -> Activity:
-        check_depth(db, data.get("parent_id"), data.get("id"))
-        return super().create(db, data)
+        depth = check_depth(db, data.get("parent_id"), data.get("id"))
+        obj = super().create(db, {**data, "stored_depth": depth})
+        db.execute(self.closure_link_stmt(obj.id, obj.parent_id))
+        activity_tree_index.stage_put(db, obj)
+        return obj
 
     def update(self, db: Session, obj: Activity, data: dict[str, Any]) -> Activity:
-        parent_id = data.get("parent_id", obj.parent_id)
-        check_depth(db, parent_id, obj.id)
-        if obj.id is not None and parent_id == obj.id:
-            raise ValidationError(f"CRUD error for Activity object {obj.id}: cannot be parent of itself")
-        return super().update(db, obj, data)
+        parent_id, data = self.split_parent(obj, data)
+        self.check_not_own_parent(obj, parent_id)
+        old_parent_id, old_depth = obj.parent_id, obj.stored_depth
+        if parent_id != old_parent_id:
+            data["stored_depth"] = check_depth(db, parent_id, obj.id)
+            obj.parent_id = parent_id
+        obj = super().update(db, obj, data)
+        if obj.parent_id != old_parent_id:
+            if obj.stored_depth != old_depth:
+                db.execute(self.shift_depth_stmt(obj.id, obj.stored_depth - old_depth))
+            db.execute(self.closure_detach_stmt(self.subtree_ids(db, [obj.id])))
+            if obj.parent_id is not None:
+                db.execute(self.closure_attach_stmt(obj.id, obj.parent_id))
+        activity_tree_index.stage_put(db, obj)
+        return obj
+
+    def delete(self, db: Session, obj: Activity) -> None:
+        # Descendant rows are removed by the ON DELETE CASCADE of activity.parent_id
+        db.execute(self.closure_remove_stmt(self.subtree_ids(db, [obj.id])))
+        super().delete(db, obj)
+        activity_tree_index.stage_remove(db, obj)
+
+    def bulk_create(self, db: Session, rows: Sequence[dict[str, Any]]) -> list[int]:
+        """
+        Insert a batch of activities under existing parents or earlier rows of the batch; the depth check is
+        one query for the batch. There is no bulk upsert: moving an activity rewrites the closure rows of its
+        subtree, which ``update`` does one activity at a time.
+        """
+        parents = {row["parent_id"] for row in rows if row.get("parent_id") is not None}
+        ancestry = db.execute(self.ancestry_stmt(parents)).tuples().all() if parents else []
+        rows, ancestors = self.bulk_placement(rows, ancestry)
+        ids = super().bulk_create(db, rows)
+        if ids:
+            db.execute(insert(ActivityClosure), self.bulk_closure_rows(ids, rows, ancestors))
+        self.stage_bulk(db, ids, rows)
+        return ids
+
+    def search_ids(self, db: Session, name: str) -> set[int]:
+        """Ids of the activities named ``name`` (case-insensitive) and of all their descendants."""
+        if activity_tree_index.usable(db):
+            activity_tree_index.ensure_fresh(db)
+            return activity_tree_index.subtree_ids(activity_tree_index.ids_by_name(name))
+        return set(db.scalars(self.subtree_ids_by_name_stmt(name)))
+
+    def ids_by_name(self, db: Session, name: str) -> list[int]:
+        return list(db.scalars(self.ids_by_name_stmt(name)))
+
+    def subtree_ids(self, db: Session, roots: Iterable[int]) -> set[int]:
+        return set(db.scalars(self.subtree_ids_stmt(roots)))
+
+    def ancestor_ids(self, db: Session, activity_id: int) -> list[int]:
+        """Ancestors of the activity, nearest first."""
+        return list(db.scalars(self.ancestor_ids_stmt(activity_id)))
+
+
+class AsyncCRUDActivity(ActivityQueries, AsyncCRUDBase[Activity]):
+    def __init__(self) -> None:
+        super().__init__(Activity)
+
+    async def create(self, db: AsyncSession, data: dict[str, Any]) -> Activity:
+        depth = await async_check_depth(db, data.get("parent_id"), data.get("id"))
+        obj = await super().create(db, {**data, "stored_depth": depth})
+        await db.execute(self.closure_link_stmt(obj.id, obj.parent_id))
+        activity_tree_index.stage_put(db, obj)
+        return obj
+
+    async def update(self, db: AsyncSession, obj: Activity, data: dict[str, Any]) -> Activity:
+        parent_id, data = self.split_parent(obj, data)
+        self.check_not_own_parent(obj, parent_id)
+        old_parent_id, old_depth = obj.parent_id, obj.stored_depth
+        if parent_id != old_parent_id:
+            data["stored_depth"] = await async_check_depth(db, parent_id, obj.id)
+            obj.parent_id = parent_id
+        obj = await super().update(db, obj, data)
+        if obj.parent_id != old_parent_id:
+            if obj.stored_depth != old_depth:
+                await db.execute(self.shift_depth_stmt(obj.id, obj.stored_depth - old_depth))
+            await db.execute(self.closure_detach_stmt(await self.subtree_ids(db, [obj.id])))
+            if obj.parent_id is not None:
+                await db.execute(self.closure_attach_stmt(obj.id, obj.parent_id))
+        activity_tree_index.stage_put(db, obj)
+        return obj
+
+    async def delete(self, db: AsyncSession, obj: Activity) -> None:
+        await db.execute(self.closure_remove_stmt(await self.subtree_ids(db, [obj.id])))
+        await super().delete(db, obj)
+        activity_tree_index.stage_remove(db, obj)
+
+    async def bulk_create(self, db: AsyncSession, rows: Sequence[dict[str, Any]]) -> list[int]:
+        parents = {row["parent_id"] for row in rows if row.get("parent_id") is not None}
+        ancestry = (await db.execute(self.ancestry_stmt(parents))).tuples().all() if parents else []
+        rows, ancestors = self.bulk_placement(rows, ancestry)
+        ids = await super().bulk_create(db, rows)
+        if ids:
+            await db.execute(insert(ActivityClosure), self.bulk_closure_rows(ids, rows, ancestors))
+        self.stage_bulk(db, ids, rows)
+        return ids
+
+    async def search_ids(self, db: AsyncSession, name: str) -> set[int]:
+        if activity_tree_index.usable(db):
+            await activity_tree_index.async_ensure_fresh(db)
+            return activity_tree_index.subtree_ids(activity_tree_index.ids_by_name(name))
+        return set(await db.scalars(self.subtree_ids_by_name_stmt(name)))
+
+    async def ids_by_name(self, db: AsyncSession, name: str) -> list[int]:
+        return list(await db.scalars(self.ids_by_name_stmt(name)))
+
+    async def subtree_ids(self, db: AsyncSession, roots: Iterable[int]) -> set[int]:
+        return set(await db.scalars(self.subtree_ids_stmt(roots)))
+
+    async def ancestor_ids(self, db: AsyncSession, activity_id: int) -> list[int]:
+        return list(await db.scalars(self.ancestor_ids_stmt(activity_id)))
 
 
 activity_crud = CRUDActivity()
+async_activity_crud = AsyncCRUDActivity()
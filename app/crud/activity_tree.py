@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from sqlalchemy import Select, event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, SessionTransaction
+
+from app.crud.local_index import LocalIndex
+from app.crud.versions import on_version_commit
+from app.model.activity import Activity
+
+
+FAMILY = "activity"
+
+
+@dataclass
+class _Tree:
+    parents: dict[int, int | None] = field(default_factory=dict)
+    names: dict[int, str] = field(default_factory=dict)
+    children: dict[int | None, set[int]] = field(default_factory=dict)
+    by_name: dict[str, set[int]] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, rows: Iterable[tuple[int, str, int | None]]) -> _Tree:
+        tree = cls()
+        for id_, name, parent_id in rows:
+            tree.put(id_, name, parent_id)
+        return tree
+
+    def copy(self) -> _Tree:
+        return _Tree(
+            parents=dict(self.parents),
+            names=dict(self.names),
+            children={k: set(v) for k, v in self.children.items()},
+            by_name={k: set(v) for k, v in self.by_name.items()},
+        )
+
+    def put(self, id_: int, name: str, parent_id: int | None) -> None:
+        if id_ in self.parents:
+            self._unlink(id_)
+        self.parents[id_] = parent_id
+        self.names[id_] = name
+        self.children.setdefault(parent_id, set()).add(id_)
+        self.by_name.setdefault(name.lower(), set()).add(id_)
+
+    def remove(self, id_: int) -> None:
+        # Rows below a deleted activity go away with it (ON DELETE CASCADE)
+        for child_id in list(self.children.get(id_, ())):
+            self.remove(child_id)
+        if id_ in self.parents:
+            self._unlink(id_)
+            del self.parents[id_]
+            del self.names[id_]
+        self.children.pop(id_, None)
+
+    def _unlink(self, id_: int) -> None:
+        self.children.get(self.parents[id_], set()).discard(id_)
+        self.by_name.get(self.names[id_].lower(), set()).discard(id_)
+
+    def subtree(self, roots: Iterable[int]) -> set[int]:
+        result: set[int] = set()
+        stack = list(roots)
+        while stack:
+            node = stack.pop()
+            if node in result:
+                continue
+            result.add(node)
+            stack.extend(self.children.get(node, ()))
+        return result
+
+
+class ActivityTreeIndex(LocalIndex[_Tree]):
+    """
+    Process-local copy of the activity tree.
+
+    Answers name lookups and subtree expansion without queries. Commits made through the activity
+    CRUD patch it in place; writes from other workers are picked up through the ``activity`` entity
+    version, checked at most once per ``check_interval`` seconds.
+    """
+
+    family = FAMILY
+    ops_key = "activity_tree_ops"
+    enabled_setting = "activity_index_enabled"
+    check_interval_setting = "activity_index_check_interval"
+
+    def empty(self) -> _Tree:
+        return _Tree()
+
+    def rows_stmt(self) -> Select:
+        return select(Activity.id, Activity.name, Activity.parent_id)
+
+    def build(self, rows: Iterable[tuple[int, str, int | None]]) -> _Tree:
+        return _Tree.build(rows)
+
+    def patch(self, data: _Tree, ops: list[tuple]) -> _Tree:
+        tree = data.copy()
+        for op, id_, name, parent_id in ops:
+            if op == "put":
+                tree.put(id_, name, parent_id)
+            else:
+                tree.remove(id_)
+        return tree
+
+    def ids_by_name(self, name: str) -> set[int]:
+        return set(self._data.by_name.get(name.lower(), ()))
+
+    def subtree_ids(self, roots: Iterable[int]) -> set[int]:
+        return self._data.subtree(roots)
+
+    def stage_put(self, db: Session | AsyncSession, obj: Activity) -> None:
+        self.stage(db, "put", obj.id, obj.name, obj.parent_id)
+
+    def stage_remove(self, db: Session | AsyncSession, obj: Activity) -> None:
+        self.stage(db, "remove", obj.id, None, None)
+
+
+activity_tree_index = ActivityTreeIndex()
+
+
+@on_version_commit
+def _patch_index(session: Session, bumped: dict[str, tuple[int | None, int]]) -> None:
+    activity_tree_index.commit_session(session, bumped)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_uncommitted(session: Session, transaction: SessionTransaction) -> None:
+    if transaction.parent is None:
+        activity_tree_index.discard(session)
@@ -1,41 +1,262 @@
 from __future__ import annotations
 
-from typing import Any, Generic, Type, TypeVar
+from dataclasses import dataclass
+from typing import Any, Generic, Iterable, Iterator, Sequence, Type, TypeVar
 
-from sqlalchemy import select
+from sqlalchemy import Column, ColumnElement, CursorResult, Insert, Select, insert, select
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.engine import Dialect
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.interfaces import ORMOption
+from app.crud.pagination import Keyset, Page, decode_cursor, make_page
+from app.crud.versions import async_bump_version, bump_version
 from app.model.base import Base
 
 
 ModelType = TypeVar("ModelType", bound=Base)
 
+# Name of a CRUD load profile or projection, or loader options given directly
+LoadProfile = str | Sequence[ORMOption] | None
+
+# Execution option marking a statement that selects the columns of a projection instead of the entity
+PROJECTION = "projection"
+
+# Rows per multi-row INSERT of the bulk writes
+BULK_CHUNK_SIZE = 1000
+
 
 class ValidationError(Exception):
     pass
 
 
-class CRUDBase(Generic[ModelType]):
+class ConfigurationError(Exception):
+    """The configured database can't run the operation, e.g. bulk writes on an unsupported dialect."""
+
+
+@dataclass
+class BulkStatement:
+    """One statement of a bulk write and the input positions of the rows it writes."""
+
+    stmt: Insert
+    positions: list[int]
+    # Ids of rows that carry their primary key; None means the statement generates them
+    ids: list[int] | None = None
+    # Whether the driver's lastrowid of a multi-row INSERT is its first id (MySQL) or its last (SQLite)
+    last_id_first: bool = True
+
+    def assign(self, ids: list[int], result: CursorResult) -> None:
+        if self.ids is not None:
+            new_ids = self.ids
+        else:
+            # A multi-row INSERT gets consecutive auto-increment values; MySQL reports the first of
+            # them as LAST_INSERT_ID(), SQLite the last one
+            first = result.lastrowid if self.last_id_first else result.lastrowid - len(self.positions) + 1
+            new_ids = list(range(first, first + len(self.positions)))
+        for position, id_ in zip(self.positions, new_ids):
+            ids[position] = id_
+
+
+class CRUDCore(Generic[ModelType]):
+    """Statement builders shared by the sync and async CRUD classes."""
+
+    # Named loader option sets, so each endpoint loads exactly what its response schema needs.
+    # Relationships are lazy by default: without a profile nothing but the row itself is loaded.
+    load_profiles: dict[str, tuple[ORMOption, ...]] = {}
+    # Named column sets, given where a load profile goes: the statement selects just these columns and
+    # returns plain rows, with no entity construction or identity map. Response schemas read rows by attribute.
+    projections: dict[str, tuple[ColumnElement, ...]] = {}
+    # Entity version bumped by every write of this CRUD; caches of the family key on it
+    family: str | None = None
+
     def __init__(self, model: Type[ModelType]):
         self.model = model
 
-    def get(self, db: Session, id: int) -> ModelType | None:
-        return db.get(self.model, id)
+    def load_options(self, options: LoadProfile) -> tuple[ORMOption, ...]:
+        if options is None:
+            return ()
+        if isinstance(options, str):
+            try:
+                return self.load_profiles[options]
+            except KeyError:
+                raise ValueError(f"{type(self).__name__} has no load profile {options!r}") from None
+        return tuple(options)
+
+    def with_options(self, stmt: Select, options: LoadProfile) -> Select:
+        if isinstance(options, str) and options in self.projections:
+            return stmt.with_only_columns(*self.projections[options]).execution_options(**{PROJECTION: options})
+        loader_options = self.load_options(options)
+        return stmt.options(*loader_options) if loader_options else stmt
+
+    @staticmethod
+    def projected(stmt: Select) -> bool:
+        """Whether ``stmt`` selects the columns of a projection (rows) rather than entities."""
+        return PROJECTION in stmt.get_execution_options()
+
+    def select_stmt(self, *, options: LoadProfile = None, **filters: Any) -> Select:
+        """Each keyword filter is an equality test on the attribute of the same name, None skips it."""
+        stmt = self.with_options(select(self.model), options)
+        conditions = [getattr(self.model, key) == value for key, value in filters.items() if value is not None]
+        if conditions:
+            stmt = stmt.where(*conditions)
+        return stmt
+
+    def list_stmt(self, *, offset: int = 0, limit: int = 50, options: LoadProfile = None, **filters: Any) -> Select:
+        """Page of rows in primary key order."""
+        stmt = self.select_stmt(options=options, **filters)
+        return stmt.order_by(*self.keyset().columns).offset(offset).limit(limit)
+
+    @staticmethod
+    def cursor_values(cursor: str, size: int) -> tuple[Any, ...]:
+        try:
+            return decode_cursor(cursor, size)
+        except ValueError as e:
+            raise ValidationError(str(e)) from None
+
+    def keyset(self) -> Keyset:
+        return Keyset(tuple(self.model.__mapper__.primary_key))
 
-    def require(self, db: Session, id: int) -> ModelType:
-        obj = self.get(db, id)
+    def page_stmt(
+        self, stmt: Select, *, cursor: str | None = None, offset: int = 0, limit: int = 50, keyset: Keyset | None = None
+    ) -> Select:
+        """
+        Order ``stmt`` by the keyset (the primary key by default) and select one page after ``cursor``.
+
+        One extra row tells whether another page follows; the key columns are added to the selected
+        columns so the cursor of the last row can be built without touching the loaded objects.
+        """
+        keyset = keyset or self.keyset()
+        if cursor is not None and offset:
+            raise ValidationError("cursor and offset cannot be combined")
+        stmt = stmt.add_columns(*keyset.columns).order_by(*keyset.columns)
+        if cursor is not None:
+            stmt = stmt.where(keyset.after(self.cursor_values(cursor, len(keyset.columns))))
+        return stmt.offset(offset).limit(limit + 1)
+
+    def ids_stmt(self, ids: Iterable[int], *, options: LoadProfile = None) -> Select:
+        """Rows of the given primary keys, in one ``IN`` query."""
+        return self.select_stmt(options=options).where(self.pk.in_(list(ids)))
+
+    def in_order(self, ids: Sequence[int], found: Sequence[Any]) -> tuple[list[Any], list[int]]:
+        """``found`` entities / rows in the order of ``ids`` (a repeated id once), and the ids not found."""
+        by_id = {getattr(item, self.pk.key): item for item in found}
+        ids = list(dict.fromkeys(ids))
+        return [by_id[id] for id in ids if id in by_id], [id for id in ids if id not in by_id]
+
+    def not_found(self, id: int) -> ValidationError:
+        return ValidationError(f"{self.model.__name__}({id}) not found")
+
+    @property
+    def pk(self) -> Column:
+        return self.model.__mapper__.primary_key[0]
+
+    def column_rows(self, rows: Sequence[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Rows keyed by column name, as Core inserts expect (attributes may be mapped to other names)."""
+        mapper = self.model.__mapper__
+        return [{mapper.get_property(key).columns[0].key: value for key, value in row.items()} for row in rows]
+
+    @staticmethod
+    def check_bulk_dialect(dialect: Dialect) -> None:
+        # SQLite is the local stand-in for MySQL, see SqlAlchemyConfig
+        if dialect.name not in ("mysql", "mariadb", "sqlite"):
+            raise ConfigurationError(f"Bulk writes need MySQL (or SQLite locally), the database is {dialect.name}")
+
+    def upsert_stmt(self, dialect: Dialect, rows: list[dict[str, Any]]) -> Insert:
+        """Multi-row INSERT that updates the rows whose primary key already exists."""
+        table = self.model.__table__
+        columns = [key for key in rows[0] if key != self.pk.key]
+        if dialect.name == "sqlite":
+            stmt = sqlite.insert(table).values(rows)
+            return stmt.on_conflict_do_update(
+                index_elements=[self.pk.key], set_={key: stmt.excluded[key] for key in columns}
+            )
+        stmt = mysql.insert(table).values(rows)
+        return stmt.on_duplicate_key_update({key: stmt.inserted[key] for key in columns})
+
+    def bulk_statements(
+        self, dialect: Dialect, rows: Sequence[dict[str, Any]], *, upsert: bool = False
+    ) -> Iterator[BulkStatement]:
+        """
+        Statements writing ``rows`` in chunks of multi-row INSERTs.
+
+        Rows carrying their primary key are inserted as they are, or upserted with ``upsert``; the
+        others get new ids, known from the driver's lastrowid of each chunk.
+        """
+        self.check_bulk_dialect(dialect)
+        table = self.model.__table__
+        rows = self.column_rows(rows)
+        pk = self.pk.key
+        keyed = [i for i, row in enumerate(rows) if row.get(pk) is not None]
+        new = [i for i, row in enumerate(rows) if row.get(pk) is None]
+        for start in range(0, len(keyed), BULK_CHUNK_SIZE):
+            positions = keyed[start : start + BULK_CHUNK_SIZE]
+            chunk = [rows[i] for i in positions]
+            stmt = self.upsert_stmt(dialect, chunk) if upsert else insert(table).values(chunk)
+            yield BulkStatement(stmt, positions, ids=[row[pk] for row in chunk])
+        for start in range(0, len(new), BULK_CHUNK_SIZE):
+            positions = new[start : start + BULK_CHUNK_SIZE]
+            chunk = [{key: value for key, value in rows[i].items() if key != pk} for i in positions]
+            yield BulkStatement(insert(table).values(chunk), positions, last_id_first=dialect.name != "sqlite")
+
+
+class CRUDBase(CRUDCore[ModelType]):
+    def get(self, db: Session, id: int, *, options: LoadProfile = None) -> ModelType | None:
+        return db.get(self.model, id, options=self.load_options(options))
+
+    def require(self, db: Session, id: int, *, options: LoadProfile = None) -> ModelType:
+        obj = self.get(db, id, options=options)
         if obj is None:
-            raise ValidationError(f"{self.model.__name__}({id}) not found")
+            raise self.not_found(id)
         return obj
 
-    def list(self, db: Session, *, offset: int = 0, limit: int = 50) -> list[ModelType]:
-        stmt = select(self.model).offset(offset).limit(limit)
-        return list(db.scalars(stmt))
+    def list(
+        self, db: Session, *, offset: int = 0, limit: int = 50, options: LoadProfile = None, **filters: Any
+    ) -> list[ModelType]:
+        return list(db.scalars(self.list_stmt(offset=offset, limit=limit, options=options, **filters)))
+
+    def page(
+        self,
+        db: Session,
+        stmt: Select,
+        *,
+        cursor: str | None = None,
+        offset: int = 0,
+        limit: int = 50,
+        keyset: Keyset | None = None,
+    ) -> Page[ModelType]:
+        keyset = keyset or self.keyset()
+        rows = db.execute(self.page_stmt(stmt, cursor=cursor, offset=offset, limit=limit, keyset=keyset)).all()
+        return make_page(rows, keyset, limit, entities=not self.projected(stmt))
+
+    def fetch(self, db: Session, stmt: Select) -> list[Any]:
+        """Entities selected by ``stmt``, or its rows when it is a projection."""
+        result = db.execute(stmt)
+        return result.all() if self.projected(stmt) else list(result.scalars())
+
+    def get_many(
+        self, db: Session, ids: Sequence[int], *, options: LoadProfile = None
+    ) -> tuple[list[Any], list[int]]:
+        """Entities (rows of a projection) of ``ids`` in input order, and the ids that don't exist."""
+        return self.in_order(ids, self.fetch(db, self.ids_stmt(sorted(set(ids)), options=options)))
+
+    def list_page(
+        self,
+        db: Session,
+        *,
+        cursor: str | None = None,
+        offset: int = 0,
+        limit: int = 50,
+        options: LoadProfile = None,
+        **filters: Any,
+    ) -> Page[ModelType]:
+        return self.page(db, self.select_stmt(options=options, **filters), cursor=cursor, offset=offset, limit=limit)
 
     def create(self, db: Session, data: dict[str, Any]) -> ModelType:
         obj = self.model(**data)
         db.add(obj)
         db.flush()
         db.refresh(obj)
+        self.bump_version(db)
         return obj
 
     def update(self, db: Session, obj: ModelType, data: dict[str, Any]) -> ModelType:
@@ -44,8 +265,128 @@ class CRUDBase(Generic[ModelType]):
                 setattr(obj, key, value)
         db.flush()
         db.refresh(obj)
+        self.bump_version(db)
         return obj
 
     def delete(self, db: Session, obj: ModelType) -> None:
         db.delete(obj)
         db.flush()
+        self.bump_version(db)
+
+    def bump_version(self, db: Session) -> None:
+        if self.family is not None:
+            bump_version(db, self.family)
+
+    def bulk_create(self, db: Session, rows: Sequence[dict[str, Any]]) -> list[int]:
+        """Insert ``rows`` with multi-row INSERTs, without loading objects; returns the ids in input order."""
+        return self._bulk_write(db, rows, upsert=False)
+
+    def _bulk_write(self, db: Session, rows: Sequence[dict[str, Any]], *, upsert: bool) -> list[int]:
+        ids = [0] * len(rows)
+        for part in self.bulk_statements(db.get_bind().dialect, rows, upsert=upsert):
+            part.assign(ids, db.execute(part.stmt))
+        if rows:
+            self.bump_version(db)
+        return ids
+
+
+class AsyncCRUDBase(CRUDCore[ModelType]):
+    async def get(self, db: AsyncSession, id: int, *, options: LoadProfile = None) -> ModelType | None:
+        return await db.get(self.model, id, options=self.load_options(options))
+
+    async def require(self, db: AsyncSession, id: int, *, options: LoadProfile = None) -> ModelType:
+        obj = await self.get(db, id, options=options)
+        if obj is None:
+            raise self.not_found(id)
+        return obj
+
+    async def list(
+        self, db: AsyncSession, *, offset: int = 0, limit: int = 50, options: LoadProfile = None, **filters: Any
+    ) -> list[ModelType]:
+        return list(await db.scalars(self.list_stmt(offset=offset, limit=limit, options=options, **filters)))
+
+    async def page(
+        self,
+        db: AsyncSession,
+        stmt: Select,
+        *,
+        cursor: str | None = None,
+        offset: int = 0,
+        limit: int = 50,
+        keyset: Keyset | None = None,
+    ) -> Page[ModelType]:
+        keyset = keyset or self.keyset()
+        rows = (await db.execute(self.page_stmt(stmt, cursor=cursor, offset=offset, limit=limit, keyset=keyset))).all()
+        return make_page(rows, keyset, limit, entities=not self.projected(stmt))
+
+    async def fetch(self, db: AsyncSession, stmt: Select) -> list[Any]:
+        result = await db.execute(stmt)
+        return result.all() if self.projected(stmt) else list(result.scalars())
+
+    async def get_many(
+        self, db: AsyncSession, ids: Sequence[int], *, options: LoadProfile = None
+    ) -> tuple[list[Any], list[int]]:
+        return self.in_order(ids, await self.fetch(db, self.ids_stmt(sorted(set(ids)), options=options)))
+
+    async def list_page(
+        self,
+        db: AsyncSession,
+        *,
+        cursor: str | None = None,
+        offset: int = 0,
+        limit: int = 50,
+        options: LoadProfile = None,
+        **filters: Any,
+    ) -> Page[ModelType]:
+        stmt = self.select_stmt(options=options, **filters)
+        return await self.page(db, stmt, cursor=cursor, offset=offset, limit=limit)
+
+    async def create(self, db: AsyncSession, data: dict[str, Any]) -> ModelType:
+        obj = self.model(**data)
+        db.add(obj)
+        await db.flush()
+        await db.refresh(obj)
+        await self.bump_version(db)
+        return obj
+
+    async def update(self, db: AsyncSession, obj: ModelType, data: dict[str, Any]) -> ModelType:
+        for key, value in data.items():
+            if value is not None:
+                setattr(obj, key, value)
+        await db.flush()
+        await db.refresh(obj)
+        await self.bump_version(db)
+        return obj
+
+    async def delete(self, db: AsyncSession, obj: ModelType) -> None:
+        await db.delete(obj)
+        await db.flush()
+        await self.bump_version(db)
+
+    async def bump_version(self, db: AsyncSession) -> None:
+        if self.family is not None:
+            await async_bump_version(db, self.family)
+
+    async def bulk_create(self, db: AsyncSession, rows: Sequence[dict[str, Any]]) -> list[int]:
+        return await self._bulk_write(db, rows, upsert=False)
+
+    async def _bulk_write(self, db: AsyncSession, rows: Sequence[dict[str, Any]], *, upsert: bool) -> list[int]:
+        ids = [0] * len(rows)
+        for part in self.bulk_statements(db.get_bind().dialect, rows, upsert=upsert):
+            part.assign(ids, await db.execute(part.stmt))
+        if rows:
+            await self.bump_version(db)
+        return ids
+
+
+class CRUDUpsertBase(CRUDBase[ModelType]):
+    """CRUD of entities whose rows can be overwritten in bulk (no derived rows to rebuild on a change)."""
+
+    def bulk_upsert(self, db: Session, rows: Sequence[dict[str, Any]]) -> list[int]:
+        """Like ``bulk_create``, but rows whose primary key exists update it (INSERT ... ON DUPLICATE KEY UPDATE)."""
+        return self._bulk_write(db, rows, upsert=True)
+
+
+class AsyncCRUDUpsertBase(AsyncCRUDBase[ModelType]):
+    async def bulk_upsert(self, db: AsyncSession, rows: Sequence[dict[str, Any]]) -> list[int]:
+        return await self._bulk_write(db, rows, upsert=True)
@@ -1,13 +1,87 @@
 from __future__ import annotations
 
 
-from app.crud.base import CRUDBase
+from typing import Any, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, load_only, selectinload
+
+from app.crud.base import AsyncCRUDUpsertBase, CRUDCore, CRUDUpsertBase
+from app.crud.geo_index import FAMILY, building_geo_index
 from app.model.building import Building
 
 
-class CRUDBuilding(CRUDBase[Building]):
+class BuildingQueries(CRUDCore[Building]):
+    family = FAMILY
+    load_profiles = {
+        "out": (load_only(Building.id, Building.address, Building.latitude, Building.longitude),),
+        "organizations": (selectinload(Building.organizations),),
+    }
+    projections = {"row": (Building.id, Building.address, Building.latitude, Building.longitude)}
+
+    @staticmethod
+    def stage_bulk(db: Session | AsyncSession, ids: Sequence[int], rows: Sequence[dict[str, Any]]) -> None:
+        for id_, row in zip(ids, rows):
+            building_geo_index.stage(db, "put", id_, row["latitude"], row["longitude"])
+
+
+class CRUDBuilding(BuildingQueries, CRUDUpsertBase[Building]):
     def __init__(self) -> None:
         super().__init__(Building)
 
+    def create(self, db: Session, data: dict[str, Any]) -> Building:
+        obj = super().create(db, data)
+        building_geo_index.stage_put(db, obj)
+        return obj
+
+    def update(self, db: Session, obj: Building, data: dict[str, Any]) -> Building:
+        obj = super().update(db, obj, data)
+        building_geo_index.stage_put(db, obj)
+        return obj
+
+    def delete(self, db: Session, obj: Building) -> None:
+        super().delete(db, obj)
+        building_geo_index.stage_remove(db, obj)
+
+    def bulk_create(self, db: Session, rows: Sequence[dict[str, Any]]) -> list[int]:
+        ids = super().bulk_create(db, rows)
+        self.stage_bulk(db, ids, rows)
+        return ids
+
+    def bulk_upsert(self, db: Session, rows: Sequence[dict[str, Any]]) -> list[int]:
+        ids = super().bulk_upsert(db, rows)
+        self.stage_bulk(db, ids, rows)
+        return ids
+
+
+class AsyncCRUDBuilding(BuildingQueries, AsyncCRUDUpsertBase[Building]):
+    def __init__(self) -> None:
+        super().__init__(Building)
+
+    async def create(self, db: AsyncSession, data: dict[str, Any]) -> Building:
+        obj = await super().create(db, data)
+        building_geo_index.stage_put(db, obj)
+        return obj
+
+    async def update(self, db: AsyncSession, obj: Building, data: dict[str, Any]) -> Building:
+        obj = await super().update(db, obj, data)
+        building_geo_index.stage_put(db, obj)
+        return obj
+
+    async def delete(self, db: AsyncSession, obj: Building) -> None:
+        await super().delete(db, obj)
+        building_geo_index.stage_remove(db, obj)
+
+    async def bulk_create(self, db: AsyncSession, rows: Sequence[dict[str, Any]]) -> list[int]:
+        ids = await super().bulk_create(db, rows)
+        self.stage_bulk(db, ids, rows)
+        return ids
+
+    async def bulk_upsert(self, db: AsyncSession, rows: Sequence[dict[str, Any]]) -> list[int]:
+        ids = await super().bulk_upsert(db, rows)
+        self.stage_bulk(db, ids, rows)
+        return ids
+
 
 building_crud = CRUDBuilding()
+async_building_crud = AsyncCRUDBuilding()
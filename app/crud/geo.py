@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import math
+from typing import Any
+
+from sqlalchemy import Boolean, ColumnElement, func
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import GenericFunction
+
+from app.model.types import WGS84
+
+
+# Mean Earth radius in meters, the default sphere of MySQL ST_Distance_Sphere
+EARTH_RADIUS = 6370986.0
+
+
+def point(lat: float, lon: float) -> ColumnElement:
+    return func.ST_SRID(func.Point(lon, lat), WGS84)
+
+
+def envelope(lat_min: float, lat_max: float, lon_min: float, lon_max: float) -> ColumnElement:
+    """Polygon with the given corners, comparable with ``Building.location`` through the spatial index."""
+    corners = [(lon_min, lat_min), (lon_max, lat_min), (lon_max, lat_max), (lon_min, lat_max), (lon_min, lat_min)]
+    wkt = "POLYGON((" + ",".join(f"{lon!r} {lat!r}" for lon, lat in corners) + "))"
+    return func.ST_GeomFromText(wkt, WGS84, "axis-order=long-lat")
+
+
+class mbr_contains(GenericFunction):
+    """``MBRContains``: the point lies inside the envelope, through the spatial index of ``Building.location``."""
+
+    type = Boolean()
+    name = "MBRContains"
+    inherit_cache = True
+
+
+class mbr_covers(GenericFunction):
+    """``MBRCovers``: as ``mbr_contains``, points on the boundary included."""
+
+    type = Boolean()
+    name = "MBRCovers"
+    inherit_cache = True
+
+
+@compiles(mbr_contains, "sqlite")
+@compiles(mbr_covers, "sqlite")
+def _sqlite_mbr(element: GenericFunction, compiler, **kw: Any) -> str:
+    # SQLite has no location column to prefilter on; the exact checks after the prefilter still apply
+    return "1 = 1"
+
+
+def envelope_fits(lat_min: float, lat_max: float, lon_min: float, lon_max: float) -> bool:
+    """Whether the range can be indexed as one envelope: valid coordinates and less than half the globe wide."""
+    return -90 <= lat_min <= lat_max <= 90 and -180 <= lon_min <= lon_max <= 180 and lon_max - lon_min < 180
+
+
+def bounding_box(lat: float, lon: float, radius: float) -> tuple[float, float, float, float] | None:
+    """
+    Latitude/longitude range covering every point within ``radius`` meters of the center.
+
+    None when no single envelope fits: the circle reaches a pole or crosses the antimeridian.
+    """
+    angle = radius / EARTH_RADIUS
+    lat_min, lat_max = lat - math.degrees(angle), lat + math.degrees(angle)
+    if lat_min <= -90 or lat_max >= 90:
+        return None
+    # Widest point of the circle lies north/south of the center's parallel, hence asin rather than a plain ratio
+    d_lon = math.degrees(math.asin(min(1.0, math.sin(angle) / math.cos(math.radians(lat)))))
+    lon_min, lon_max = lon - d_lon, lon + d_lon
+    if not envelope_fits(lat_min, lat_max, lon_min, lon_max):
+        return None
+    return lat_min, lat_max, lon_min, lon_max
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Iterable
+
+import numpy as np
+from sqlalchemy import Select, event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, SessionTransaction
+
+from app.crud import geo
+from app.crud.local_index import LocalIndex
+from app.crud.versions import on_version_commit
+from app.model.building import Building
+
+
+FAMILY = "building"
+
+
+def haversine(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Great-circle distances in meters from one point to many, on the sphere of ST_Distance_Sphere."""
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    h = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * geo.EARTH_RADIUS * np.arcsin(np.sqrt(np.minimum(h, 1.0)))
+
+
+@dataclass(frozen=True)
+class _Grid:
+    """Buildings sorted by grid cell; a row of cells is one contiguous key range."""
+
+    cell_size: float
+    keys: np.ndarray
+    ids: np.ndarray
+    lats: np.ndarray
+    lons: np.ndarray
+
+    @property
+    def columns(self) -> int:
+        return int(np.ceil(360 / self.cell_size)) + 1
+
+    def cell_keys(self, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        rows = np.floor((lats + 90) / self.cell_size).astype(np.int64)
+        cols = np.floor((lons + 180) / self.cell_size).astype(np.int64)
+        return rows * self.columns + cols
+
+    @classmethod
+    def build(cls, cell_size: float, ids: np.ndarray, lats: np.ndarray, lons: np.ndarray) -> _Grid:
+        grid = cls(cell_size, np.empty(0, np.int64), ids, lats, lons)
+        keys = grid.cell_keys(lats, lons)
+        order = np.lexsort((ids, keys))
+        return cls(cell_size, keys[order], ids[order], lats[order], lons[order])
+
+    def without(self, ids: Iterable[int]) -> _Grid:
+        keep = ~np.isin(self.ids, np.fromiter(ids, np.int64))
+        return _Grid(self.cell_size, self.keys[keep], self.ids[keep], self.lats[keep], self.lons[keep])
+
+    def with_rows(self, ids: np.ndarray, lats: np.ndarray, lons: np.ndarray) -> _Grid:
+        if not len(ids):
+            return self
+        keys = self.cell_keys(lats, lons)
+        # Rows are slotted into place instead of re-sorting the whole set
+        positions = np.searchsorted(self.keys, keys)
+        return _Grid(
+            self.cell_size,
+            np.insert(self.keys, positions, keys),
+            np.insert(self.ids, positions, ids),
+            np.insert(self.lats, positions, lats),
+            np.insert(self.lons, positions, lons),
+        )
+
+    def candidates(self, lat_min: float, lat_max: float, lon_min: float, lon_max: float) -> np.ndarray:
+        """Positions of the buildings in the cells overlapping the range (a superset of the range)."""
+        lat_bounds, lon_bounds = np.array([lat_min, lat_max]), np.array([lon_min, lon_max])
+        low, high = self.cell_keys(lat_bounds, lon_bounds)
+        rows = np.arange(low // self.columns, high // self.columns + 1)
+        starts = np.searchsorted(self.keys, rows * self.columns + low % self.columns, side="left")
+        ends = np.searchsorted(self.keys, rows * self.columns + high % self.columns, side="right")
+        return np.concatenate([np.arange(a, b) for a, b in zip(starts, ends) if b > a] or [np.empty(0, np.int64)])
+
+
+class BuildingGeoIndex(LocalIndex[_Grid]):
+    """
+    Process-local copy of building coordinates for the nearby queries.
+
+    Buildings live in NumPy arrays ordered by a fixed-size lat/lon grid, so a query looks at the
+    cells of its bounding box only and filters them with vectorized haversine. Commits of the
+    building CRUD patch the arrays in place; other workers' writes show up through the ``building``
+    entity version.
+    """
+
+    family = FAMILY
+    ops_key = "building_geo_ops"
+    enabled_setting = "geo_index_enabled"
+    check_interval_setting = "geo_index_check_interval"
+
+    def __init__(
+        self, check_interval: float | None = None, enabled: bool | None = None, cell_size: float | None = None
+    ) -> None:
+        self._cell_size = cell_size
+        super().__init__(check_interval=check_interval, enabled=enabled)
+
+    @property
+    def cell_size(self) -> float:
+        if self._cell_size is None:
+            from app.config.settings import settings
+
+            self._cell_size = settings.geo_index_cell_size
+        return self._cell_size
+
+    def empty(self) -> _Grid:
+        # Placeholder until the first load; reading settings here would run at import time
+        return _Grid.build(self._cell_size or 1.0, np.empty(0, np.int64), np.empty(0), np.empty(0))
+
+    def rows_stmt(self) -> Select:
+        return select(Building.id, Building.latitude, Building.longitude)
+
+    def build(self, rows: Iterable[tuple[int, float, float]]) -> _Grid:
+        rows = list(rows)
+        ids = np.fromiter((r[0] for r in rows), np.int64, len(rows))
+        lats = np.fromiter((r[1] for r in rows), np.float64, len(rows))
+        lons = np.fromiter((r[2] for r in rows), np.float64, len(rows))
+        return _Grid.build(self.cell_size, ids, lats, lons)
+
+    def patch(self, data: _Grid, ops: list[tuple]) -> _Grid:
+        # Last operation per building wins; a put replaces the previous coordinates
+        final: dict[int, tuple[float, float] | None] = {}
+        for op, id_, lat, lon in ops:
+            final[id_] = (lat, lon) if op == "put" else None
+        grid = data.without(final)
+        puts = [(id_, point) for id_, point in final.items() if point is not None]
+        return grid.with_rows(
+            np.array([id_ for id_, _ in puts], np.int64),
+            np.array([point[0] for _, point in puts], np.float64),
+            np.array([point[1] for _, point in puts], np.float64),
+        )
+
+    @property
+    def size(self) -> int:
+        return len(self._data.ids)
+
+    @property
+    def max_buildings(self) -> int:
+        """Candidate count above which a rectangle is cheaper to answer in MySQL than through an IN list."""
+        from app.config.settings import settings
+
+        return settings.geo_index_max_buildings
+
+    def radius(self, lat: float, lon: float, radius: float) -> tuple[np.ndarray, np.ndarray]:
+        """Ids of the buildings within ``radius`` meters and their distances, nearest first (ties by id)."""
+        grid = self._data
+        box = geo.bounding_box(lat, lon, radius)
+        # Without a box (a pole or the antimeridian inside the circle) every building is a candidate
+        positions = grid.candidates(*box) if box is not None else np.arange(len(grid.ids))
+        distances = haversine(lat, lon, grid.lats[positions], grid.lons[positions])
+        inside = distances <= radius
+        ids, distances = grid.ids[positions][inside], distances[inside]
+        order = np.lexsort((ids, distances))
+        return ids[order], distances[order]
+
+    def square(self, lat_min: float, lat_max: float, lon_min: float, lon_max: float) -> np.ndarray:
+        """Ids of the buildings inside the range, ascending."""
+        grid = self._data
+        if lat_min > lat_max or lon_min > lon_max:
+            return np.empty(0, np.int64)
+        positions = grid.candidates(max(lat_min, -90), min(lat_max, 90), max(lon_min, -180), min(lon_max, 180))
+        lats, lons = grid.lats[positions], grid.lons[positions]
+        inside = (lats >= lat_min) & (lats <= lat_max) & (lons >= lon_min) & (lons <= lon_max)
+        return np.sort(grid.ids[positions][inside])
+
+    def stage_put(self, db: Session | AsyncSession, obj: Building) -> None:
+        self.stage(db, "put", obj.id, obj.latitude, obj.longitude)
+
+    def stage_remove(self, db: Session | AsyncSession, obj: Building) -> None:
+        self.stage(db, "remove", obj.id, None, None)
+
+
+building_geo_index = BuildingGeoIndex()
+
+
+@on_version_commit
+def _patch_index(session: Session, bumped: dict[str, tuple[int | None, int]]) -> None:
+    building_geo_index.commit_session(session, bumped)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_uncommitted(session: Session, transaction: SessionTransaction) -> None:
+    if transaction.parent is None:
+        building_geo_index.discard(session)
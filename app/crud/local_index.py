@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import threading
+from abc import ABC, abstractmethod
+import time
+from typing import Any, Generic, Iterable, TypeVar
+
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.crud.versions import async_get_versions, get_versions, has_pending_bump
+
+
+DataT = TypeVar("DataT")
+
+
+class LocalIndex(ABC, Generic[DataT]):
+    """
+    Process-local, read-only copy of one entity family, versioned through ``entity_version``.
+
+    Subclasses define the rows to load (``rows_stmt``), how to build the data from them and how to
+    patch it with the operations staged by the CRUD. Commits of this process patch the copy in
+    place; writes from other workers are picked up through the family version, checked at most
+    once per ``check_interval`` seconds. Only a newer version reloads the copy: a replica that is
+    behind reports an older one.
+    """
+
+    family: str
+    # Session.info key holding the patches staged by the CRUD until commit
+    ops_key: str
+    # Settings attributes holding the defaults of ``enabled`` and ``check_interval``
+    enabled_setting: str
+    check_interval_setting: str
+
+    def __init__(self, check_interval: float | None = None, enabled: bool | None = None) -> None:
+        self._check_interval = check_interval
+        self._enabled = enabled
+        self._data = self.empty()
+        self._version: int | None = None
+        self._loaded = False
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _configure(self) -> None:
+        # Imported lazily: scripts load .env only after importing the CRUD modules
+        from app.config.settings import settings
+
+        if self._check_interval is None:
+            self._check_interval = getattr(settings, self.check_interval_setting)
+        if self._enabled is None:
+            self._enabled = getattr(settings, self.enabled_setting)
+
+    @property
+    def check_interval(self) -> float:
+        if self._check_interval is None:
+            self._configure()
+        return self._check_interval
+
+    @property
+    def enabled(self) -> bool:
+        if self._enabled is None:
+            self._configure()
+        return self._enabled
+
+    @abstractmethod
+    def empty(self) -> DataT: ...
+
+    @abstractmethod
+    def rows_stmt(self) -> Select: ...
+
+    @abstractmethod
+    def build(self, rows: Iterable[tuple]) -> DataT: ...
+
+    @abstractmethod
+    def patch(self, data: DataT, ops: list[tuple]) -> DataT:
+        """New data with the staged operations applied; ``data`` itself may be shared with readers."""
+
+    def _needs_check(self) -> bool:
+        return not self._loaded or time.monotonic() - self._checked_at >= self.check_interval
+
+    def _apply_version(self, version: int) -> bool:
+        """Record a version check; returns True when the data must be reloaded."""
+        self._checked_at = time.monotonic()
+        return not self._loaded or version > self._version
+
+    def _replace(self, rows: Iterable[tuple], version: int | None) -> None:
+        data = self.build(rows)
+        with self._lock:
+            self._data = data
+            self._version = version
+            self._loaded = True
+
+    def ensure_fresh(self, db: Session) -> None:
+        if not self._needs_check():
+            return
+        version = get_versions(db, [self.family])[self.family]
+        if self._apply_version(version):
+            self._replace(db.execute(self.rows_stmt()).tuples().all(), version)
+
+    async def async_ensure_fresh(self, db: AsyncSession) -> None:
+        if not self._needs_check():
+            return
+        version = (await async_get_versions(db, [self.family]))[self.family]
+        if self._apply_version(version):
+            self._replace((await db.execute(self.rows_stmt())).tuples().all(), version)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded = False
+
+    def usable(self, db: Session | AsyncSession) -> bool:
+        """The index only reflects committed data; a session with staged changes of the family must query."""
+        return self.enabled and not has_pending_bump(db, self.family)
+
+    def stage(self, db: Session | AsyncSession, *op: Any) -> None:
+        db.info.setdefault(self.ops_key, []).append(op)
+
+    def commit(self, previous: int | None, new: int, ops: list[tuple]) -> None:
+        with self._lock:
+            if not self._loaded:
+                return
+            if previous != self._version:
+                # Another worker committed in between: the local copy misses its changes
+                self._loaded = False
+                return
+            self._data = self.patch(self._data, ops)
+            self._version = new
+
+    def commit_session(self, session: Session, bumped: dict[str, tuple[int | None, int]]) -> None:
+        """Version commit hook body: apply the operations the session staged for this family."""
+        ops = session.info.pop(self.ops_key, [])
+        if self.family in bumped:
+            previous, new = bumped[self.family]
+            self.commit(previous, new, ops)
+
+    def discard(self, session: Session) -> None:
+        session.info.pop(self.ops_key, None)
@@ -1,38 +1,573 @@
 from __future__ import annotations
 
-from typing import Iterable
+import math
+from typing import Any, AsyncIterator, Callable, Iterable, Iterator, Literal, Mapping, Sequence
 
-from sqlalchemy import delete, insert, select
-from sqlalchemy.orm import Session
+import numpy as np
+from sqlalchemy import JSON, ColumnElement, Delete, Row, Select, delete, func, insert, select, tuple_
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import GenericFunction
+from sqlalchemy.orm import Session, joinedload, load_only, selectinload
 
-from app.crud.base import CRUDBase
+from app.crud import geo
+from app.crud.base import AsyncCRUDUpsertBase, CRUDCore, CRUDUpsertBase, LoadProfile, ValidationError
+from app.crud.geo_index import building_geo_index
+from app.crud.pagination import Keyset, Page, encode_cursor
+from app.model.activity import Activity
+from app.model.building import Building
 from app.model.organization import Organization
 from app.model.organization_activity import OrganizationActivity
 
 
-class CRUDOrganization(CRUDBase[Organization]):
+FAMILY = "organization"
+
+# First radius (meters) of the expanding k-nearest search
+KNN_START_RADIUS = 500.0
+
+# Organization queries of one walk over the geo index at most; the last batch takes the rest of the radius
+RADIUS_WALK_BATCHES = 3
+
+# innodb_ft ngram_token_size the FULLTEXT name indexes are built with
+NGRAM_TOKEN_SIZE = 2
+
+SearchMode = Literal["like", "fulltext"]
+
+
+class _RadiusWalk:
+    """
+    Page of organizations around a point, from buildings found by the geo index.
+
+    Buildings are visited nearest first in growing batches, each fetched with one query, until the
+    page is full; a batch never splits buildings at the same distance, so the page order
+    (distance, id) matches the SQL path. The walk runs at most ``RADIUS_WALK_BATCHES`` queries and none
+    over ``max_ids`` buildings: when it would need more, it stops with ``overflow`` set and the caller
+    answers with SQL instead.
+
+    The walk stops once ``enough`` organizations are found: one more than the page by default, which tells
+    whether another page follows. With ``radii`` the radius widens (in the index, without queries)
+    whenever fewer buildings than the next batch are left in it; the buildings within a smaller radius
+    are a prefix of those within a larger one, so the walk goes on where it stopped.
+    """
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        distances: np.ndarray,
+        after: tuple[float, int] | None,
+        limit: int,
+        max_ids: int,
+        enough: int | None = None,
+        locate: Callable[[float], tuple[np.ndarray, np.ndarray]] | None = None,
+        radii: Iterable[float] = (),
+    ) -> None:
+        self.ids, self.distances, self.after, self.limit, self.max_ids = ids, distances, after, limit, max_ids
+        self.enough = limit + 1 if enough is None else enough
+        self.found: list[tuple[float, int, Organization]] = []
+        self.queries = 0
+        self.overflow = False
+        self._locate, self._radii = locate, iter(radii)
+        self._batch: dict[int, float] = {}
+
+    def _widen(self) -> bool:
+        radius = next(self._radii, None) if self._locate is not None else None
+        if radius is None:
+            return False
+        self.ids, self.distances = self._locate(radius)
+        return True
+
+    def batches(self) -> Iterator[list[int]]:
+        start = int(np.searchsorted(self.distances, self.after[0], side="left")) if self.after else 0
+        size = self.limit + 1
+        while len(self.found) < self.enough:
+            while len(self.ids) - start < size and self._widen():
+                pass
+            if start >= len(self.ids):
+                return
+            if self.queries == RADIUS_WALK_BATCHES:
+                self.overflow = True
+                return
+            end = len(self.ids) if self.queries == RADIUS_WALK_BATCHES - 1 else min(len(self.ids), start + size)
+            end = int(np.searchsorted(self.distances, self.distances[end - 1], side="right"))
+            if end - start > self.max_ids:
+                self.overflow = True
+                return
+            self._batch = dict(zip(self.ids[start:end].tolist(), self.distances[start:end].tolist()))
+            self.queries += 1
+            yield list(self._batch)
+            start, size = end, size * 4
+
+    def add(self, orgs: Iterable[Organization]) -> None:
+        for org in orgs:
+            key = (self._batch[org.building_id], org.id)
+            if self.after is None or key > self.after:
+                self.found.append((*key, org))
+
+    def nearest(self) -> list[tuple[Organization, float]]:
+        self.found.sort(key=lambda row: row[:2])
+        return [(org, distance) for distance, _, org in self.found[: self.limit]]
+
+    def page(self) -> Page[Organization]:
+        self.found.sort(key=lambda row: row[:2])
+        rows = self.found[: self.limit]
+        has_next = len(self.found) > self.limit and rows
+        return Page(items=[row[2] for row in rows], next_cursor=encode_cursor(rows[-1][:2]) if has_next else None)
+
+
+def fulltext_usable(text: str) -> bool:
+    # The ngram parser indexes NGRAM_TOKEN_SIZE-character tokens: shorter input matches nothing
+    return len(text.strip()) >= NGRAM_TOKEN_SIZE
+
+
+def fulltext_match(column: ColumnElement, text: str) -> ColumnElement[float]:
+    """Relevance of ``column`` for ``text`` searched as one phrase (substring-like with the ngram parser)."""
+    phrase = '"' + text.replace('"', " ").strip() + '"'
+    return match(column, against=phrase).in_boolean_mode()
+
+
+def name_condition(column: ColumnElement, text: str, search_mode: SearchMode) -> ColumnElement[bool]:
+    if search_mode == "fulltext" and fulltext_usable(text):
+        return fulltext_match(column, text) > 0
+    return func.lower(column).like(func.lower(f"%{text}%"))
+
+
+class json_arrayagg(GenericFunction):
+    """JSON array of the aggregated values; NULL over no rows on MySQL."""
+
+    type = JSON()
+    inherit_cache = True
+
+
+@compiles(json_arrayagg, "sqlite")
+def _sqlite_json_arrayagg(element: json_arrayagg, compiler, **kw: Any) -> str:
+    return f"json_group_array({compiler.process(element.clauses, **kw)})"
+
+
+def knn_radii() -> Iterator[float]:
+    """Search radii of the k-nearest lookup: from a city block up to half the globe, which covers everything."""
+    radius, widest = KNN_START_RADIUS, math.pi * geo.EARTH_RADIUS
+    while radius < widest:
+        yield radius
+        radius *= 4
+    yield widest
+
+
+# Queries of the k-nearest lookup in SQL at most, one per radius
+KNN_STEPS = sum(1 for _ in knn_radii())
+
+
+class OrganizationQueries(CRUDCore[Organization]):
+    family = FAMILY
+    load_profiles = {
+        "out": (load_only(Organization.id, Organization.name, Organization.building_id, Organization.phones),),
+        "building": (joinedload(Organization.building),),
+        "activities": (selectinload(Organization.activities),),
+    }
+    projections = {"row": (Organization.id, Organization.name, Organization.building_id, Organization.phones)}
+
+    def search_stmt(self, activity_ids: Iterable[int] | None, *, options: LoadProfile = None) -> Select:
+        stmt = self.with_options(select(Organization), options)
+        if activity_ids:
+            # Semi-join: an organization linked to several activities of the subtree is returned once
+            linked = select(OrganizationActivity.organization_id).where(
+                OrganizationActivity.activity_id.in_(activity_ids)
+            )
+            stmt = stmt.where(Organization.id.in_(linked))
+        return stmt
+
+    def filter_stmt(
+        self,
+        *,
+        organization_id: int | None = None,
+        organization_name: str | None = None,
+        building_id: int | None = None,
+        activity_name: str | None = None,
+        search_mode: SearchMode = "like",
+        options: LoadProfile = None,
+    ) -> Select:
+        stmt = self.with_options(select(Organization), options)
+
+        if organization_id:
+            stmt = stmt.where(Organization.id == organization_id)
+
+        if organization_name:
+            stmt = stmt.where(name_condition(Organization.name, organization_name, search_mode))
+
+        if building_id:
+            stmt = stmt.where(Organization.building_id == building_id)
+
+        if activity_name:
+            # Semi-join, so an organization with several matching activities is returned once
+            linked = (
+                select(OrganizationActivity.organization_id)
+                .join(Activity, Activity.id == OrganizationActivity.activity_id)
+                .where(name_condition(Activity.name, activity_name, search_mode))
+            )
+            stmt = stmt.where(Organization.id.in_(linked))
+
+        return stmt
+
+    def filter_keyset(self, organization_name: str | None, search_mode: SearchMode) -> Keyset | None:
+        """Full-text name search is ordered by relevance (best first, ties by id); None means by id."""
+        if search_mode != "fulltext" or not organization_name or not fulltext_usable(organization_name):
+            return None
+        return Keyset((-fulltext_match(Organization.name, organization_name), Organization.id))
+
+    def export_stmt(self, *, with_building: bool = False, with_activities: bool = False, **filters: Any) -> Select:
+        """
+        Plain rows of the organizations matching ``filters`` (see ``filter_stmt``), ordered by id. Building
+        coordinates come from a join and activity ids from a correlated aggregate, so the whole export is one
+        statement: nothing else can run on the connection while its server-side cursor is open.
+        """
+        stmt = self.filter_stmt(**filters, options="row")
+        if with_building:
+            stmt = stmt.join(Building, Building.id == Organization.building_id).add_columns(
+                Building.latitude, Building.longitude
+            )
+        if with_activities:
+            activity_ids = (
+                select(json_arrayagg(OrganizationActivity.activity_id))
+                .where(OrganizationActivity.organization_id == Organization.id)
+                .scalar_subquery()
+            )
+            stmt = stmt.add_columns(activity_ids.label("activity_ids"))
+        return stmt.order_by(Organization.id)
+
+    @staticmethod
+    def export_record(row: Row) -> dict[str, Any]:
+        record = row._asdict()
+        if "activity_ids" in record:
+            record["activity_ids"] = sorted(record["activity_ids"] or [])
+        return record
+
+    @staticmethod
+    def distance(center_lat: float, center_lon: float) -> ColumnElement[float]:
+        """Distance in meters from the center to the building of the organization."""
+        return func.ST_Distance_Sphere(geo.point(center_lat, center_lon), Building.location)
+
+    def radius_stmt(
+        self, center_lat: float, center_lon: float, radius: float, *, options: LoadProfile = None
+    ) -> Select:
+        stmt = self.with_options(select(Organization), options).join(Organization.building)
+        box = geo.bounding_box(center_lat, center_lon, radius)
+        if box is not None:
+            # Index-backed prefilter; the exact sphere distance is computed only for buildings inside the box
+            stmt = stmt.where(geo.mbr_contains(geo.envelope(*box), Building.location))
+        return stmt.where(self.distance(center_lat, center_lon) <= radius)
+
+    def radius_keyset(self, center_lat: float, center_lon: float) -> Keyset:
+        """Nearest first; ties broken by id."""
+        return Keyset((self.distance(center_lat, center_lon), Organization.id))
+
+    def nearest_stmt(
+        self, center_lat: float, center_lon: float, radius: float, k: int, *, options: LoadProfile = None
+    ) -> Select:
+        """The ``k`` organizations nearest to the center within ``radius``, with their distances."""
+        distance = self.distance(center_lat, center_lon)
+        stmt = self.radius_stmt(center_lat, center_lon, radius, options=options).add_columns(distance)
+        return stmt.order_by(distance, Organization.id).limit(k)
+
+    def nearest_pairs(self, stmt: Select, rows: Sequence[Row]) -> list[tuple[Any, float]]:
+        """(organization, distance) pairs of ``nearest_stmt`` rows; a projected row ends with its distance."""
+        if self.projected(stmt):
+            return [(row, row[-1]) for row in rows]
+        return [(org, distance) for org, distance in rows]
+
+    def by_buildings_stmt(self, building_ids: Iterable[int], *, options: LoadProfile = None) -> Select:
+        return self.with_options(select(Organization), options).where(Organization.building_id.in_(list(building_ids)))
+
+    def radius_walk(
+        self, center_lat: float, center_lon: float, radius: float, *, cursor: str | None, limit: int
+    ) -> _RadiusWalk:
+        ids, distances = building_geo_index.radius(center_lat, center_lon, radius)
+        after = self.cursor_values(cursor, 2) if cursor is not None else None
+        return _RadiusWalk(ids, distances, after, limit, building_geo_index.max_buildings)
+
+    @staticmethod
+    def nearest_walk(center_lat: float, center_lon: float, k: int) -> _RadiusWalk:
+        """Walk to the ``k`` nearest organizations, widening the radius like the SQL search does."""
+
+        def locate(radius: float) -> tuple[np.ndarray, np.ndarray]:
+            return building_geo_index.radius(center_lat, center_lon, radius)
+
+        radii = knn_radii()
+        ids, distances = locate(next(radii))
+        return _RadiusWalk(ids, distances, None, k, building_geo_index.max_buildings, k, locate, radii)
+
+    @staticmethod
+    def indexed_square_ids(lat_min: float, lat_max: float, lon_min: float, lon_max: float) -> list[int] | None:
+        """Building ids in the rectangle from the geo index, None when there are too many for an IN list."""
+        ids = building_geo_index.square(lat_min, lat_max, lon_min, lon_max)
+        return ids.tolist() if len(ids) <= building_geo_index.max_buildings else None
+
+    def square_stmt(
+        self, lat_min: float, lat_max: float, lon_min: float, lon_max: float, *, options: LoadProfile = None
+    ) -> Select:
+        stmt = self.with_options(select(Organization), options).join(Organization.building)
+        if geo.envelope_fits(lat_min, lat_max, lon_min, lon_max):
+            # The envelope finds candidates through the spatial index; its geodesic edges may bulge
+            # past the requested parallels, so the exact range check stays
+            stmt = stmt.where(geo.mbr_covers(geo.envelope(lat_min, lat_max, lon_min, lon_max), Building.location))
+        return stmt.where(
+            Building.latitude.between(lat_min, lat_max),
+            Building.longitude.between(lon_min, lon_max),
+        )
+
+    @staticmethod
+    def links_stmt(org_ids: Iterable[int]) -> Select:
+        return select(OrganizationActivity.organization_id, OrganizationActivity.activity_id).where(
+            OrganizationActivity.organization_id.in_(list(org_ids))
+        )
+
+    @staticmethod
+    def links_diff(
+        current: Iterable[tuple[int, int]], links: Mapping[int, Iterable[int]]
+    ) -> tuple[list[tuple[int, int]], list[dict[str, int]]]:
+        """
+        (organization_id, activity_id) pairs to remove and link rows to insert so the organizations have
+        ``links``.
+        """
+        wanted = {(org_id, int(activity_id)) for org_id, activity_ids in links.items() for activity_id in activity_ids}
+        current = set(current)
+        return sorted(current - wanted), [
+            {"organization_id": org_id, "activity_id": activity_id} for org_id, activity_id in sorted(wanted - current)
+        ]
+
+    @staticmethod
+    def remove_links_stmt(pairs: Sequence[tuple[int, int]]) -> Delete:
+        return delete(OrganizationActivity).where(
+            tuple_(OrganizationActivity.organization_id, OrganizationActivity.activity_id).in_(pairs)
+        )
+
+    @staticmethod
+    def existing_ids_stmt(model: type[Building] | type[Activity], ids: Iterable[int]) -> Select:
+        return select(model.id).where(model.id.in_(list(ids)))
+
+    @staticmethod
+    def check_found(model: type[Building] | type[Activity], wanted: set[int], found: Iterable[int]) -> None:
+        missing = sorted(wanted - set(found))
+        if missing:
+            raise ValidationError(f"{model.__name__}({', '.join(map(str, missing))}) not found")
+
+    @staticmethod
+    def split_links(rows: Sequence[dict[str, Any]]) -> tuple[list[dict[str, Any]], list[list[int] | None]]:
+        """Organization rows and their ``activity_ids`` (None leaves the links of an existing organization alone)."""
+        return (
+            [{key: value for key, value in row.items() if key != "activity_ids"} for row in rows],
+            [row.get("activity_ids") for row in rows],
+        )
+
+
+class CRUDOrganization(OrganizationQueries, CRUDUpsertBase[Organization]):
     def __init__(self) -> None:
         super().__init__(Organization)
 
+    def radius_page(
+        self,
+        db: Session,
+        center_lat: float,
+        center_lon: float,
+        radius: float,
+        *,
+        cursor: str | None = None,
+        offset: int = 0,
+        limit: int = 50,
+        options: LoadProfile = None,
+    ) -> Page[Organization]:
+        """Organizations within ``radius`` meters, nearest first; served by the geo index when it is enabled."""
+        if not offset and building_geo_index.usable(db):
+            building_geo_index.ensure_fresh(db)
+            walk = self.radius_walk(center_lat, center_lon, radius, cursor=cursor, limit=limit)
+            for building_ids in walk.batches():
+                walk.add(self.fetch(db, self.by_buildings_stmt(building_ids, options=options)))
+            if not walk.overflow:
+                return walk.page()
+        stmt = self.radius_stmt(center_lat, center_lon, radius, options=options)
+        keyset = self.radius_keyset(center_lat, center_lon)
+        return self.page(db, stmt, cursor=cursor, offset=offset, limit=limit, keyset=keyset)
+
+    def nearest(
+        self, db: Session, center_lat: float, center_lon: float, k: int, *, options: LoadProfile = None
+    ) -> list[tuple[Organization, float]]:
+        """
+        The ``k`` organizations nearest to the center with distances in meters, nearest first.
+
+        The search radius grows until it holds ``k`` organizations, so every step is a bounded
+        (index-backed) radius query instead of sorting all organizations by distance. With the geo index
+        the radius grows in the index and the organizations are fetched by ``nearest_walk``.
+        """
+        if building_geo_index.usable(db):
+            building_geo_index.ensure_fresh(db)
+            walk = self.nearest_walk(center_lat, center_lon, k)
+            for building_ids in walk.batches():
+                walk.add(self.fetch(db, self.by_buildings_stmt(building_ids, options=options)))
+            if not walk.overflow:
+                return walk.nearest()
+        for radius in knn_radii():
+            stmt = self.nearest_stmt(center_lat, center_lon, radius, k, options=options)
+            rows = self.nearest_pairs(stmt, db.execute(stmt).all())
+            if len(rows) >= k:
+                break
+        return rows
+
+    def square_page(
+        self,
+        db: Session,
+        lat_min: float,
+        lat_max: float,
+        lon_min: float,
+        lon_max: float,
+        *,
+        cursor: str | None = None,
+        offset: int = 0,
+        limit: int = 50,
+        options: LoadProfile = None,
+    ) -> Page[Organization]:
+        building_ids = None
+        if building_geo_index.usable(db):
+            building_geo_index.ensure_fresh(db)
+            building_ids = self.indexed_square_ids(lat_min, lat_max, lon_min, lon_max)
+        if building_ids is None:
+            stmt = self.square_stmt(lat_min, lat_max, lon_min, lon_max, options=options)
+        else:
+            stmt = self.by_buildings_stmt(building_ids, options=options)
+        return self.page(db, stmt, cursor=cursor, offset=offset, limit=limit)
+
+    def export_batches(self, db: Session, stmt: Select, batch_size: int) -> Iterator[list[dict[str, Any]]]:
+        """Rows of ``export_stmt`` in batches, read through a server-side cursor: memory stays at one batch."""
+        result = db.execute(stmt, execution_options={"yield_per": batch_size})
+        for rows in result.partitions():
+            yield [self.export_record(row) for row in rows]
+
+    def _bulk_write(self, db: Session, rows: Sequence[dict[str, Any]], *, upsert: bool) -> list[int]:
+        rows, links = self.split_links(rows)
+        building_ids = {row["building_id"] for row in rows}
+        self.check_found(Building, building_ids, db.scalars(self.existing_ids_stmt(Building, building_ids)))
+        activity_ids = {activity_id for ids in links for activity_id in ids or ()}
+        if activity_ids:
+            self.check_found(Activity, activity_ids, db.scalars(self.existing_ids_stmt(Activity, activity_ids)))
+
+        ids = super()._bulk_write(db, rows, upsert=upsert)
+        self.set_activities_many(db, {id_: linked for id_, linked in zip(ids, links) if linked is not None})
+        return ids
+
     def set_activities(self, db: Session, org_id: int, activity_ids: Iterable[int]) -> None:
-        ids = set(int(x) for x in activity_ids)
-        # remove missing
-        db.execute(
-            delete(OrganizationActivity).where(
-                OrganizationActivity.organization_id == org_id,
-                OrganizationActivity.activity_id.not_in(ids) if ids else True,
-            )
-        )
-        # add new
-        if ids:
-            existing = set(
-                db.scalars(
-                    select(OrganizationActivity.activity_id).where(OrganizationActivity.organization_id == org_id)
-                )
-            )
-            to_insert = [{"organization_id": org_id, "activity_id": aid} for aid in ids - existing]
-            if to_insert:
-                db.execute(insert(OrganizationActivity), to_insert)
+        self.set_activities_many(db, {org_id: activity_ids})
+
+    def set_activities_many(self, db: Session, links: Mapping[int, Iterable[int]]) -> None:
+        """Replace the activities of several organizations: one read, one delete and one insert at most."""
+        if not links:
+            return
+        removed, added = self.links_diff(db.execute(self.links_stmt(links)).tuples(), links)
+        if removed:
+            db.execute(self.remove_links_stmt(removed))
+        if added:
+            db.execute(insert(OrganizationActivity), added)
+        self.bump_version(db)
+
+
+class AsyncCRUDOrganization(OrganizationQueries, AsyncCRUDUpsertBase[Organization]):
+    def __init__(self) -> None:
+        super().__init__(Organization)
+
+    async def radius_page(
+        self,
+        db: AsyncSession,
+        center_lat: float,
+        center_lon: float,
+        radius: float,
+        *,
+        cursor: str | None = None,
+        offset: int = 0,
+        limit: int = 50,
+        options: LoadProfile = None,
+    ) -> Page[Organization]:
+        if not offset and building_geo_index.usable(db):
+            await building_geo_index.async_ensure_fresh(db)
+            walk = self.radius_walk(center_lat, center_lon, radius, cursor=cursor, limit=limit)
+            for building_ids in walk.batches():
+                walk.add(await self.fetch(db, self.by_buildings_stmt(building_ids, options=options)))
+            if not walk.overflow:
+                return walk.page()
+        stmt = self.radius_stmt(center_lat, center_lon, radius, options=options)
+        keyset = self.radius_keyset(center_lat, center_lon)
+        return await self.page(db, stmt, cursor=cursor, offset=offset, limit=limit, keyset=keyset)
+
+    async def nearest(
+        self, db: AsyncSession, center_lat: float, center_lon: float, k: int, *, options: LoadProfile = None
+    ) -> list[tuple[Organization, float]]:
+        if building_geo_index.usable(db):
+            await building_geo_index.async_ensure_fresh(db)
+            walk = self.nearest_walk(center_lat, center_lon, k)
+            for building_ids in walk.batches():
+                walk.add(await self.fetch(db, self.by_buildings_stmt(building_ids, options=options)))
+            if not walk.overflow:
+                return walk.nearest()
+        for radius in knn_radii():
+            stmt = self.nearest_stmt(center_lat, center_lon, radius, k, options=options)
+            rows = self.nearest_pairs(stmt, (await db.execute(stmt)).all())
+            if len(rows) >= k:
+                break
+        return rows
+
+    async def square_page(
+        self,
+        db: AsyncSession,
+        lat_min: float,
+        lat_max: float,
+        lon_min: float,
+        lon_max: float,
+        *,
+        cursor: str | None = None,
+        offset: int = 0,
+        limit: int = 50,
+        options: LoadProfile = None,
+    ) -> Page[Organization]:
+        building_ids = None
+        if building_geo_index.usable(db):
+            await building_geo_index.async_ensure_fresh(db)
+            building_ids = self.indexed_square_ids(lat_min, lat_max, lon_min, lon_max)
+        if building_ids is None:
+            stmt = self.square_stmt(lat_min, lat_max, lon_min, lon_max, options=options)
+        else:
+            stmt = self.by_buildings_stmt(building_ids, options=options)
+        return await self.page(db, stmt, cursor=cursor, offset=offset, limit=limit)
+
+    async def export_batches(
+        self, db: AsyncSession, stmt: Select, batch_size: int
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """Rows of ``export_stmt`` in batches, read through a server-side cursor: memory stays at one batch."""
+        result = await db.stream(stmt, execution_options={"yield_per": batch_size})
+        async for rows in result.partitions():
+            yield [self.export_record(row) for row in rows]
+
+    async def _bulk_write(self, db: AsyncSession, rows: Sequence[dict[str, Any]], *, upsert: bool) -> list[int]:
+        rows, links = self.split_links(rows)
+        building_ids = {row["building_id"] for row in rows}
+        self.check_found(Building, building_ids, await db.scalars(self.existing_ids_stmt(Building, building_ids)))
+        activity_ids = {activity_id for ids in links for activity_id in ids or ()}
+        if activity_ids:
+            self.check_found(Activity, activity_ids, await db.scalars(self.existing_ids_stmt(Activity, activity_ids)))
+
+        ids = await super()._bulk_write(db, rows, upsert=upsert)
+        await self.set_activities_many(db, {id_: linked for id_, linked in zip(ids, links) if linked is not None})
+        return ids
+
+    async def set_activities(self, db: AsyncSession, org_id: int, activity_ids: Iterable[int]) -> None:
+        await self.set_activities_many(db, {org_id: activity_ids})
+
+    async def set_activities_many(self, db: AsyncSession, links: Mapping[int, Iterable[int]]) -> None:
+        """Replace the activities of several organizations: one read, one delete and one insert at most."""
+        if not links:
+            return
+        removed, added = self.links_diff((await db.execute(self.links_stmt(links))).tuples(), links)
+        if removed:
+            await db.execute(self.remove_links_stmt(removed))
+        if added:
+            await db.execute(insert(OrganizationActivity), added)
+        await self.bump_version(db)
 
 
 organization_crud = CRUDOrganization()
+async_organization_crud = AsyncCRUDOrganization()
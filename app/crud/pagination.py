@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from typing import Any, Generic, Sequence, TypeVar
+
+from sqlalchemy import ColumnElement, and_, or_
+
+
+T = TypeVar("T")
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps(list(values), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> tuple[Any, ...]:
+    """Key values packed by ``encode_cursor``; raises ValueError for anything else."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        values = None
+    if (
+        not isinstance(values, list)
+        or len(values) != size
+        or not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values)
+    ):
+        raise ValueError("Invalid cursor")
+    return tuple(values)
+
+
+@dataclass(frozen=True)
+class Keyset:
+    """Ascending sort key of a keyset-paginated statement; the last column must be unique."""
+
+    columns: tuple[ColumnElement, ...]
+
+    def after(self, values: Sequence[Any]) -> ColumnElement[bool]:
+        # (a, b) > (x, y) spelled out as a > x OR (a = x AND b > y), which MySQL turns into index ranges
+        *head, last = self.columns
+        *head_values, last_value = values
+        condition = last > last_value
+        for column, value in reversed(list(zip(head, head_values))):
+            condition = or_(column > value, and_(column == value, condition))
+        return condition
+
+
+@dataclass
+class Page(Generic[T]):
+    items: list[T]
+    next_cursor: str | None
+
+
+def make_page(rows: Sequence[Sequence[Any]], keyset: Keyset, limit: int, *, entities: bool = True) -> Page:
+    """Page of ``page_stmt`` rows: their entities, or the rows themselves (key columns at the end) for projections."""
+    size = len(keyset.columns)
+    next_cursor = encode_cursor(rows[limit - 1][-size:]) if limit and len(rows) > limit else None
+    items = [row[0] for row in rows[:limit]] if entities else list(rows[:limit])
+    return Page(items=items, next_cursor=next_cursor)
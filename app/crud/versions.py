@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from typing import Callable, Iterable
+
+from sqlalchemy import CursorResult, Insert, Select, event, func, select
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.engine import Dialect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, SessionTransaction
+
+from app.model.entity_version import EntityVersion
+
+
+# Session.info key holding {family: (previous_version, new_version)} for the open transaction; versions
+# count the committed writes, so the previous one is always new - 1
+_BUMPED_KEY = "entity_versions"
+# Session.info flag kept once a transaction of the session has committed version bumps
+_COMMITTED_KEY = "entity_versions_committed"
+
+CommitHook = Callable[[Session, dict[str, tuple[int | None, int]]], None]
+_commit_hooks: list[CommitHook] = []
+
+
+def on_version_commit(hook: CommitHook) -> CommitHook:
+    """Register ``hook(session, bumped)`` to run after a transaction that bumped versions commits."""
+    _commit_hooks.append(hook)
+    return hook
+
+
+def versions_stmt(names: Iterable[str]) -> Select:
+    return select(EntityVersion.name, EntityVersion.version).where(EntityVersion.name.in_(list(names)))
+
+
+def _bump_stmt(dialect: Dialect, name: str) -> Insert:
+    """
+    Increment the version of ``name`` in one statement, creating the row on the first write: the row lock
+    of the upsert orders concurrent writers, so each sees the version committed before it. MySQL hands the
+    new version back through LAST_INSERT_ID (the cursor's lastrowid), SQLite through RETURNING.
+    """
+    if dialect.name == "sqlite":
+        stmt = sqlite.insert(EntityVersion).values(name=name, version=1)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[EntityVersion.name], set_={"version": EntityVersion.version + 1}
+        )
+        return stmt.returning(EntityVersion.version)
+    stmt = mysql.insert(EntityVersion).values(name=name, version=func.last_insert_id(1))
+    return stmt.on_duplicate_key_update(version=func.last_insert_id(EntityVersion.version + 1))
+
+
+def _bumped(db: Session | AsyncSession, name: str, result: CursorResult) -> None:
+    new = result.scalar_one() if db.get_bind().dialect.name == "sqlite" else result.lastrowid
+    db.info[_BUMPED_KEY][name] = (new - 1, new)
+
+
+def bump_version(db: Session, name: str) -> None:
+    """Increment the version of ``name`` inside the current transaction (once per transaction)."""
+    if name in db.info.setdefault(_BUMPED_KEY, {}):
+        return
+    _bumped(db, name, db.execute(_bump_stmt(db.get_bind().dialect, name)))
+
+
+async def async_bump_version(db: AsyncSession, name: str) -> None:
+    if name in db.info.setdefault(_BUMPED_KEY, {}):
+        return
+    _bumped(db, name, await db.execute(_bump_stmt(db.get_bind().dialect, name)))
+
+
+def get_versions(db: Session, names: Iterable[str]) -> dict[str, int]:
+    """Versions of ``names``; a family no write has created a row for yet is at 0."""
+    names = list(names)
+    found = dict(db.execute(versions_stmt(names)).tuples().all())
+    return {name: found.get(name, 0) for name in names}
+
+
+async def async_get_versions(db: AsyncSession, names: Iterable[str]) -> dict[str, int]:
+    names = list(names)
+    found = dict((await db.execute(versions_stmt(names))).tuples().all())
+    return {name: found.get(name, 0) for name in names}
+
+
+def has_pending_bump(db: Session | AsyncSession, name: str) -> bool:
+    """True when the session changed ``name`` in a transaction that is not committed yet."""
+    return name in db.info.get(_BUMPED_KEY, {})
+
+
+def has_writes(db: Session | AsyncSession) -> bool:
+    """True when the session has bumped a version, in the open transaction or in a committed one."""
+    return bool(db.info.get(_BUMPED_KEY)) or db.info.get(_COMMITTED_KEY, False)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_commit_hooks(session: Session) -> None:
+    bumped = session.info.pop(_BUMPED_KEY, None)
+    if not bumped:
+        return
+    session.info[_COMMITTED_KEY] = True
+    for hook in _commit_hooks:
+        hook(session, bumped)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_uncommitted(session: Session, transaction: SessionTransaction) -> None:
+    if transaction.parent is None:
+        session.info.pop(_BUMPED_KEY, None)
@@ -1,13 +1,17 @@
 from .base import Base
 from .building import Building
 from .activity import Activity
+from .activity_closure import ActivityClosure
 from .organization import Organization
 from .organization_activity import OrganizationActivity
+from .entity_version import EntityVersion
 
 __all__ = [
     "Base",
     "Building",
     "Activity",
+    "ActivityClosure",
     "Organization",
     "OrganizationActivity",
+    "EntityVersion",
 ]
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-from sqlalchemy import ForeignKey, Integer, String
+from sqlalchemy import ForeignKey, Index, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.ext.hybrid import hybrid_property
 
@@ -14,6 +14,7 @@ if TYPE_CHECKING:
 
 class Activity(Base):
     __tablename__ = "activity"
+    __table_args__ = (Index("ix_activity_name_ft", "name", mysql_prefix="FULLTEXT", mysql_with_parser="ngram"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True, init=False)
     name: Mapped[str] = mapped_column(String(128), nullable=False, index=True)
@@ -22,30 +23,34 @@ class Activity(Base):
     )
 
     parent: Mapped[Activity | None] = relationship(
-        "Activity", remote_side=[id], back_populates="childrens", lazy="selectin", init=False
+        "Activity", remote_side=[id], back_populates="childrens", lazy="select", init=False
+    )
+    childrens: Mapped[list[Activity]] = relationship(
+        "Activity",
+        back_populates="parent",
+        lazy="select",
+        cascade="save-update, merge, delete",
+        passive_deletes=True,
+        init=False,
     )
-    childrens: Mapped[list[Activity]] = relationship("Activity", back_populates="parent", lazy="selectin", init=False)
 
     organizations: Mapped[list["Organization"]] = relationship(
         "Organization",
         secondary="organization_activity",
         back_populates="activities",
         viewonly=True,
-        lazy="selectin",
+        lazy="select",
         init=False,
     )
 
+    # Level in the tree, 1 for roots; maintained by the activity CRUD
+    stored_depth: Mapped[int] = mapped_column("depth", Integer, nullable=False, default=1, index=True)
+
     @hybrid_property
     def depth(self) -> int:
-        depth_value = 1
-        node = self
-        seen_ids: set[int] = set()
-        while getattr(node, "parent", None) is not None:
-            node_id = getattr(node, "id", None)
-            if node_id is not None:
-                if node_id in seen_ids:
-                    break
-                seen_ids.add(node_id)
-            depth_value += 1
-            node = node.parent  # type: ignore[assignment]
-        return depth_value
+        return self.stored_depth
+
+    @depth.inplace.expression
+    @classmethod
+    def _depth_expression(cls):
+        return cls.stored_depth
@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from sqlalchemy import ForeignKey, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.model.base import Base
+
+
+class ActivityClosure(Base):
+    """Transitive closure of the activity tree: one row per (ancestor, descendant) pair, self included."""
+
+    __tablename__ = "activity_closure"
+
+    ancestor_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("activity.id", ondelete="CASCADE"), nullable=False, primary_key=True
+    )
+    descendant_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("activity.id", ondelete="CASCADE"), nullable=False, primary_key=True, index=True
+    )
+    depth: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -2,10 +2,11 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-from sqlalchemy import Float, Integer, String
+from sqlalchemy import Computed, Float, Index, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.model.base import Base
+from app.model.types import WGS84, Point
 
 if TYPE_CHECKING:
     from app.model.organization import Organization
@@ -13,10 +14,21 @@ if TYPE_CHECKING:
 
 class Building(Base):
     __tablename__ = "building"
+    __table_args__ = (Index("ix_building_location", "location", mysql_prefix="SPATIAL").ddl_if(dialect="mysql"),)
+    # The generated location is not fetched back after writes: it is only read in SQL, and SQLite has no such column
+    __mapper_args__ = {"eager_defaults": False}
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True, init=False)
     address: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
     latitude: Mapped[float] = mapped_column(Float, nullable=False)
     longitude: Mapped[float] = mapped_column(Float, nullable=False)
+    # Generated from latitude/longitude by the database, so it can't drift from them; MySQL only (see Point)
+    location: Mapped[bytes] = mapped_column(
+        Point(srid=WGS84),
+        Computed(f"ST_SRID(POINT(longitude, latitude), {WGS84})", persisted=True),
+        nullable=False,
+        deferred=True,
+        init=False,
+    )
 
     organizations: Mapped[list[Organization]] = relationship("Organization", back_populates="building", init=False)
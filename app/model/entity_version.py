@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+from sqlalchemy import BigInteger, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.model.base import Base
+
+
+class EntityVersion(Base):
+    """Version counter of an entity family, incremented by every committed write to it."""
+
+    __tablename__ = "entity_version"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
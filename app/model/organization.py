@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from typing import List, TYPE_CHECKING
 
-from sqlalchemy import JSON, ForeignKey, Integer, String
+from sqlalchemy import JSON, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.model.base import Base
@@ -14,6 +14,7 @@ if TYPE_CHECKING:
 
 class Organization(Base):
     __tablename__ = "organization"
+    __table_args__ = (Index("ix_organization_name_ft", "name", mysql_prefix="FULLTEXT", mysql_with_parser="ngram"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True, init=False)
     name: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
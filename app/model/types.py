@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from typing import Any
+
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.schema import CreateColumn
+from sqlalchemy.types import UserDefinedType
+
+
+# Geographic coordinates (WGS 84); MySQL stores such points longitude first
+WGS84 = 4326
+
+
+class Point(UserDefinedType):
+    """
+    MySQL ``POINT`` column; values stay in the internal binary format, queries go through spatial functions.
+    Other databases (SQLite locally) have no such type, the column is left out of their tables.
+    """
+
+    cache_ok = True
+
+    def __init__(self, srid: int | None = None) -> None:
+        self.srid = srid
+
+    def get_col_spec(self, **kw: Any) -> str:
+        return "POINT"
+
+
+@compiles(CreateColumn, "mysql")
+def _mysql_column_srid(element: CreateColumn, compiler, **kw: Any) -> str:
+    # SRID is a column attribute in MySQL: it has to follow a GENERATED ... AS (...) clause,
+    # so it can't be rendered as part of the type
+    text = compiler.visit_create_column(element, **kw)
+    srid = getattr(element.element.type, "srid", None)
+    if text and srid is not None:
+        text = f"{text} SRID {srid}"
+    return text
+
+
+@compiles(CreateColumn)
+def _skip_point_column(element: CreateColumn, compiler, **kw: Any) -> str | None:
+    # None drops the column from CREATE TABLE; queries that read it stay MySQL-only
+    if isinstance(element.element.type, Point):
+        return None
+    return compiler.visit_create_column(element, **kw)
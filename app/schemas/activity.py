@@ -8,6 +8,12 @@ class ActivityCreate(BaseModel):
     parent_id: int | None = Field(default=None, description="ID родительской активности")
 
 
+class ActivityBulkItem(ActivityCreate):
+    id: int | None = Field(
+        default=None, ge=1, description="ID новой активности; на него могут ссылаться parent_id следующих записей пачки"
+    )
+
+
 class ActivityUpdate(BaseModel):
     name: str | None = Field(default=None, min_length=1, max_length=128, description="Название активности")
     parent_id: int | None = Field(default=None, description="ID родительской активности")
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from typing import List
+
 from pydantic import BaseModel, Field
 
 
@@ -9,6 +11,10 @@ class BuildingCreate(BaseModel):
     longitude: float = Field(description="Долгота")
 
 
+class BuildingBulkItem(BuildingCreate):
+    id: int | None = Field(default=None, ge=1, description="ID здания; здание с этим ID перезаписывается")
+
+
 class BuildingUpdate(BaseModel):
     address: str | None = Field(default=None, min_length=1, max_length=255)
     latitude: float | None = Field(default=None, description="Широта")
@@ -20,3 +26,8 @@ class BuildingOut(BaseModel):
     address: str = Field(description="Адрес здания")
     latitude: float = Field(description="Широта")
     longitude: float = Field(description="Долгота")
+
+
+class BuildingBatchOut(BaseModel):
+    items: List[BuildingOut] = Field(description="Найденные здания в порядке запрошенных ID")
+    missing: List[int] = Field(description="Запрошенные ID, которых нет")
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from typing import List
+
+from pydantic import BaseModel, Field
+
+
+class BulkOut(BaseModel):
+    ids: List[int] = Field(description="ID созданных и обновленных записей в порядке входных данных")
+
+
+class ImportRowError(BaseModel):
+    row: int = Field(description="Номер записи в файле, начиная с 1 (без заголовка CSV)")
+    error: str = Field(description="Причина, по которой запись пропущена")
+
+
+class ImportBatchOut(BaseModel):
+    batch: int = Field(description="Номер пачки, начиная с 1")
+    first_row: int = Field(description="Номер первой записи пачки")
+    last_row: int = Field(description="Номер последней записи пачки")
+    rows: int = Field(description="Записей в пачке")
+    written: int = Field(default=0, description="Записано в БД")
+    error: str | None = Field(default=None, description="Ошибка, из-за которой пачка отменена целиком")
+
+
+class ImportOut(BaseModel):
+    rows: int = Field(description="Прочитано записей")
+    written: int = Field(description="Записано в БД")
+    failed: int = Field(description="Пропущено записей: невалидные и из отмененных пачек")
+    batches: List[ImportBatchOut] = Field(description="Пачки в порядке записи, каждая в своей транзакции")
+    errors: List[ImportRowError] = Field(description="Ошибки валидации записей (первые IMPORT_MAX_ERRORS)")
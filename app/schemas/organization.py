@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import List
+from typing import List, Literal
 
 from pydantic import BaseModel, Field
 
@@ -12,6 +12,10 @@ class OrganizationCreate(BaseModel):
     activity_ids: List[int] = Field(default_factory=list, description="ID активностей")
 
 
+class OrganizationBulkItem(OrganizationCreate):
+    id: int | None = Field(default=None, ge=1, description="ID организации; организация с этим ID перезаписывается")
+
+
 class OrganizationUpdate(BaseModel):
     name: str | None = Field(default=None, min_length=1, max_length=255, description="Название организации")
     building_id: int | None = Field(default=None, description="ID здания")
@@ -24,3 +28,28 @@ class OrganizationOut(BaseModel):
     name: str = Field(description="Название организации")
     building_id: int = Field(description="ID здания")
     phones: List[str] = Field(description="Телефоны организации")
+
+
+class OrganizationBatchOut(BaseModel):
+    items: List[OrganizationOut] = Field(description="Найденные организации в порядке запрошенных ID")
+    missing: List[int] = Field(description="Запрошенные ID, которых нет")
+
+
+class OrganizationNearbyOut(OrganizationOut):
+    distance_m: float = Field(description="Расстояние до организации, м")
+
+
+class OrganizationFilter(BaseModel):
+    building_id: int | None = Field(default=None, description="ID здания")
+    organization_id: int | None = Field(default=None, description="ID организации")
+    organization_name: str | None = Field(default=None, min_length=1, description="Название организации")
+    activity_name: str | None = Field(default=None, min_length=1, description="Название активности")
+    search_mode: Literal["like", "fulltext"] = Field(
+        default="like",
+        description="Поиск по названиям: like - подстрока, fulltext - полнотекстовый индекс с сортировкой по релевантности",
+    )
+
+
+class OrganizationExport(OrganizationFilter):
+    with_building: bool = Field(default=False, description="Добавить координаты здания")
+    with_activities: bool = Field(default=False, description="Добавить ID активностей")
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+
+class PoolStatusOut(BaseModel):
+    size: int = Field(description="Размер пула соединений")
+    max_overflow: int = Field(description="Максимум соединений сверх размера пула")
+    checked_in: int = Field(description="Свободные соединения в пуле")
+    checked_out: int = Field(description="Выданные соединения")
+    overflow: int = Field(description="Открытые соединения сверх размера пула")
+    saturation: float = Field(description="Доля занятых соединений от максимума пула")
+    checkouts: int = Field(description="Количество выдач соединений")
+    timeouts: int = Field(description="Количество таймаутов ожидания соединения")
+    wait_avg_ms: float = Field(description="Среднее время ожидания соединения (без открытия нового), мс")
+    wait_max_ms: float = Field(description="Максимальное время ожидания соединения (без открытия нового), мс")
+    connects: int = Field(description="Количество открытых пулом соединений")
+    connect_avg_ms: float = Field(description="Среднее время открытия соединения, мс")
+
+
+class ResponseCacheOut(BaseModel):
+    enabled: bool = Field(description="Включен ли кэш ответов")
+    size: int = Field(description="Количество закэшированных ответов")
+    max_entries: int = Field(description="Максимальное количество ответов в кэше")
+    hits: int = Field(description="Количество попаданий")
+    misses: int = Field(description="Количество промахов")
+    evictions: int = Field(description="Количество вытесненных ответов")
+    not_modified: int = Field(description="Количество ответов 304 на If-None-Match")
+    hit_ratio: float = Field(description="Доля попаданий")
+
+
+class SlowQueryOut(BaseModel):
+    at: str = Field(description="Время выполнения запроса (UTC)")
+    duration_ms: float = Field(description="Длительность запроса, мс")
+    route: str | None = Field(description="Метод и маршрут HTTP-запроса, выполнившего SQL")
+    statement: str = Field(description="SQL-запрос")
+    parameters: Any = Field(description="Параметры SQL-запроса")
+    plan: Any = Field(description="План выполнения (EXPLAIN FORMAT=JSON в MySQL)")
+    pid: int = Field(description="PID процесса-обработчика")
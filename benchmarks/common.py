@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+import statistics
+import time
+from typing import Callable, Sequence
+
+
+def summarize(timings: Sequence[float]) -> dict[str, float]:
+    """Mean and p50/p95/p99 of ``timings`` (ms)."""
+    q = statistics.quantiles(timings, n=100) if len(timings) > 1 else list(timings) * 99
+    return {"mean": statistics.fmean(timings), "p50": q[49], "p95": q[94], "p99": q[98]}
+
+
+def measure(name: str, queries: Sequence[tuple], run: Callable[[tuple], int]) -> None:
+    """Run every query once and print latency percentiles; ``run`` returns the number of rows it got."""
+    timings, rows = [], 0
+    for args in queries:
+        started = time.perf_counter()
+        rows += run(args)
+        timings.append((time.perf_counter() - started) * 1000)
+    s = summarize(timings)
+    print(
+        f"{name:<18} mean {s['mean']:7.2f} ms  p50 {s['p50']:7.2f}  p95 {s['p95']:7.2f}  p99 {s['p99']:7.2f}"
+        f"  rows/query {rows / len(queries):.1f}"
+    )
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Latency, throughput and SQL statements per request of the v1 endpoints, with regression baselines.
+
+Every case sends the same seeded random requests to the app configured in .env, in-process
+(TestClient) and over a real socket (uvicorn on a free local port), and reports p50/p95/p99,
+requests per second and statements per request. Results can be saved as a JSON baseline and
+compared with one: the run exits with 1 when p50/p95 or throughput get worse than --threshold,
+or when a request needs more statements than before. Write endpoints are opt-in (--writes),
+they leave their rows in the database.
+
+    python bin/seed_data.py --scale 1000000
+    python benchmarks/endpoints.py --requests 300 --save benchmarks/baseline.json
+    python benchmarks/endpoints.py --requests 300 --compare benchmarks/baseline.json
+"""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+_ROOT = Path(__file__).resolve().parents[1]
+if str(_ROOT) not in sys.path:
+    sys.path.insert(0, str(_ROOT))
+
+import argparse
+import json
+import random
+import socket
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterator
+
+import httpx
+import uvicorn
+from dotenv import load_dotenv
+from fastapi.testclient import TestClient
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.config.db import SqlAlchemyConfig
+from app.config.settings import settings
+from app.model.activity import Activity
+from app.model.building import Building
+from app.model.organization import Organization
+from benchmarks.common import summarize
+
+
+load_dotenv()
+
+PREFIX = "/api/v1"
+# Rows sampled from the database to build requests from
+SAMPLE_SIZE = 1000
+# Statements per request may grow by this much before it counts as a regression (periodic version checks)
+QUERY_TOLERANCE = 0.5
+NDJSON = {"Content-Type": "application/x-ndjson"}
+
+
+@dataclass(frozen=True)
+class Sample:
+    buildings: list[tuple[int, float, float]]
+    activities: list[tuple[int, str, int]]
+    organization_ids: list[int]
+    # Words of organization names, for the name searches
+    terms: list[str]
+
+    def point(self, rnd: random.Random) -> tuple[float, float]:
+        return rnd.choice(self.buildings)[1:]
+
+    def activity(self, rnd: random.Random, depth: int | None = None) -> tuple[int, str, int]:
+        return rnd.choice([a for a in self.activities if depth is None or a[2] == depth] or self.activities)
+
+
+def _sample_ids(db: Session, column, rnd: random.Random) -> list[int]:
+    top = db.scalar(select(func.max(column))) or 0
+    wanted = rnd.sample(range(1, top + 1), min(SAMPLE_SIZE, top))
+    return sorted(db.scalars(select(column).where(column.in_(wanted))))
+
+
+def load_sample(db: Session, rnd: random.Random) -> Sample:
+    building_ids = _sample_ids(db, Building.id, rnd)
+    buildings = db.execute(
+        select(Building.id, Building.latitude, Building.longitude).where(Building.id.in_(building_ids))
+    ).all()
+    activities = db.execute(select(Activity.id, Activity.name, Activity.stored_depth).order_by(Activity.id)).all()
+    organization_ids = _sample_ids(db, Organization.id, rnd)
+    names = db.scalars(select(Organization.name).where(Organization.id.in_(organization_ids[:100])))
+    terms = sorted({word for name in names for word in name.split() if len(word) >= 3 and not word.isdigit()})
+    if not buildings or not activities or not organization_ids:
+        sys.exit("the database is empty: seed it first (--scale or bin/seed_data.py)")
+    return Sample(
+        [tuple(row) for row in buildings], [tuple(row) for row in activities], organization_ids, terms or ["a"]
+    )
+
+
+Request = dict[str, Any]
+
+
+@dataclass(frozen=True)
+class Case:
+    name: str
+    method: str
+    path: str
+    build: Callable[[Sample, random.Random], Request]
+    write: bool = False
+
+    def url(self, request: Request) -> str:
+        return PREFIX + self.path.format(**request.pop("path", {}))
+
+
+def _buildings(sample: Sample, rnd: random.Random, count: int = 10) -> list[dict[str, Any]]:
+    lat, lon = sample.point(rnd)
+    return [
+        {"address": f"bench {rnd.randrange(10**9)}", "latitude": lat + rnd.uniform(-0.01, 0.01), "longitude": lon}
+        for _ in range(count)
+    ]
+
+
+def _organizations(sample: Sample, rnd: random.Random, count: int = 10) -> list[dict[str, Any]]:
+    return [
+        {
+            "name": f"bench {rnd.choice(sample.terms)} {rnd.randrange(10**9)}",
+            "building_id": rnd.choice(sample.buildings)[0],
+            "phones": ["+7-900-000-00-00"],
+            "activity_ids": [sample.activity(rnd)[0]],
+        }
+        for _ in range(count)
+    ]
+
+
+def _activities(sample: Sample, rnd: random.Random, count: int = 10) -> list[dict[str, Any]]:
+    return [{"name": f"bench {rnd.randrange(10**9)}", "parent_id": sample.activity(rnd, 1)[0]} for _ in range(count)]
+
+
+def _radius(sample: Sample, rnd: random.Random, radius: float = 1000) -> dict[str, float]:
+    lat, lon = sample.point(rnd)
+    return {"center_lat": lat, "center_lon": lon, "radius": radius}
+
+
+def _knn(sample: Sample, rnd: random.Random, k: int = 10) -> dict[str, float]:
+    lat, lon = sample.point(rnd)
+    return {"lat": lat, "lon": lon, "k": k}
+
+
+def _square(sample: Sample, rnd: random.Random, side: float = 0.02) -> dict[str, float]:
+    lat, lon = sample.point(rnd)
+    return {"lat_min": lat - side / 2, "lat_max": lat + side / 2, "lon_min": lon - side / 2, "lon_max": lon + side / 2}
+
+
+def _ndjson(rows: list[dict[str, Any]]) -> Request:
+    return {"content": "\n".join(json.dumps(row, ensure_ascii=False) for row in rows).encode(), "headers": NDJSON}
+
+
+CASES = [
+    Case("search", "GET", "/organizations/search", lambda s, r: {"params": {"activity_name": s.activity(r)[1]}}),
+    Case("filter", "POST", "/organizations/filter", lambda s, r: {"json": {"organization_name": r.choice(s.terms)}}),
+    Case("export", "GET", "/organizations/export", lambda s, r: {"params": {"building_id": r.choice(s.buildings)[0]}}),
+    Case("nearby/radius", "GET", "/organizations/nearby/radius", lambda s, r: {"params": _radius(s, r)}),
+    Case("nearby/knn", "GET", "/organizations/nearby/knn", lambda s, r: {"params": _knn(s, r)}),
+    Case("nearby/square", "GET", "/organizations/nearby/square", lambda s, r: {"params": _square(s, r)}),
+    Case("activities", "GET", "/activities", lambda s, r: {"params": {"limit": 100, "depth": r.choice([1, 2, 3])}}),
+    Case("buildings", "GET", "/buildings", lambda s, r: {"params": {"limit": 100, "offset": r.randrange(1000)}}),
+    Case("system/db-pool", "GET", "/system/db-pool", lambda s, r: {}),
+    Case("system/response-cache", "GET", "/system/response-cache", lambda s, r: {}),
+    Case("activities/create", "POST", "/activities", lambda s, r: {"json": _activities(s, r, 1)[0]}, write=True),
+    Case(
+        "activities/update",
+        "PUT",
+        "/activities/{activity_id}",
+        # Renames a leaf to its own name: the full update path, the data stays as it was
+        lambda s, r: (lambda a: {"path": {"activity_id": a[0]}, "json": {"name": a[1]}})(s.activity(r, 3)),
+        write=True,
+    ),
+    Case("buildings/bulk", "POST", "/buildings/bulk", lambda s, r: {"json": _buildings(s, r)}, write=True),
+    Case("organizations/bulk", "POST", "/organizations/bulk", lambda s, r: {"json": _organizations(s, r)}, write=True),
+    Case("activities/bulk", "POST", "/activities/bulk", lambda s, r: {"json": _activities(s, r)}, write=True),
+    Case("buildings/import", "POST", "/buildings/import", lambda s, r: _ndjson(_buildings(s, r)), write=True),
+    Case(
+        "organizations/import", "POST", "/organizations/import", lambda s, r: _ndjson(_organizations(s, r)), write=True
+    ),
+    Case("activities/import", "POST", "/activities/import", lambda s, r: _ndjson(_activities(s, r)), write=True),
+]
+
+
+class StatementCounter:
+    """SQL statements run by every engine of the process (the socket server runs in this process too)."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self._lock = threading.Lock()
+        event.listen(Engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args: Any) -> None:
+        with self._lock:
+            self.count += 1
+
+
+Send = Callable[[str, str, Request], int]
+
+
+@contextmanager
+def in_process(app) -> Iterator[Send]:
+    with TestClient(app, headers={"Authorization": settings.api_key}) as client:
+        yield lambda method, url, request: client.request(method, url, **request).status_code
+
+
+@contextmanager
+def over_socket(app, concurrency: int) -> Iterator[Send]:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    # Accepted connections inherit it: without it the delayed ACK of small responses adds ~40 ms with plain h11
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.bind(("127.0.0.1", 0))
+    server = uvicorn.Server(uvicorn.Config(app, lifespan="off", log_level="warning", access_log=False))
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    client = httpx.Client(
+        base_url=f"http://127.0.0.1:{sock.getsockname()[1]}",
+        headers={"Authorization": settings.api_key},
+        limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+        timeout=60,
+    )
+    try:
+        with client:
+            yield lambda method, url, request: client.request(method, url, **request).status_code
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+def run_case(
+    send: Send, case: Case, sample: Sample, args: argparse.Namespace, counter: StatementCounter
+) -> dict[str, float]:
+    # Seeded by the case only: both transports and every run send the same requests
+    rnd = random.Random(f"{args.seed}:{case.name}")
+    requests = [case.build(sample, rnd) for _ in range(args.warmup + args.requests)]
+    for request in requests[: args.warmup]:
+        send(case.method, case.url(request), request)
+
+    def timed(request: Request) -> tuple[float, int]:
+        started = time.perf_counter()
+        status = send(case.method, case.url(request), request)
+        return (time.perf_counter() - started) * 1000, status
+
+    statements = counter.count
+    started = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        results = list(pool.map(timed, requests[args.warmup :]))
+    elapsed = time.perf_counter() - started
+    return {
+        **summarize([timing for timing, _ in results]),
+        "rps": len(results) / elapsed,
+        "queries": (counter.count - statements) / len(results),
+        "errors": sum(1 for _, status in results if status >= 400),
+    }
+
+
+def compare(
+    results: dict[str, dict[str, float]], baseline: dict[str, Any], threshold: float, min_delta: float
+) -> list[str]:
+    """Regressions of ``results`` against the baseline's."""
+    regressions = []
+    for key, base in baseline["results"].items():
+        current = results.get(key)
+        if current is None:
+            continue
+        for metric in ("p50", "p95"):
+            if current[metric] > base[metric] * (1 + threshold) and current[metric] - base[metric] > min_delta:
+                regressions.append(f"{key}: {metric} {base[metric]:.2f} -> {current[metric]:.2f} ms")
+        if current["rps"] < base["rps"] * (1 - threshold):
+            regressions.append(f"{key}: throughput {base['rps']:.1f} -> {current['rps']:.1f} req/s")
+        if current["queries"] > base["queries"] + QUERY_TOLERANCE:
+            regressions.append(f"{key}: statements/request {base['queries']:.2f} -> {current['queries']:.2f}")
+        if current["errors"] > base["errors"]:
+            regressions.append(f"{key}: errors {base['errors']} -> {current['errors']}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=0, help="run bin/seed_data.py --scale N first")
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per case and transport")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=1, help="requests in flight at once")
+    parser.add_argument("--transport", choices=("in-process", "socket", "both"), default="both")
+    parser.add_argument("--only", action="append", default=[], help="run the cases whose name contains this")
+    parser.add_argument("--writes", action="store_true", help="also benchmark the write endpoints")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", type=Path, help="write the results as a JSON baseline")
+    parser.add_argument("--compare", type=Path, help="baseline to compare with; exits with 1 on a regression")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative slowdown (0.2 = 20%%)")
+    parser.add_argument("--min-delta", type=float, default=1.0, help="ignore latency changes below this (ms)")
+    args = parser.parse_args()
+
+    if args.scale:
+        subprocess.run(
+            [sys.executable, str(_ROOT / "bin" / "seed_data.py"), "--scale", str(args.scale), "--seed", str(args.seed)],
+            check=True,
+        )
+    with SqlAlchemyConfig.session() as db:
+        sample = load_sample(db, random.Random(args.seed))
+        organizations = db.scalar(select(func.count(Organization.id)))
+
+    from main import app
+
+    counter = StatementCounter()
+    cases = [case for case in CASES if args.writes or not case.write]
+    if args.only:
+        cases = [case for case in cases if any(part in case.name for part in args.only)]
+    transports = ("in-process", "socket") if args.transport == "both" else (args.transport,)
+    results: dict[str, dict[str, float]] = {}
+    print(f"{'case':<34} {'p50':>8} {'p95':>8} {'p99':>8} {'req/s':>8} {'stmts':>6} {'errors':>6}")
+    for transport in transports:
+        connect = in_process(app) if transport == "in-process" else over_socket(app, args.concurrency)
+        with connect as send:
+            for case in cases:
+                key = f"{transport} {case.name}"
+                r = results[key] = run_case(send, case, sample, args, counter)
+                print(
+                    f"{key:<34} {r['p50']:8.2f} {r['p95']:8.2f} {r['p99']:8.2f} {r['rps']:8.1f}"
+                    f" {r['queries']:6.2f} {r['errors']:6d}"
+                )
+
+    # What the numbers depend on besides the code
+    conditions = {
+        "dialect": SqlAlchemyConfig.engine().dialect.name,
+        "organizations": organizations,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "seed": args.seed,
+    }
+    if args.save:
+        created = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        baseline = {"created": created, **conditions, "results": results}
+        args.save.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        print(f"baseline saved to {args.save}")
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        for name, value in conditions.items():
+            if baseline.get(name) != value:
+                print(f"note: the baseline was measured with {name}={baseline.get(name)}, this run with {value}")
+        regressions = compare(results, baseline, args.threshold, args.min_delta)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"no regressions against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+/organizations/filter by name: LIKE '%text%' vs the FULLTEXT ngram index.
+
+MySQL only. Seeds synthetic organizations if asked, then runs the same random name searches in
+both search modes and prints latency percentiles.
+
+    python benchmarks/fulltext_filter.py --seed 1000000 --queries 500
+"""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+_ROOT = Path(__file__).resolve().parents[1]
+if str(_ROOT) not in sys.path:
+    sys.path.insert(0, str(_ROOT))
+
+import argparse
+import random
+
+from dotenv import load_dotenv
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from app.config.db import SqlAlchemyConfig
+from app.crud.building import building_crud
+from app.crud.organization import organization_crud
+from app.model.organization import Organization
+from benchmarks.common import measure
+
+
+load_dotenv()
+
+WORDS = [
+    "Кофейня", "Пекарня", "Автосервис", "Шиномонтаж", "Аптека", "Цветы", "Салон", "Ремонт", "Доставка", "Фитнес",
+    "Маркет", "Студия", "Склад", "Химчистка", "Оптика", "Зоомагазин", "Ателье", "Типография", "Клиника", "Школа",
+]
+SUFFIXES = ["Плюс", "Центр", "Экспресс", "24", "Люкс", "Мастер", "Дом", "Сити", "Профи", "Север"]
+
+
+def seed(db: Session, count: int, rnd: random.Random) -> None:
+    building_id = building_crud.create(db, {"address": "benchmark", "latitude": 0.0, "longitude": 0.0}).id
+    for start in range(0, count, 10000):
+        rows = [
+            {
+                "name": f"{rnd.choice(WORDS)} {rnd.choice(SUFFIXES)} {rnd.randrange(100000)}",
+                "building_id": building_id,
+                "phones": [],
+            }
+            for _ in range(min(10000, count - start))
+        ]
+        db.execute(insert(Organization), rows)
+        db.commit()
+    print(f"seeded {count} organizations")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=0, help="insert that many synthetic organizations first")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    rnd = random.Random(42)
+    with SqlAlchemyConfig.session(expire_on_commit=False) as db:
+        if db.get_bind().dialect.name != "mysql":
+            sys.exit("FULLTEXT search needs MySQL")
+        if args.seed:
+            seed(db, args.seed, rnd)
+        print("organizations:", db.scalar(select(func.count(Organization.id))))
+
+        terms = [(rnd.choice(WORDS + SUFFIXES).lower(),) for _ in range(args.queries)]
+        for mode in ("like", "fulltext"):
+
+            def run(term: tuple) -> int:
+                stmt = organization_crud.filter_stmt(organization_name=term[0], search_mode=mode, options="out")
+                keyset = organization_crud.filter_keyset(term[0], mode)
+                return len(organization_crud.page(db, stmt, limit=args.limit, keyset=keyset).items)
+
+            measure(f"filter/{mode}", terms, run)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Nearby queries: MySQL (spatial index) vs the in-process geo index.
+
+Runs the same random /nearby/radius and /nearby/square lookups through both paths of the
+organization CRUD against the database configured in .env and prints latency percentiles.
+
+    python benchmarks/geo_nearby.py --seed 200000 --queries 2000
+"""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+_ROOT = Path(__file__).resolve().parents[1]
+if str(_ROOT) not in sys.path:
+    sys.path.insert(0, str(_ROOT))
+
+import argparse
+import random
+import time
+
+from dotenv import load_dotenv
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from app.config.db import SqlAlchemyConfig
+from app.crud.geo_index import building_geo_index
+from app.crud.organization import organization_crud
+from app.model.building import Building
+from app.model.organization import Organization
+from benchmarks.common import measure
+
+
+load_dotenv()
+
+# Moscow-sized area the synthetic buildings are spread over
+CENTER = (55.75, 37.62)
+SPREAD = 0.3
+
+
+def seed(db: Session, count: int, rnd: random.Random) -> None:
+    last_id = db.scalar(select(func.max(Building.id))) or 0
+    for start in range(0, count, 5000):
+        rows = [
+            {
+                "address": f"bench {start + i}",
+                "latitude": CENTER[0] + rnd.uniform(-SPREAD, SPREAD),
+                "longitude": CENTER[1] + rnd.uniform(-SPREAD, SPREAD),
+            }
+            for i in range(min(5000, count - start))
+        ]
+        db.execute(insert(Building), rows)
+    # One organization per new building
+    new_buildings = select(Building.address, Building.id, func.json_array()).where(Building.id > last_id)
+    db.execute(insert(Organization).from_select(["name", "building_id", "phones"], new_buildings))
+    db.commit()
+    print(f"seeded {count} buildings and organizations")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=0, help="insert that many synthetic buildings first")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--radius", type=float, default=1000.0, help="radius in meters")
+    parser.add_argument("--square", type=float, default=0.01, help="rectangle side in degrees")
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    rnd = random.Random(42)
+    with SqlAlchemyConfig.session(expire_on_commit=False) as db:
+        if args.seed:
+            seed(db, args.seed, rnd)
+        total = len(db.scalars(select(Building.id)).all())
+
+        building_geo_index._enabled = True
+        started = time.perf_counter()
+        building_geo_index.ensure_fresh(db)
+        print(f"geo index: {total} buildings loaded in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+        points = [
+            (CENTER[0] + rnd.uniform(-SPREAD, SPREAD), CENTER[1] + rnd.uniform(-SPREAD, SPREAD))
+            for _ in range(args.queries)
+        ]
+        radius = [(lat, lon, args.radius) for lat, lon in points]
+        square = [(lat, lat + args.square, lon, lon + args.square) for lat, lon in points]
+
+        for enabled in (False, True):
+            building_geo_index._enabled = enabled
+            label = "geo index" if enabled else "sql"
+            measure(
+                f"radius/{label}",
+                radius,
+                lambda a: len(organization_crud.radius_page(db, *a, limit=args.limit, options="out").items),
+            )
+            measure(
+                f"square/{label}",
+                square,
+                lambda a: len(organization_crud.square_page(db, *a, limit=args.limit, options="out").items),
+            )
+
+
+if __name__ == "__main__":
+    main()
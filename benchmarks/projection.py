@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+List pages as ORM entities vs column projections (``options="out"`` vs ``options="row"``).
+
+Builds the JSON body of one page the way each handler path does: entities go through
+``XOut.model_validate(o.__dict__)`` and FastAPI's response validation, projection rows are validated
+by attribute straight from the result rows.
+
+MySQL only: the schema (the computed ``ST_SRID`` point of buildings) can't be created on SQLite. Needs
+data, e.g. ``python bin/seed_data.py --scale 100000``.
+
+    python benchmarks/projection.py --limit 1000 --queries 200
+"""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+_ROOT = Path(__file__).resolve().parents[1]
+if str(_ROOT) not in sys.path:
+    sys.path.insert(0, str(_ROOT))
+
+import argparse
+import random
+from typing import Callable
+
+from dotenv import load_dotenv
+from pydantic import TypeAdapter
+from sqlalchemy import func, select
+
+from app.config.db import SqlAlchemyConfig
+from app.crud.activity import activity_crud
+from app.crud.building import building_crud
+from app.crud.organization import organization_crud
+from app.schemas.activity import ActivityOut
+from app.schemas.building import BuildingOut
+from app.schemas.organization import OrganizationOut
+from benchmarks.common import measure
+
+
+load_dotenv()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=1000)
+    args = parser.parse_args()
+
+    rnd = random.Random(42)
+    with SqlAlchemyConfig.session(expire_on_commit=False) as db:
+        if db.get_bind().dialect.name != "mysql":
+            sys.exit("the benchmark schema needs MySQL")
+        cases: list[tuple[str, list[tuple], Callable[[tuple], int]]] = []
+        for name, crud, schema in (
+            ("organizations", organization_crud, OrganizationOut),
+            ("buildings", building_crud, BuildingOut),
+            ("activities", activity_crud, ActivityOut),
+        ):
+            total = db.scalar(select(func.count()).select_from(crud.model))
+            print(f"{name}: {total}")
+            if not total:
+                sys.exit("no data, see bin/seed_data.py --scale")
+            adapter = TypeAdapter(list[schema])
+            # Pages after random ids, so both paths read the same spread of rows
+            top = db.scalar(select(func.max(crud.pk)))
+            starts = [(rnd.randrange(max(top - args.limit, 1)),) for _ in range(args.queries)]
+
+            def entities(start: tuple, crud=crud, schema=schema, adapter=adapter) -> int:
+                page = crud.page(db, crud.select_stmt(options="out").where(crud.pk > start[0]), limit=args.limit)
+                items = [schema.model_validate(o.__dict__) for o in page.items]
+                body = adapter.dump_json(adapter.validate_python(items, from_attributes=True))
+                # The request-scoped session is closed after the response
+                db.expunge_all()
+                return len(items) if body else 0
+
+            def rows(start: tuple, crud=crud, adapter=adapter) -> int:
+                page = crud.page(db, crud.select_stmt(options="row").where(crud.pk > start[0]), limit=args.limit)
+                body = adapter.dump_json(adapter.validate_python(page.items, from_attributes=True))
+                return len(page.items) if body else 0
+
+            cases += [(f"{name}/entities", starts, entities), (f"{name}/rows", starts, rows)]
+
+        for name, starts, run in cases:
+            run(starts[0])  # warm up statement caches
+            measure(name, starts, run)
+
+
+if __name__ == "__main__":
+    main()
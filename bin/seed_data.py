@@ -8,13 +8,17 @@ _ROOT = Path(__file__).resolve().parents[1]
 if str(_ROOT) not in sys.path:
     sys.path.insert(0, str(_ROOT))
 
-from typing import Dict, List, Tuple
+import argparse
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
 
+import numpy as np
 from dotenv import load_dotenv
 
 from app.config.db import SqlAlchemyConfig
 
-from sqlalchemy import select
+from sqlalchemy import Connection, Index, func, insert, select, text
 from sqlalchemy.orm import Session
 
 from app.crud.activity import activity_crud
@@ -23,6 +27,7 @@ from app.crud.organization import organization_crud
 from app.model.activity import Activity
 from app.model.building import Building
 from app.model.organization import Organization
+from app.model.organization_activity import OrganizationActivity
 
 
 
@@ -124,12 +129,6 @@ def seed_activities(db: Session) -> Dict[str, int]:
         if act_id:
             return act_id
         data = {"name": name, "parent_id": parent_id}
-        if parent_id is None:
-            obj = Activity(name=name, parent_id=None)
-            db.add(obj)
-            db.flush()
-            db.refresh(obj)
-            return obj.id
         obj = activity_crud.create(db, data)
         return obj.id
 
@@ -247,10 +246,213 @@ def seed_organizations(db: Session, addr_to_id: Dict[str, int], name_to_act_id:
             organization_crud.set_activities(db, org.id, act_ids)
 
 
+# --scale: cities the synthetic buildings cluster around: name, latitude, longitude, share of buildings, spread (degrees)
+CITIES: List[Tuple[str, float, float, float, float]] = [
+    ("Москва", 55.7558, 37.6176, 0.30, 0.20),
+    ("Санкт-Петербург", 59.9343, 30.3351, 0.16, 0.15),
+    ("Новосибирск", 55.0302, 82.9204, 0.08, 0.10),
+    ("Екатеринбург", 56.8380, 60.6050, 0.08, 0.10),
+    ("Казань", 55.7961, 49.1064, 0.07, 0.08),
+    ("Нижний Новгород", 56.3269, 44.0059, 0.07, 0.08),
+    ("Краснодар", 45.0355, 38.9753, 0.06, 0.07),
+    ("Самара", 53.1959, 50.1002, 0.06, 0.07),
+    ("Владивосток", 43.1155, 131.8855, 0.04, 0.05),
+    ("Калининград", 54.7104, 20.4522, 0.04, 0.05),
+    ("Мурманск", 68.9585, 33.0827, 0.02, 0.04),
+    ("Якутск", 62.0355, 129.6755, 0.02, 0.04),
+]
+# Neighbourhoods per city and their radius (degrees): buildings gather around them, as in real cities
+DISTRICTS = 40
+DISTRICT_SPREAD = 0.01
+STREETS = ["Ленина", "Мира", "Советская", "Гагарина", "Садовая", "Лесная", "Школьная", "Победы", "Новая", "Заречная"]
+ROOT_ACTIVITIES = [
+    "Еда", "Автомобили", "Услуги", "Спорт", "Медицина", "Образование",
+    "Строительство", "Одежда", "Электроника", "Туризм", "Финансы", "Культура",
+]
+NAME_PREFIXES = ["Эко", "Мега", "Гранд", "Сити", "Топ", "Лидер", "Профи", "Смарт", "Альфа", "Народный"]
+NAME_SUFFIXES = ["Маркет", "Сервис", "Строй", "Авто", "Мед", "Групп", "Торг", "Трейд", "Лайн", "Центр"]
+# Activities per organization and their probabilities
+LINK_COUNTS = np.array([0, 1, 2, 3])
+LINK_COUNT_P = np.array([0.05, 0.55, 0.3, 0.1])
+# Rows generated (and inserted) per transaction; part of the dataset definition, like --seed
+SCALE_CHUNK = 10_000
+
+
+def _rng(seed: int, *stream: int) -> np.random.Generator:
+    # One independent stream per table and chunk: the data doesn't depend on the order it's generated in
+    return np.random.default_rng([seed, *stream])
+
+
+def _zipf_cdf(size: int, exponent: float, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    """Shuffled items and the CDF of a Zipf-like popularity over them: a few items get most of the picks."""
+    weights = 1.0 / np.arange(1, size + 1) ** exponent
+    return rng.permutation(size), np.cumsum(weights / weights.sum())
+
+
+def _pick(items: np.ndarray, cdf: np.ndarray, rng: np.random.Generator, size: int) -> np.ndarray:
+    return items[np.minimum(np.searchsorted(cdf, rng.random(size)), len(items) - 1)]
+
+
+def _root_name(i: int) -> str:
+    name = ROOT_ACTIVITIES[i % len(ROOT_ACTIVITIES)]
+    return name if i < len(ROOT_ACTIVITIES) else f"{name} {i // len(ROOT_ACTIVITIES) + 1}"
+
+
+def _phone(number: int) -> str:
+    return f"+7-9{number // 10**7:02d}-{number // 10**4 % 1000:03d}-{number % 10**4:04d}"
+
+
+def _next_id(db: Session, column) -> int:
+    return (db.scalar(select(func.max(column))) or 0) + 1
+
+
+@contextmanager
+def _indexes_dropped(conn: Connection, tables: List) -> Iterator[None]:
+    """Drop the secondary indexes of ``tables`` for the load and build each of them once afterwards."""
+    indexes: List[Index] = [index for table in tables for index in sorted(table.indexes, key=lambda i: i.name)]
+    for index in indexes:
+        index.drop(conn, checkfirst=True)
+    conn.commit()
+    try:
+        yield
+    finally:
+        for index in indexes:
+            started = time.perf_counter()
+            index.create(conn, checkfirst=True)
+            conn.commit()
+            print(f"  index {index.name} rebuilt in {time.perf_counter() - started:.1f} s")
+
+
+def scale_activities(db: Session, roots: int, fanout: int) -> np.ndarray:
+    """Full depth-3 tree: ``roots`` roots with ``fanout`` children each, every child with ``fanout`` children."""
+    level = [{"name": _root_name(i), "parent_id": None} for i in range(roots)]
+    all_ids: List[int] = []
+    for depth in range(3):
+        ids = activity_crud.bulk_create(db, level)
+        all_ids.extend(ids)
+        if depth < 2:
+            level = [
+                {"name": f"{row['name']}.{j + 1}" if depth else f"{row['name']} {j + 1}", "parent_id": parent_id}
+                for row, parent_id in zip(level, ids)
+                for j in range(fanout)
+            ]
+    db.commit()
+    return np.array(all_ids, np.int64)
+
+
+def scale_buildings(db: Session, count: int, seed: int) -> np.ndarray:
+    """``count`` buildings around the districts of ``CITIES``; returns their ids."""
+    rng = _rng(seed, 0)
+    shares = np.array([city[3] for city in CITIES])
+    districts = np.stack([rng.normal([lat, lon], spread, size=(DISTRICTS, 2)) for _, lat, lon, _, spread in CITIES])
+    first_id = _next_id(db, Building.id)
+    for start in range(0, count, SCALE_CHUNK):
+        size = min(SCALE_CHUNK, count - start)
+        rng = _rng(seed, 0, start // SCALE_CHUNK)
+        cities = rng.choice(len(CITIES), size=size, p=shares / shares.sum())
+        points = districts[cities, rng.integers(0, DISTRICTS, size)] + rng.normal(0, DISTRICT_SPREAD, size=(size, 2))
+        lats, lons = np.clip(points[:, 0], -90, 90), (points[:, 1] + 180) % 360 - 180
+        streets, houses = rng.integers(0, len(STREETS), size), rng.integers(1, 200, size)
+        rows = [
+            {
+                "id": first_id + start + i,
+                "address": f"г. {CITIES[cities[i]][0]}, ул. {STREETS[streets[i]]} {houses[i]}, стр. {start + i + 1}",
+                "latitude": float(lats[i]),
+                "longitude": float(lons[i]),
+            }
+            for i in range(size)
+        ]
+        db.execute(insert(Building.__table__), rows)
+        db.commit()
+    print(f"  {count} buildings")
+    return np.arange(first_id, first_id + count, dtype=np.int64)
+
+
+def scale_organizations(db: Session, count: int, building_ids: np.ndarray, activity_ids: np.ndarray, seed: int) -> int:
+    """
+    ``count`` organizations with 0-3 activities each. Both buildings and activities follow a Zipf-like
+    popularity (malls host many organizations, a few activities are very common); returns the link count.
+    """
+    buildings = _zipf_cdf(len(building_ids), 0.6, _rng(seed, 1))
+    activities = _zipf_cdf(len(activity_ids), 1.1, _rng(seed, 2))
+    first_id = _next_id(db, Organization.id)
+    links = 0
+    for start in range(0, count, SCALE_CHUNK):
+        size = min(SCALE_CHUNK, count - start)
+        rng = _rng(seed, 3, start // SCALE_CHUNK)
+        ids = np.arange(first_id + start, first_id + start + size, dtype=np.int64)
+        org_buildings = building_ids[_pick(*buildings, rng, size)]
+        prefixes, suffixes = rng.integers(0, len(NAME_PREFIXES), size), rng.integers(0, len(NAME_SUFFIXES), size)
+        phone_counts = rng.integers(0, 4, size)
+        phones = rng.integers(0, 10**9, phone_counts.sum())
+        phone_ends = np.cumsum(phone_counts)
+        rows = [
+            {
+                "id": int(ids[i]),
+                "name": f"{NAME_PREFIXES[prefixes[i]]}{NAME_SUFFIXES[suffixes[i]]} {ids[i]}",
+                "building_id": int(org_buildings[i]),
+                "phones": [_phone(p) for p in phones[phone_ends[i] - phone_counts[i] : phone_ends[i]]],
+            }
+            for i in range(size)
+        ]
+        db.execute(insert(Organization.__table__), rows)
+
+        link_counts = rng.choice(LINK_COUNTS, size=size, p=LINK_COUNT_P)
+        pairs = np.stack([np.repeat(ids, link_counts), activity_ids[_pick(*activities, rng, int(link_counts.sum()))]], 1)
+        pairs = np.unique(pairs, axis=0)
+        if len(pairs):
+            db.execute(
+                insert(OrganizationActivity.__table__),
+                [{"organization_id": int(org_id), "activity_id": int(activity_id)} for org_id, activity_id in pairs],
+            )
+        links += len(pairs)
+        db.commit()
+        if (start // SCALE_CHUNK) % 50 == 49:
+            print(f"  {start + size}/{count} organizations")
+    print(f"  {count} organizations, {links} activity links")
+    return links
+
+
+def seed_scale(args: argparse.Namespace) -> None:
+    engine = SqlAlchemyConfig.engine()
+    started = time.perf_counter()
+    buildings = args.buildings if args.buildings is not None else max(args.scale // 10, 1)
+    with engine.connect() as conn:
+        if engine.dialect.name == "mysql":
+            # Checked by construction: keys are generated here, foreign keys point at rows inserted before
+            conn.execute(text("SET SESSION unique_checks = 0, foreign_key_checks = 0"))
+        with Session(bind=conn, autoflush=False, expire_on_commit=False) as db:
+            activity_ids = scale_activities(db, args.roots, args.fanout)
+            print(f"  {len(activity_ids)} activities")
+            with _indexes_dropped(conn, [Building.__table__, Organization.__table__]):
+                building_ids = scale_buildings(db, buildings, args.seed)
+                scale_organizations(db, args.scale, building_ids, activity_ids, args.seed)
+            # Process-local indexes and caches of running workers pick the new rows up
+            building_crud.bump_version(db)
+            organization_crud.bump_version(db)
+            db.commit()
+    print(f"Scale seed complete in {time.perf_counter() - started:.0f} s")
+
+
 def main() -> int:
+    parser = argparse.ArgumentParser(description="Seed the database configured in .env")
+    parser.add_argument(
+        "--scale",
+        type=int,
+        help="generate that many synthetic organizations (bulk load, for load testing) instead of the demo data",
+    )
+    parser.add_argument("--buildings", type=int, help="synthetic buildings (default: scale / 10)")
+    parser.add_argument("--roots", type=int, default=len(ROOT_ACTIVITIES), help="root activities of the synthetic tree")
+    parser.add_argument("--fanout", type=int, default=8, help="children of each non-leaf synthetic activity")
+    parser.add_argument("--seed", type=int, default=42, help="random seed: the same arguments give the same data")
+    args = parser.parse_args()
+
     from app.model.base import Base
 
     Base.metadata.create_all(SqlAlchemyConfig.engine())
+    if args.scale:
+        seed_scale(args)
+        return 0
     with SqlAlchemyConfig.session() as db:
         addr_to_id = seed_buildings(db)
         name_to_act_id = seed_activities(db)
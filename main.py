@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
+
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -9,12 +11,22 @@ from fastapi.responses import JSONResponse  # noqa: E402
 from fastapi.middleware.cors import CORSMiddleware  # noqa: E402
 import uvicorn  # noqa: E402
 
-from app.api.v1 import api_v1_router  # noqa: E402
+from app.api.instrumentation import SERVER_TIMING_HEADER, SqlTimingMiddleware  # noqa: E402
+from app.api.metrics import MetricsMiddleware, mark_process_dead, metrics_response  # noqa: E402
+from app.api.pagination import NEXT_CURSOR_HEADER  # noqa: E402
+from app.api.replica_routing import PRIMARY_HEADER, ReplicaRoutingMiddleware  # noqa: E402
+from app.api.v1 import api_v1_async_router, api_v1_router  # noqa: E402
 from app.config.settings import settings  # noqa: E402
 from app.crud.base import ValidationError  # noqa: E402
 
 
-app = FastAPI(title="Secunda API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    mark_process_dead()
+
+
+app = FastAPI(title="Secunda API", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -22,9 +34,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", SERVER_TIMING_HEADER, PRIMARY_HEADER],
 )
 
-app.include_router(api_v1_router, prefix="/api/v1")
+if settings.db_replicas:
+    app.add_middleware(ReplicaRoutingMiddleware, pin_seconds=settings.db_replica_pin_seconds)
+
+if settings.sql_instrumentation_enabled:
+    app.add_middleware(SqlTimingMiddleware)
+
+if settings.metrics_enabled:
+    # Outermost, so the latency includes the other middleware
+    app.add_middleware(MetricsMiddleware, pool_interval=settings.metrics_pool_interval)
+    app.add_route("/metrics", metrics_response, include_in_schema=False)
+
+app.include_router(api_v1_async_router if settings.db_async else api_v1_router, prefix="/api/v1")
 
 
 # Global exception handlers
@@ -21,11 +21,13 @@ load_dotenv()
 
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import event
 from sqlalchemy.engine import Engine, URL
 from sqlalchemy.orm import Session
 from sqlalchemy_utils import create_database, database_exists, drop_database
 from app.api.deps import get_db
 from app.config.db import SqlAlchemyConfig
+from app.config.settings import settings
 from app.model.base import Base
 from main import app
 from app.security.api_key import require_api_key
@@ -74,13 +76,14 @@ def test_settings_env() -> Generator[None, None, None]:
     # Swap environment to point SqlAlchemyConfig at the test database
     prev_db = os.environ.get("SqlAlchemyDatabase")
     os.environ["SqlAlchemyDatabase"] = test_db
+    SqlAlchemyConfig.reset()
 
     try:
         yield
     finally:
         # Dispose any pooled connections to allow DROP DATABASE
         try:
-            SqlAlchemyConfig.engine().dispose()
+            SqlAlchemyConfig.reset()
         except Exception:
             pass
         # Drop the test database
@@ -142,6 +145,28 @@ def db_session(db_schema: None) -> Generator[Session, None, None]:
             session.commit()
 
 
+@pytest.fixture()
+def statements(db_session: Session) -> Generator[list[str], None, None]:
+    # SQL statements sent through the test session's engine while the test runs
+    captured: list[str] = []
+
+    def _capture(conn, cursor, statement, *args):
+        captured.append(statement)
+
+    bind = db_session.get_bind()
+    event.listen(bind, "before_cursor_execute", _capture)
+    try:
+        yield captured
+    finally:
+        event.remove(bind, "before_cursor_execute", _capture)
+
+
+@pytest.fixture(autouse=True)
+def strict_query_budgets(monkeypatch):
+    # Endpoints going over their @query_budget fail the test instead of logging a warning
+    monkeypatch.setattr(settings, "sql_budget_strict", True)
+
+
 @pytest.fixture()
 def client(db_session: Session) -> Generator[TestClient, None, None]:
     # Ensure app uses the same Session as seeding, so data is visible in requests
@@ -21,6 +21,15 @@ def test_create_update_list_activity(client: TestClient):
     assert any(x["id"] == a["id"] for x in r.json())
 
 
+def test_update_parent_to_null_detaches(client: TestClient):
+    parent = client.post("/api/v1/activities", json={"name": "Detach parent", "parent_id": None}).json()
+    child = client.post("/api/v1/activities", json={"name": "Detach child", "parent_id": parent["id"]}).json()
+
+    r = client.put(f"/api/v1/activities/{child['id']}", json={"parent_id": None})
+    assert r.status_code == 200
+    assert r.json()["parent_id"] is None
+
+
 def test_activity_nesting_depth_enforced(client: TestClient):
     headers = {"X-API-Key": "test-key"}
 
@@ -42,3 +51,16 @@ def test_activity_nesting_depth_enforced(client: TestClient):
     # Level 4 should fail with 400 (exceeds MAX_DEPTH)
     r = client.post("/api/v1/activities", json={"name": "L4", "parent_id": l3}, headers=headers)
     assert r.status_code == 400
+
+
+def test_list_activities_by_depth(client: TestClient):
+    headers = {"X-API-Key": "test-key"}
+    r = client.post("/api/v1/activities", json={"name": "Depth root", "parent_id": None}, headers=headers)
+    root = r.json()["id"]
+    r = client.post("/api/v1/activities", json={"name": "Depth child", "parent_id": root}, headers=headers)
+    child = r.json()["id"]
+
+    r = client.get("/api/v1/activities", params={"depth": 2, "limit": 1000}, headers=headers)
+    assert r.status_code == 200
+    ids = {x["id"] for x in r.json()}
+    assert child in ids and root not in ids
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+import json
+from dataclasses import replace
+from pathlib import Path
+from typing import Any, AsyncIterator, Generator
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.api.cache import CACHE_HEADER, response_cache
+from app.api.deps import get_async_db
+from app.api.stacks import async_stack, sync_stack
+from app.api.v1 import api_v1_async_router, api_v1_router
+from app.crud.activity import async_activity_crud
+from app.crud.activity_tree import activity_tree_index
+from app.crud.base import ValidationError
+from app.crud.building import async_building_crud
+from app.crud.organization import async_organization_crud
+from app.model.base import Base
+from app.security.api_key import require_api_key
+from main import validation_error_handler
+
+
+async def _seed(session_maker: async_sessionmaker) -> None:
+    async with session_maker() as db:
+        center = await async_building_crud.create(db, {"address": "Center", "latitude": 55.7558, "longitude": 37.6176})
+        far = await async_building_crud.create(db, {"address": "Far", "latitude": 56.8380, "longitude": 60.6050})
+
+        food = await async_activity_crud.create(db, {"name": "Food", "parent_id": None})
+        meat = await async_activity_crud.create(db, {"name": "Meat", "parent_id": food.id})
+
+        market = await async_organization_crud.create(db, {"name": "Food Market", "building_id": center.id, "phones": ["1"]})
+        butcher = await async_organization_crud.create(db, {"name": "Butcher", "building_id": center.id, "phones": []})
+        await async_organization_crud.create(db, {"name": "Far Away", "building_id": far.id, "phones": ["3"]})
+
+        await async_organization_crud.set_activities(db, market.id, [food.id])
+        await async_organization_crud.set_activities(db, butcher.id, [meat.id])
+        await db.commit()
+
+
+@pytest.fixture()
+def async_client(tmp_path: Path) -> Generator[TestClient, None, None]:
+    # aiosqlite stands in for the async MySQL driver
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'async.db'}", poolclass=NullPool)
+    session_maker = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+    async def _prepare() -> None:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        await _seed(session_maker)
+
+    asyncio.run(_prepare())
+
+    async def _override_get_async_db() -> AsyncIterator[AsyncSession]:
+        async with session_maker() as db:
+            try:
+                yield db
+            except Exception:
+                await db.rollback()
+                raise
+            else:
+                await db.commit()
+
+    app = FastAPI()
+    app.include_router(api_v1_async_router, prefix="/api/v1")
+    app.add_exception_handler(ValidationError, validation_error_handler)
+    app.dependency_overrides[get_async_db] = _override_get_async_db
+    app.dependency_overrides[require_api_key] = lambda: None
+
+    # The process-wide tree index must not mix this database with the main test database
+    activity_tree_index.invalidate()
+    with TestClient(app) as c:
+        yield c
+    activity_tree_index.invalidate()
+
+
+def test_async_search_by_activity_name(async_client: TestClient):
+    r = async_client.get("/api/v1/organizations/search", params={"activity_name": "food"})
+    assert r.status_code == 200
+    assert {x["name"] for x in r.json()} == {"Food Market", "Butcher"}
+
+
+def test_async_filter_endpoint(async_client: TestClient):
+    r = async_client.post("/api/v1/organizations/filter", json={"organization_name": "far"})
+    assert r.status_code == 200
+    assert [x["name"] for x in r.json()] == ["Far Away"]
+
+
+def test_async_nearby_square(async_client: TestClient):
+    r = async_client.get(
+        "/api/v1/organizations/nearby/square",
+        params={"lat_min": 55.75, "lat_max": 55.76, "lon_min": 37.61, "lon_max": 37.62},
+    )
+    assert r.status_code == 200
+    assert {x["name"] for x in r.json()} == {"Food Market", "Butcher"}
+
+
+def test_async_activity_depth_enforced(async_client: TestClient):
+    r = async_client.get("/api/v1/activities")
+    assert r.status_code == 200
+    meat = next(x for x in r.json() if x["name"] == "Meat")
+
+    r = async_client.post("/api/v1/activities", json={"name": "Beef", "parent_id": meat["id"]})
+    assert r.status_code == 200
+
+    r = async_client.post("/api/v1/activities", json={"name": "Steak", "parent_id": r.json()["id"]})
+    assert r.status_code == 400
+
+
+def test_async_list_buildings(async_client: TestClient):
+    r = async_client.get("/api/v1/buildings", params={"limit": 1})
+    assert r.status_code == 200
+    assert len(r.json()) == 1
+
+
+def test_async_batch(async_client: TestClient):
+    names = {o["id"]: o["name"] for o in async_client.post("/api/v1/organizations/filter", json={}).json()}
+    ids = sorted(names, reverse=True)
+
+    r = async_client.get("/api/v1/organizations/batch", params={"ids": ",".join(map(str, [*ids, 999999]))})
+    assert r.status_code == 200
+    assert [o["name"] for o in r.json()["items"]] == [names[i] for i in ids]
+    assert r.json()["missing"] == [999999]
+
+    r = async_client.post("/api/v1/buildings/batch", json={"ids": [999999, 1]})
+    assert r.json()["missing"] == [999999] and [b["id"] for b in r.json()["items"]] == [1]
+
+
+def test_async_response_cache_invalidated_by_write(async_client: TestClient, monkeypatch):
+    monkeypatch.setattr(response_cache, "_enabled", True)
+    monkeypatch.setattr(response_cache, "_check_interval", 60.0)
+    response_cache.clear()
+    try:
+        assert async_client.get("/api/v1/activities").headers[CACHE_HEADER] == "MISS"
+        assert async_client.get("/api/v1/activities").headers[CACHE_HEADER] == "HIT"
+
+        assert async_client.post("/api/v1/activities", json={"name": "Bread", "parent_id": None}).status_code == 200
+
+        r = async_client.get("/api/v1/activities")
+        assert r.headers[CACHE_HEADER] == "MISS"
+        assert "Bread" in {x["name"] for x in r.json()}
+    finally:
+        response_cache.clear()
+
+
+def test_async_bulk_organizations(async_client: TestClient):
+    buildings = async_client.post(
+        "/api/v1/buildings/bulk",
+        json=[{"address": f"Bulk {i}", "latitude": 1.0, "longitude": 2.0} for i in range(3)],
+    ).json()["ids"]
+    activities = async_client.post("/api/v1/activities/bulk", json=[{"name": "Bulk async"}]).json()["ids"]
+
+    payload = [{"name": f"Bulk org {i}", "building_id": b, "activity_ids": activities} for i, b in enumerate(buildings)]
+    r = async_client.post("/api/v1/organizations/bulk", json=payload)
+    assert r.status_code == 200
+    ids = r.json()["ids"]
+
+    r = async_client.get("/api/v1/organizations/search", params={"activity_name": "Bulk async"})
+    assert {x["id"]: x["name"] for x in r.json()} == {id_: f"Bulk org {i}" for i, id_ in enumerate(ids)}
+
+
+def test_async_export_ndjson(async_client: TestClient):
+    r = async_client.get("/api/v1/organizations/export", params={"activity_name": "Food", "with_activities": True})
+    assert r.status_code == 200
+    rows = [json.loads(line) for line in r.text.splitlines()]
+    assert [(row["name"], len(row["activity_ids"])) for row in rows] == [("Food Market", 1)]
+
+    r = async_client.get("/api/v1/organizations/export", params={"with_building": True})
+    rows = [json.loads(line) for line in r.text.splitlines()]
+    assert [row["name"] for row in rows] == ["Food Market", "Butcher", "Far Away"]
+    assert rows[2]["latitude"] == 56.8380
+
+
+def test_async_import_activities(async_client: TestClient):
+    body = b'{"name": "Import async 1"}\n{"name": ""}\n{"name": "Import async 2"}\n'
+    r = async_client.post(
+        "/api/v1/activities/import", content=body, headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert r.status_code == 200
+    report = r.json()
+    assert (report["written"], report["failed"], len(report["batches"])) == (2, 1, 1)
+
+    names = {x["name"] for x in async_client.get("/api/v1/activities", params={"limit": 1000}).json()}
+    assert {"Import async 1", "Import async 2"} <= names
+
+
+
+def test_async_router_mirrors_sync_router():
+    def schema(router) -> dict[str, Any]:
+        app = FastAPI()
+        app.include_router(router, prefix="/api/v1")
+        return app.openapi()["paths"]
+
+    # One handler layer: the same operations, parameters and bodies on both stacks
+    assert schema(api_v1_async_router) == schema(api_v1_router)
+
+
+def test_stack_endpoints():
+    def handler(x: int, db: Any = None):
+        doubled = yield stack.building.count(db, x)
+        return doubled + 1
+
+    class Building:
+        def count(self, db, x):
+            return x * 2
+
+    class AsyncBuilding:
+        async def count(self, db, x):
+            return x * 2
+
+    stack = replace(sync_stack, building=Building())
+    endpoint = stack.endpoint(handler)
+    assert not inspect.iscoroutinefunction(endpoint) and not inspect.isgeneratorfunction(inspect.unwrap(endpoint))
+    assert endpoint(x=3) == 7
+    assert list(inspect.signature(endpoint).parameters) == ["x", "db"]
+
+    stack = replace(async_stack, building=AsyncBuilding())
+    endpoint = stack.endpoint(handler)
+    assert inspect.iscoroutinefunction(endpoint)
+    assert asyncio.run(endpoint(x=3)) == 7
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.config.settings import settings
+from app.crud.organization import organization_crud
+from tests.factories import create_building, create_org
+
+
+MISSING = 999999
+
+
+@pytest.fixture()
+def batch_orgs(db_session: Session) -> list[int]:
+    building = create_building(db_session, "Batch", 10.0, 10.0)
+    orgs = [create_org(db_session, f"Batch org {i}", building.id, phones=[str(i)]) for i in range(3)]
+    db_session.commit()
+    return [o.id for o in orgs]
+
+
+def test_get_batch_keeps_input_order(client: TestClient, batch_orgs: list[int]):
+    first, second, third = batch_orgs
+    r = client.get("/api/v1/organizations/batch", params={"ids": f"{third},{MISSING},{first},{third}"})
+    assert r.status_code == 200
+    body = r.json()
+    assert [o["id"] for o in body["items"]] == [third, first]
+    assert (body["items"][0]["name"], body["items"][0]["phones"]) == ("Batch org 2", ["2"])
+    assert body["missing"] == [MISSING]
+
+    # Repeated parameters work as well
+    r = client.get("/api/v1/organizations/batch", params=[("ids", second), ("ids", first)])
+    assert [o["id"] for o in r.json()["items"]] == [second, first]
+
+
+def test_post_batch(client: TestClient, batch_orgs: list[int]):
+    r = client.post("/api/v1/organizations/batch", json={"ids": [MISSING, *reversed(batch_orgs)]})
+    assert r.status_code == 200
+    assert [o["id"] for o in r.json()["items"]] == batch_orgs[::-1]
+    assert r.json()["missing"] == [MISSING]
+
+
+def test_buildings_batch(client: TestClient, batch_orgs: list[int], db_session: Session):
+    building_id = organization_crud.get(db_session, batch_orgs[0]).building_id
+    r = client.get("/api/v1/buildings/batch", params={"ids": f"{MISSING},{building_id}"})
+    assert r.status_code == 200
+    assert r.json() == {
+        "items": [{"id": building_id, "address": "Batch", "latitude": 10.0, "longitude": 10.0}],
+        "missing": [MISSING],
+    }
+    assert client.post("/api/v1/buildings/batch", json={"ids": [building_id]}).json()["items"][0]["id"] == building_id
+
+
+@pytest.mark.parametrize("ids", ["", "1,x", ",".join(map(str, range(1, settings.batch_max_ids + 2)))])
+def test_get_batch_rejects_bad_id_lists(client: TestClient, ids: str):
+    assert client.get("/api/v1/organizations/batch", params={"ids": ids}).status_code == 422
+
+
+def test_post_batch_is_capped(client: TestClient):
+    too_many = list(range(1, settings.batch_max_ids + 2))
+    assert client.post("/api/v1/buildings/batch", json={"ids": too_many}).status_code == 422
+    assert client.post("/api/v1/buildings/batch", json={"ids": []}).status_code == 422
+
+
+def test_get_many_is_one_query(db_session: Session, batch_orgs: list[int], statements: list[str]):
+    items, missing = organization_crud.get_many(db_session, [batch_orgs[1], MISSING, batch_orgs[0]])
+    assert [o.id for o in items] == [batch_orgs[1], batch_orgs[0]]
+    assert missing == [MISSING]
+    assert len(statements) == 1 and " IN " in statements[0]
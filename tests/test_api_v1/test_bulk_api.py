@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.crud.activity import activity_crud
+from app.model.activity import Activity
+from app.model.building import Building
+from app.model.organization import Organization
+from app.model.organization_activity import OrganizationActivity
+from tests.factories import create_activity, create_building
+
+
+HEADERS = {"X-API-Key": "test-key"}
+
+
+def test_bulk_buildings_create_and_replace(client: TestClient, db_session: Session):
+    existing = create_building(db_session, "Bulk old", 1.0, 1.0)
+
+    payload = [
+        {"address": "Bulk A", "latitude": 10.0, "longitude": 20.0},
+        {"id": existing.id, "address": "Bulk replaced", "latitude": 11.0, "longitude": 21.0},
+        {"address": "Bulk B", "latitude": 12.0, "longitude": 22.0},
+    ]
+    r = client.post("/api/v1/buildings/bulk", json=payload, headers=HEADERS)
+    assert r.status_code == 200
+    ids = r.json()["ids"]
+    assert ids[1] == existing.id
+    assert len(set(ids)) == 3
+
+    rows = db_session.execute(select(Building.id, Building.address, Building.latitude).where(Building.id.in_(ids)))
+    by_id = {id_: (address, lat) for id_, address, lat in rows}
+    assert [by_id[id_] for id_ in ids] == [("Bulk A", 10.0), ("Bulk replaced", 11.0), ("Bulk B", 12.0)]
+
+
+def test_bulk_activities_checks_depth_per_batch(client: TestClient, db_session: Session):
+    root = create_activity(db_session, "Bulk root")
+    child = create_activity(db_session, "Bulk child", root.id)
+    grandchild = create_activity(db_session, "Bulk grandchild", child.id)
+
+    payload = [
+        {"name": "Bulk new 1", "parent_id": root.id},
+        {"name": "Bulk new 2", "parent_id": child.id},
+        {"name": "Bulk new 3", "parent_id": None},
+    ]
+    r = client.post("/api/v1/activities/bulk", json=payload, headers=HEADERS)
+    assert r.status_code == 200
+    ids = r.json()["ids"]
+    depths = dict(db_session.execute(select(Activity.id, Activity.stored_depth).where(Activity.id.in_(ids))).all())
+    assert [depths[id_] for id_ in ids] == [2, 3, 1]
+
+    # The new activities are part of the tree the search walks
+    r = client.get("/api/v1/organizations/search", params={"activity_name": "Bulk root"}, headers=HEADERS)
+    assert r.status_code == 200
+
+    r = client.post("/api/v1/activities/bulk", json=[{"name": "Too deep", "parent_id": grandchild.id}], headers=HEADERS)
+    assert r.status_code == 400
+    r = client.post("/api/v1/activities/bulk", json=[{"name": "Orphan", "parent_id": 10**9}], headers=HEADERS)
+    assert r.status_code == 400
+
+
+def test_bulk_activities_tree_in_one_batch(client: TestClient, db_session: Session):
+    base = db_session.scalar(select(func.max(Activity.id))) + 1000
+    payload = [
+        {"id": base, "name": "Bulk tree root", "parent_id": None},
+        {"id": base + 1, "name": "Bulk tree child", "parent_id": base},
+        {"name": "Bulk tree leaf", "parent_id": base + 1},
+    ]
+    r = client.post("/api/v1/activities/bulk", json=payload, headers=HEADERS)
+    assert r.status_code == 200
+    ids = r.json()["ids"]
+    assert ids[:2] == [base, base + 1]
+    assert activity_crud.ancestor_ids(db_session, ids[2]) == [base + 1, base]
+    depths = dict(db_session.execute(select(Activity.id, Activity.stored_depth).where(Activity.id.in_(ids))).all())
+    assert [depths[id_] for id_ in ids] == [1, 2, 3]
+
+    # Children before their parent are rejected
+    payload = [{"name": "Bulk early", "parent_id": base + 500}, {"id": base + 500, "name": "Bulk late"}]
+    assert client.post("/api/v1/activities/bulk", json=payload, headers=HEADERS).status_code == 400
+
+
+def test_bulk_activities_statement_count_does_not_grow(client: TestClient, db_session: Session, statements: list[str]):
+    root = create_activity(db_session, "Bulk count root")
+
+    def run(size: int) -> int:
+        statements.clear()
+        payload = [{"name": f"Bulk count {size}.{i}", "parent_id": root.id} for i in range(size)]
+        assert client.post("/api/v1/activities/bulk", json=payload, headers=HEADERS).status_code == 200
+        return len(statements)
+
+    assert run(50) == run(2)
+
+
+def test_bulk_organizations_with_activity_links(client: TestClient, db_session: Session):
+    building = create_building(db_session, "Bulk org building", 1.0, 1.0)
+    first = create_activity(db_session, "Bulk link 1")
+    second = create_activity(db_session, "Bulk link 2")
+
+    payload = [
+        {"name": "Bulk org A", "building_id": building.id, "phones": ["1"], "activity_ids": [first.id, second.id]},
+        {"name": "Bulk org B", "building_id": building.id, "activity_ids": []},
+    ]
+    r = client.post("/api/v1/organizations/bulk", json=payload, headers=HEADERS)
+    assert r.status_code == 200
+    a, b = r.json()["ids"]
+
+    def links(org_id: int) -> set[int]:
+        stmt = select(OrganizationActivity.activity_id).where(OrganizationActivity.organization_id == org_id)
+        return set(db_session.scalars(stmt))
+
+    assert links(a) == {first.id, second.id}
+    assert links(b) == set()
+
+    # Replacing an organization replaces its links
+    payload = [{"id": a, "name": "Bulk org A2", "building_id": building.id, "activity_ids": [second.id]}]
+    r = client.post("/api/v1/organizations/bulk", json=payload, headers=HEADERS)
+    assert r.json()["ids"] == [a]
+    assert links(a) == {second.id}
+    assert db_session.scalar(select(Organization.name).where(Organization.id == a)) == "Bulk org A2"
+
+
+def test_bulk_organizations_unknown_references(client: TestClient, db_session: Session):
+    building = create_building(db_session, "Bulk refs", 1.0, 1.0)
+
+    r = client.post("/api/v1/organizations/bulk", json=[{"name": "X", "building_id": 10**9}], headers=HEADERS)
+    assert r.status_code == 400
+    assert str(10**9) in r.json()["detail"]
+
+    payload = [{"name": "X", "building_id": building.id, "activity_ids": [10**9]}]
+    r = client.post("/api/v1/organizations/bulk", json=payload, headers=HEADERS)
+    assert r.status_code == 400
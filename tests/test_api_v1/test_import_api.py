@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import AsyncIterator, Iterator
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.exc import DataError
+from sqlalchemy.orm import Session
+
+from app.api.imports import CsvParser, Importer, NdjsonParser
+from app.model.activity import Activity
+from app.model.building import Building
+from app.model.organization import Organization
+from app.model.organization_activity import OrganizationActivity
+from app.schemas.activity import ActivityCreate
+from app.schemas.organization import OrganizationBulkItem
+from tests.factories import create_activity, create_building
+
+
+HEADERS = {"X-API-Key": "test-key"}
+NDJSON = {**HEADERS, "Content-Type": "application/x-ndjson"}
+CSV = {**HEADERS, "Content-Type": "text/csv"}
+
+
+def _chunks(data: bytes, size: int) -> Iterator[bytes]:
+    # A streamed (chunked) request body, split at arbitrary points
+    for start in range(0, len(data), size):
+        yield data[start : start + size]
+
+
+async def _async_chunks(*chunks: bytes) -> AsyncIterator[bytes]:
+    for chunk in chunks:
+        yield chunk
+
+
+def _feed(parser: NdjsonParser | CsvParser, data: bytes, size: int) -> list:
+    raws = [raw for chunk in _chunks(data, size) for raw in parser.feed(chunk)]
+    return [parser.record(raw) for raw in raws + parser.feed(b"", final=True)]
+
+
+def test_parsers_handle_chunk_boundaries():
+    ndjson = '{"name": "Ёлка"}\n\n{"name": "Б"}'.encode()
+    for size in (1, 3, len(ndjson)):
+        assert _feed(NdjsonParser(), ndjson, size) == [{"name": "Ёлка"}, {"name": "Б"}]
+
+    csv = 'name,building_id,phones,activity_ids\r\n"Рога, ""копыта""\nи ко",1,1;2,\r\nБ,2,,3\n'.encode()
+    for size in (1, 5, len(csv)):
+        assert _feed(CsvParser(OrganizationBulkItem), csv, size) == [
+            {"name": 'Рога, "копыта"\nи ко', "building_id": "1", "phones": ["1", "2"]},
+            {"name": "Б", "building_id": "2", "activity_ids": ["3"]},
+        ]
+
+    # Only \n ends a record: form feeds and other str.splitlines breaks are cell data
+    csv = "name,building_id\nРога\x0cи\u2028копыта,1\nБ\x1c,2".encode()
+    assert _feed(CsvParser(OrganizationBulkItem), csv, 4) == [
+        {"name": "Рога\x0cи\u2028копыта", "building_id": "1"},
+        {"name": "Б\x1c", "building_id": "2"},
+    ]
+
+
+def test_parsers_drop_oversized_records():
+    async def write(rows: list[dict]) -> list[int]:
+        return list(range(len(rows)))
+
+    # A stray quote makes the rest of the body one record: it is dropped as it arrives, not buffered
+    csv = b'name\nFirst\n"Stray quote\n' + b"Next\n" * 1000
+    parser = CsvParser(ActivityCreate, max_length=100)
+    assert [raw for chunk in _chunks(csv, 7) for raw in parser.feed(chunk)] == [["First"]]
+    assert len(parser._record) > 100 and parser._record._parts == []
+
+    importer = Importer(CsvParser(ActivityCreate, max_length=100), ActivityCreate, write, batch_size=10, max_errors=10)
+    report = asyncio.run(importer.run(_async_chunks(*_chunks(csv, 7))))
+    assert (report.rows, report.written, report.failed) == (2, 1, 1)
+    assert (report.errors[0].row, report.errors[0].error) == (2, "record longer than 100 characters")
+
+    ndjson = b'{"name": "A"}\n{"name": "' + b"x" * 1000 + b'"}\n{"name": "B"}'
+    importer = Importer(NdjsonParser(max_length=100), ActivityCreate, write, batch_size=10, max_errors=10)
+    report = asyncio.run(importer.run(_async_chunks(*_chunks(ndjson, 7))))
+    assert (report.rows, report.written, report.failed) == (3, 2, 1)
+    assert report.errors[0].row == 2
+
+
+def test_import_buildings_ndjson_in_batches(client: TestClient, db_session: Session):
+    lines = [{"address": f"Import {i}", "latitude": 1.0, "longitude": 2.0} for i in range(5)]
+    lines.insert(2, {"address": "Import bad", "latitude": "north"})
+    body = "\n".join(json.dumps(line) for line in lines).encode() + b"\nnot json\n"
+
+    r = client.post(
+        "/api/v1/buildings/import", params={"batch_size": 2}, content=_chunks(body, 7), headers=NDJSON
+    )
+    assert r.status_code == 200
+    report = r.json()
+    assert (report["rows"], report["written"], report["failed"]) == (7, 5, 2)
+    assert [(b["first_row"], b["last_row"], b["written"]) for b in report["batches"]] == [(1, 2, 2), (4, 5, 2), (6, 6, 1)]
+    assert [error["row"] for error in report["errors"]] == [3, 7]
+    assert "latitude" in report["errors"][0]["error"]
+
+    addresses = db_session.scalars(select(Building.address).where(Building.address.like("Import %"))).all()
+    assert sorted(addresses) == [f"Import {i}" for i in range(5)]
+
+
+def test_import_organizations_csv_with_links(client: TestClient, db_session: Session):
+    building = create_building(db_session, "Import org building", 1.0, 1.0)
+    first = create_activity(db_session, "Import link 1")
+    second = create_activity(db_session, "Import link 2")
+    db_session.commit()
+
+    body = (
+        "name,building_id,phones,activity_ids\n"
+        f"Import org A,{building.id},111;222,{first.id};{second.id}\n"
+        f"Import org B,{building.id},,\n"
+        f"Import org C,{10**9},,\n"
+    ).encode()
+    r = client.post("/api/v1/organizations/import", params={"batch_size": 2}, content=body, headers=CSV)
+    assert r.status_code == 200
+    report = r.json()
+    # The batch with the unknown building is rolled back, the first one stays
+    assert (report["written"], report["failed"]) == (2, 1)
+    assert "not found" in report["batches"][1]["error"]
+
+    orgs = dict(db_session.execute(select(Organization.name, Organization.id).where(Organization.name.like("Import org %"))).all())
+    assert set(orgs) == {"Import org A", "Import org B"}
+    links = db_session.scalars(
+        select(OrganizationActivity.activity_id).where(OrganizationActivity.organization_id == orgs["Import org A"])
+    ).all()
+    assert sorted(links) == [first.id, second.id]
+
+
+def test_import_rejects_other_media_types(client: TestClient):
+    r = client.post("/api/v1/activities/import", json=[{"name": "Import json"}], headers=HEADERS)
+    assert r.status_code == 415
+
+
+def test_import_reports_database_errors_per_batch(client: TestClient, db_session: Session):
+    taken = create_activity(db_session, "Import taken id")
+    db_session.commit()
+
+    lines = [{"name": "Import dup 1"}, {"id": taken.id, "name": "Import dup 2"}, {"name": "Import dup 3"}]
+    body = "\n".join(json.dumps(line) for line in lines).encode()
+    r = client.post("/api/v1/activities/import", params={"batch_size": 2}, content=body, headers=NDJSON)
+    assert r.status_code == 200
+    report = r.json()
+    # The batch with the taken id is rolled back and reported, the import goes on
+    assert (report["written"], report["failed"]) == (1, 2)
+    assert report["batches"][0]["error"].startswith("IntegrityError: ")
+    assert report["batches"][1]["written"] == 1
+
+    names = db_session.scalars(select(Activity.name).where(Activity.name.like("Import dup %"))).all()
+    assert names == ["Import dup 3"]
+
+
+def test_importer_reports_data_errors():
+    async def write(rows: list[dict]) -> list[int]:
+        raise DataError("INSERT", {}, Exception("Data too long for column 'name'"))
+
+    importer = Importer(NdjsonParser(), ActivityCreate, write, batch_size=10, max_errors=10)
+    report = asyncio.run(importer.run(_async_chunks(b'{"name": "A"}\n{"name": "B"}\n')))
+    assert (report.rows, report.written, report.failed) == (2, 0, 2)
+    assert report.batches[0].error == "DataError: Data too long for column 'name'"
+
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from prometheus_client.parser import text_string_to_metric_families
+from sqlalchemy import create_engine
+from sqlalchemy.pool import Pool
+
+from app.api import metrics
+from app.api.cache import response_cache
+from app.config.db import InstrumentedQueuePool
+
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def _sample(name: str, **labels: str) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def _scrape(client: TestClient) -> dict[str, list]:
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    return {family.name: family.samples for family in text_string_to_metric_families(r.text)}
+
+
+def test_route_latency_and_status(client: TestClient):
+    labels = {"method": "GET", "route": "/api/v1/buildings"}
+    before = _sample("http_responses_total", status="200", **labels)
+    observed = _sample("http_request_duration_seconds_count", **labels)
+
+    assert client.get("/api/v1/buildings", params={"limit": 1}).status_code == 200
+    assert client.get("/api/v1/buildings", params={"limit": 0}).status_code == 422
+
+    assert _sample("http_responses_total", status="200", **labels) == before + 1
+    assert _sample("http_responses_total", status="422", **labels) >= 1
+    assert _sample("http_request_duration_seconds_count", **labels) == observed + 2
+    # Path parameters and unknown paths don't make new series
+    client.get("/nope/123")
+    assert _sample("http_responses_total", method="GET", route="<unmatched>", status="404") >= 1
+
+
+def test_scrape_exposes_pool_and_in_flight(client: TestClient):
+    families = _scrape(client)
+    assert families["http_requests_in_flight"][0].value == 1
+    for name in ("db_pool_size", "db_pool_checked_out", "db_pool_overflow", "db_pool_wait_max_seconds"):
+        assert families[name][0].value >= 0
+    assert "http_request_duration_seconds" in families
+
+
+def test_pool_gauges_per_engine(client: TestClient, monkeypatch):
+    class Replica:
+        entry = "db-2:3307/secunda"
+        engine = create_engine("sqlite://", poolclass=InstrumentedQueuePool)
+
+        def pool(self, asyncio: bool = False) -> Pool:
+            return self.engine.pool
+
+    replica = Replica()
+    with replica.engine.connect():
+        monkeypatch.setattr(metrics, "replicas", SimpleNamespace(replicas=[replica]))
+        families = _scrape(client)
+    replica.engine.dispose()
+
+    checkouts = {sample.labels["engine"]: sample.value for sample in families["db_pool_checkouts"]}
+    assert checkouts["primary"] >= 1 and checkouts[Replica.entry] == 1
+    connects = {sample.labels["engine"]: sample.value for sample in families["db_pool_connects"]}
+    assert connects[Replica.entry] == 1
+
+
+def test_response_cache_results(client: TestClient, monkeypatch):
+    monkeypatch.setattr(response_cache, "_enabled", True)
+    monkeypatch.setattr(response_cache, "_check_interval", 60.0)
+    response_cache.clear()
+    labels = {"route": "/api/v1/activities"}
+    results = ("hit", "miss", "not_modified")
+    before = {result: _sample("http_response_cache_lookups_total", result=result, **labels) for result in results}
+
+    tag = client.get("/api/v1/activities", params={"limit": 7}).headers["ETag"]
+    client.get("/api/v1/activities", params={"limit": 7})
+    assert client.get("/api/v1/activities", params={"limit": 7}, headers={"If-None-Match": tag}).status_code == 304
+
+    after = {result: _sample("http_response_cache_lookups_total", result=result, **labels) for result in results}
+    assert {result: after[result] - before[result] for result in results} == {"hit": 1, "miss": 1, "not_modified": 1}
+    response_cache.clear()
+
+
+WORKER = """
+from app.api.metrics import IN_FLIGHT, RESPONSES
+RESPONSES.labels("GET", "/x", "200").inc(3)
+IN_FLIGHT.inc()
+"""
+
+SCRAPE = """
+from app.api.metrics import metrics_response
+print(metrics_response(None).body.decode())
+"""
+
+
+def test_multiprocess_mode_sums_workers(tmp_path):
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path), "PYTHONPATH": str(ROOT)}
+
+    def run(code: str) -> str:
+        done = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True)
+        assert done.returncode == 0, done.stderr
+        return done.stdout
+
+    run(WORKER)
+    run(WORKER)
+    samples = {
+        (sample.name, sample.labels.get("route")): sample.value
+        for family in text_string_to_metric_families(run(SCRAPE))
+        for sample in family.samples
+    }
+    assert samples[("http_responses_total", "/x")] == 6
+    # Both workers have exited without mark_process_dead, so their in-flight values are still summed
+    assert samples[("http_requests_in_flight", None)] == 2
+
+
+def test_metrics_not_in_openapi(client: TestClient):
+    assert "/metrics" not in client.get("/openapi.json").json()["paths"]
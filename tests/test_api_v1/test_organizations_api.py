@@ -1,8 +1,13 @@
 from __future__ import annotations
 
+import json
+
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
+from app.config.settings import settings
+from tests.factories import create_activity, create_building, create_org, set_org_activities
+
 
 def test_search_by_activity_name(client: TestClient, db_session: Session):
     headers = {"X-API-Key": "test-key"}
@@ -42,3 +47,87 @@ def test_nearby_square(client: TestClient, db_session: Session):
     assert r.status_code == 200
     names = {x["name"] for x in r.json()}
     assert {"ЕдаМаркет", "Мясной рай"}.issubset(names)
+
+
+def test_nearby_knn(client: TestClient, db_session: Session):
+    headers = {"X-API-Key": "test-key"}
+    r = client.get("/api/v1/organizations/nearby/knn", params={"lat": 55.7558, "lon": 37.6176, "k": 2}, headers=headers)
+    assert r.status_code == 200
+    body = r.json()
+    assert [x["name"] for x in body] == ["ЕдаМаркет", "Мясной рай"]
+    assert body[0]["distance_m"] < 1 < body[1]["distance_m"] < 300
+
+
+def test_filter_fulltext_ordered_by_relevance(client: TestClient, db_session: Session):
+    headers = {"X-API-Key": "test-key"}
+    b = create_building(db_session, "Fulltext", 1.0, 1.0)
+    weak = create_org(db_session, "Кофейня у дома и пекарня с выпечкой", b.id)
+    strong = create_org(db_session, "Кофейня", b.id)
+
+    payload = {"organization_name": "кофейня", "search_mode": "fulltext"}
+    r = client.post("/api/v1/organizations/filter", json=payload, headers=headers)
+    assert r.status_code == 200
+    assert [x["id"] for x in r.json()] == [strong.id, weak.id]
+
+    r = client.post("/api/v1/organizations/filter", params={"limit": 1}, json=payload, headers=headers)
+    r = client.post(
+        "/api/v1/organizations/filter",
+        params={"limit": 1, "cursor": r.headers["X-Next-Cursor"]},
+        json=payload,
+        headers=headers,
+    )
+    assert [x["id"] for x in r.json()] == [weak.id]
+
+
+def test_filter_fulltext_activity(client: TestClient, db_session: Session):
+    headers = {"X-API-Key": "test-key"}
+    payload = {"activity_name": "мясная", "search_mode": "fulltext"}
+    r = client.post("/api/v1/organizations/filter", json=payload, headers=headers)
+    assert r.status_code == 200
+    assert "Мясной рай" in {x["name"] for x in r.json()}
+
+
+def test_export_ndjson(client: TestClient, db_session: Session, monkeypatch):
+    headers = {"X-API-Key": "test-key"}
+    b = create_building(db_session, "Export", 12.5, 34.5)
+    first = create_org(db_session, "Экспорт один", b.id, ["111"])
+    second = create_org(db_session, "Экспорт два", b.id)
+    parent = create_activity(db_session, "Экспорт активность")
+    child = create_activity(db_session, "Экспорт подактивность", parent.id)
+    set_org_activities(db_session, first.id, [child.id, parent.id])
+    db_session.commit()
+    # Several chunks from the cursor
+    monkeypatch.setattr(settings, "export_batch_size", 1)
+
+    params = {"building_id": b.id, "with_building": True, "with_activities": True}
+    r = client.get("/api/v1/organizations/export", params=params, headers=headers)
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in r.text.splitlines()]
+    assert rows == [
+        {
+            "id": first.id,
+            "name": "Экспорт один",
+            "building_id": b.id,
+            "phones": ["111"],
+            "latitude": 12.5,
+            "longitude": 34.5,
+            "activity_ids": sorted([parent.id, child.id]),
+        },
+        {
+            "id": second.id,
+            "name": "Экспорт два",
+            "building_id": b.id,
+            "phones": [],
+            "latitude": 12.5,
+            "longitude": 34.5,
+            "activity_ids": [],
+        },
+    ]
+
+    # Same filters as /filter, plain rows by default
+    params = {"activity_name": "Экспорт подактивность"}
+    r = client.get("/api/v1/organizations/export", params=params, headers=headers)
+    assert [json.loads(line) for line in r.text.splitlines()] == [
+        {"id": first.id, "name": "Экспорт один", "building_id": b.id, "phones": ["111"]}
+    ]
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.api.pagination import NEXT_CURSOR_HEADER
+from tests.factories import create_activity, create_building, create_org, set_org_activities
+
+
+HEADERS = {"X-API-Key": "test-key"}
+
+
+def _walk(client: TestClient, method: str, url: str, **kwargs) -> list[int]:
+    ids: list[int] = []
+    params = {**kwargs.pop("params", {}), "limit": 1}
+    while True:
+        r = getattr(client, method)(url, params=params, headers=HEADERS, **kwargs)
+        assert r.status_code == 200
+        ids.extend(x["id"] for x in r.json())
+        cursor = r.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return ids
+        params = {**params, "cursor": cursor}
+
+
+def test_cursor_walk_matches_single_page(client: TestClient, db_session: Session):
+    create_building(db_session, "Cursor 1", 10.0, 10.0)
+    create_building(db_session, "Cursor 2", 10.0, 10.0)
+
+    r = client.get("/api/v1/buildings", params={"limit": 1000}, headers=HEADERS)
+    assert NEXT_CURSOR_HEADER not in r.headers
+    expected = [x["id"] for x in r.json()]
+
+    assert expected == sorted(expected)
+    assert _walk(client, "get", "/api/v1/buildings") == expected
+
+
+def test_radius_pages_ordered_by_distance(client: TestClient, db_session: Session):
+    near = create_building(db_session, "Radius near", 40.0001, 40.0)
+    far = create_building(db_session, "Radius far", 40.002, 40.0)
+    o_far = create_org(db_session, "Radius far org", far.id)
+    o_near = create_org(db_session, "Radius near org", near.id)
+    o_near2 = create_org(db_session, "Radius near org 2", near.id)
+
+    params = {"center_lat": 40.0, "center_lon": 40.0, "radius": 1000}
+    assert _walk(client, "get", "/api/v1/organizations/nearby/radius", params=params) == [
+        o_near.id,
+        o_near2.id,
+        o_far.id,
+    ]
+
+
+def test_filter_returns_organization_once(client: TestClient, db_session: Session):
+    b = create_building(db_session, "Filter", 1.0, 1.0)
+    a1 = create_activity(db_session, "Pagination sport")
+    a2 = create_activity(db_session, "Pagination sport shoes", a1.id)
+    org = create_org(db_session, "Pagination org", b.id)
+    set_org_activities(db_session, org.id, [a1.id, a2.id])
+
+    ids = _walk(client, "post", "/api/v1/organizations/filter", json={"activity_name": "pagination sport"})
+    assert ids == [org.id]
+
+
+def test_invalid_cursor_rejected(client: TestClient):
+    r = client.get("/api/v1/activities", params={"cursor": "not-a-cursor"}, headers=HEADERS)
+    assert r.status_code == 400
+
+    r = client.get("/api/v1/activities", params={"limit": 1}, headers=HEADERS)
+    cursor = r.headers[NEXT_CURSOR_HEADER]
+    r = client.get("/api/v1/activities", params={"cursor": cursor, "offset": 1}, headers=HEADERS)
+    assert r.status_code == 400
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.api.cache import response_cache
+from app.config.settings import settings
+from app.crud.activity_tree import activity_tree_index
+from app.crud.geo_index import building_geo_index
+from app.crud.organization import KNN_STEPS, RADIUS_WALK_BATCHES
+
+
+@pytest.fixture()
+def warm_index(db_session: Session, monkeypatch):
+    # Subtree expansion for /search is served by the activity index once it is loaded
+    monkeypatch.setattr(activity_tree_index, "_check_interval", 60.0)
+    activity_tree_index.invalidate()
+    activity_tree_index.ensure_fresh(db_session)
+    # So are the entity versions behind the ETags of GET endpoints
+    monkeypatch.setattr(response_cache, "_check_interval", 60.0)
+    response_cache.clear()
+    response_cache.refresh(db_session)
+    yield
+    activity_tree_index.invalidate()
+    response_cache.clear()
+
+
+@pytest.mark.parametrize(
+    "method, url, kwargs",
+    [
+        ("get", "/api/v1/activities", {}),
+        ("get", "/api/v1/buildings", {}),
+        ("get", "/api/v1/organizations/search", {"params": {"activity_name": "еда"}}),
+        ("post", "/api/v1/organizations/filter", {"json": {"activity_name": "мясная продукция"}}),
+        (
+            "get",
+            "/api/v1/organizations/nearby/radius",
+            {"params": {"center_lat": 55.7558, "center_lon": 37.6176, "radius": 300}},
+        ),
+        (
+            "get",
+            "/api/v1/organizations/nearby/square",
+            {"params": {"lat_min": 55.75, "lat_max": 55.76, "lon_min": 37.61, "lon_max": 37.62}},
+        ),
+        ("get", "/api/v1/organizations/batch", {"params": {"ids": "3,1,2"}}),
+        ("post", "/api/v1/buildings/batch", {"json": {"ids": [2, 1, 999999]}}),
+    ],
+)
+def test_list_endpoint_runs_single_query(
+    client: TestClient, warm_index: None, statements: list[str], method: str, url: str, kwargs: dict
+):
+    r = getattr(client, method)(url, headers={"X-API-Key": "test-key"}, **kwargs)
+    assert r.status_code == 200
+    assert r.json()
+    assert len(statements) == 1, statements
+
+
+NEARBY = [
+    ("/api/v1/organizations/nearby/radius", {"center_lat": 55.7558, "center_lon": 37.6176, "radius": 5000, "limit": 1}),
+    # Far from every building and more than there are: the search widens to the whole globe
+    ("/api/v1/organizations/nearby/knn", {"lat": -60.0, "lon": -120.0, "k": 1000}),
+]
+
+
+@pytest.mark.parametrize("max_buildings", [5000, 1])
+@pytest.mark.parametrize("url, params", NEARBY)
+def test_nearby_within_budget_on_cold_geo_index(
+    client: TestClient, statements: list[str], monkeypatch, url: str, params: dict, max_buildings: int
+):
+    # Worst case: versions of the cache and of the index are due, the index reloads, and with a
+    # one-building IN list limit the walk falls back to SQL
+    monkeypatch.setattr(building_geo_index, "_enabled", True)
+    monkeypatch.setattr(building_geo_index, "_check_interval", 60.0)
+    monkeypatch.setattr(settings, "geo_index_max_buildings", max_buildings)
+    building_geo_index.invalidate()
+    response_cache.clear()
+    try:
+        r = client.get(url, params=params, headers={"X-API-Key": "test-key"})
+    finally:
+        building_geo_index.invalidate()
+        response_cache.clear()
+    # The budget is strict in tests, a request over it fails
+    assert r.status_code == 200 and r.json()
+    assert 3 < len(statements) <= 3 + RADIUS_WALK_BATCHES + (KNN_STEPS if "knn" in url else 0)
+
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+from typing import Generator
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy_utils import create_database, database_exists, drop_database
+
+from app.api import replica_routing
+from app.api.cache import CACHE_HEADER, response_cache
+from app.api.replica_routing import (
+    PRIMARY_COOKIE,
+    PRIMARY_HEADER,
+    ReplicaRoutingMiddleware,
+    async_request_session,
+    request_session,
+)
+from app.api.v1 import api_v1_router
+from app.config import replicas as replicas_module
+from app.config.db import SqlAlchemyConfig
+from app.config.replicas import ReplicaSet, probe_lag, replica_url_args
+from app.crud.building import building_crud
+from app.crud.versions import get_versions
+from app.model import Activity, ActivityClosure, Building
+from app.model.base import Base
+from app.model.entity_version import EntityVersion
+from app.security.api_key import require_api_key
+
+
+@pytest.fixture(scope="module")
+def replica_entry(db_schema: None) -> Generator[str, None, None]:
+    # Second local database standing in for a replica, with data the primary doesn't have
+    name = f"{os.environ['SqlAlchemyDatabase']}_replica"
+    url = SqlAlchemyConfig.url(database=name)
+    if not database_exists(url):
+        create_database(url)
+    engine = SqlAlchemyConfig.engine(database=name)
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        building_crud.create(db, {"address": "Replica", "latitude": 1.0, "longitude": 2.0})
+        db.commit()
+    engine.dispose()
+    port = os.environ.get("SqlAlchemyPort", "3306")
+    try:
+        yield f"{os.environ['SqlAlchemyHost']}:{port}/{name}"
+    finally:
+        drop_database(url)
+
+
+@pytest.fixture()
+def replica_set(replica_entry: str, monkeypatch) -> Generator[ReplicaSet, None, None]:
+    replicas = ReplicaSet(entries=replica_entry, max_lag=5.0, check_interval=0.0)
+    monkeypatch.setattr(replica_routing, "replicas", replicas)
+    yield replicas
+    replicas.reset()
+
+
+@pytest.fixture()
+def routed_client(replica_set: ReplicaSet) -> Generator[TestClient, None, None]:
+    app = FastAPI()
+    app.add_middleware(ReplicaRoutingMiddleware, pin_seconds=5)
+    app.include_router(api_v1_router, prefix="/api/v1")
+    app.dependency_overrides[require_api_key] = lambda: None
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture()
+def cache(monkeypatch):
+    monkeypatch.setattr(response_cache, "_enabled", True)
+    monkeypatch.setattr(response_cache, "_check_interval", 0.0)
+    response_cache.clear()
+    yield response_cache
+    response_cache.clear()
+
+
+def _addresses(client: TestClient, **headers: str) -> set[str]:
+    r = client.get("/api/v1/buildings", headers=headers)
+    assert r.status_code == 200
+    return {b["address"] for b in r.json()}
+
+
+def test_replica_url_args():
+    assert replica_url_args("db-2:3307/secunda") == {"host": "db-2", "port": 3307, "database": "secunda"}
+    assert replica_url_args(" db-3 ") == {"host": "db-3"}
+    assert replica_url_args("/other") == {"database": "other"}
+
+
+def test_gets_read_the_replica(routed_client: TestClient):
+    assert _addresses(routed_client) == {"Replica"}
+    # The pin reads the primary
+    assert "Center" in _addresses(routed_client, **{PRIMARY_HEADER: "1"})
+    routed_client.cookies.set(PRIMARY_COOKIE, "1")
+    assert "Center" in _addresses(routed_client)
+
+
+def test_write_pins_the_primary(routed_client: TestClient, db_session: Session):
+    r = None
+    try:
+        r = routed_client.post("/api/v1/activities", json={"name": "Replicated later", "parent_id": None})
+        assert r.status_code == 200
+        assert r.headers[PRIMARY_HEADER] == "5"
+        assert f"{PRIMARY_COOKIE}=1; Max-Age=5" in r.headers["set-cookie"]
+
+        # The cookie sends the client's next read to the primary, where its write is; the replica has no activities
+        assert routed_client.get("/api/v1/activities").json() != []
+        routed_client.cookies.clear()
+        assert routed_client.get("/api/v1/activities").json() == []
+    finally:
+        if r is not None and r.status_code == 200:
+            activity_id = r.json()["id"]
+            db_session.execute(delete(ActivityClosure).where(ActivityClosure.descendant_id == activity_id))
+            db_session.execute(delete(Activity).where(Activity.id == activity_id))
+            db_session.commit()
+
+
+def test_reads_do_not_pin(routed_client: TestClient):
+    r = routed_client.post("/api/v1/organizations/filter", json={})
+    assert r.status_code == 200
+    assert PRIMARY_HEADER not in r.headers and "set-cookie" not in r.headers
+
+
+def test_cached_replica_responses_stay_off_the_primary(routed_client: TestClient, cache, db_session: Session):
+    first = routed_client.get("/api/v1/buildings")
+    assert first.headers[CACHE_HEADER] == "MISS"
+    assert {b["address"] for b in first.json()} == {"Replica"}
+    assert routed_client.get("/api/v1/buildings").headers[CACHE_HEADER] == "HIT"
+
+    # A pinned client reads the primary: neither the replica's entry nor a 304 for its ETag
+    pinned = {PRIMARY_HEADER: "1", "If-None-Match": first.headers["ETag"]}
+    r = routed_client.get("/api/v1/buildings", headers=pinned)
+    assert r.status_code == 200 and r.headers[CACHE_HEADER] == "MISS"
+    assert "Center" in {b["address"] for b in r.json()}
+
+
+def test_replica_does_not_take_versions_back(routed_client: TestClient, cache, db_session: Session):
+    db_session.execute(
+        update(EntityVersion).where(EntityVersion.name == "building").values(version=EntityVersion.version + 10)
+    )
+    db_session.commit()
+    primary = get_versions(db_session, ["building"])["building"]
+
+    _addresses(routed_client, **{PRIMARY_HEADER: "1"})
+    assert cache.snapshot(["building"]) == (primary,)
+    # The replica's entity_version is behind the primary's
+    assert _addresses(routed_client) == {"Replica"}
+    assert cache.snapshot(["building"]) == (primary,)
+
+
+def test_lagging_replica_fails_over(routed_client: TestClient, replica_set: ReplicaSet, monkeypatch):
+    monkeypatch.setattr(replicas_module, "probe_lag", lambda conn: 30.0)
+    assert "Center" in _addresses(routed_client)
+    assert replica_set.replicas[0].lag == 30.0
+
+    monkeypatch.setattr(replicas_module, "probe_lag", lambda conn: 1.0)
+    assert _addresses(routed_client) == {"Replica"}
+
+
+def test_unreachable_replica_fails_over(replica_set: ReplicaSet, monkeypatch):
+    def unreachable(conn):
+        raise ConnectionError("down")
+
+    monkeypatch.setattr(replicas_module, "probe_lag", unreachable)
+    assert replica_set.pick() is None
+    assert replica_set.replicas[0].lag == math.inf
+
+    # Measured again only after the check interval
+    monkeypatch.setattr(replicas_module, "probe_lag", lambda conn: 0.0)
+    replica_set._check_interval = 60.0
+    assert replica_set.pick() is None
+    replica_set._check_interval = 0.0
+    assert replica_set.pick() is replica_set.replicas[0]
+
+
+def test_round_robin(replica_entry: str):
+    replicas = ReplicaSet(entries=f"{replica_entry},{replica_entry}", max_lag=5.0, check_interval=60.0)
+    first, second = replicas.replicas
+    try:
+        assert [replicas.pick(), replicas.pick(), replicas.pick()] == [first, second, first]
+    finally:
+        replicas.reset()
+
+
+def test_probe_lag_outside_mysql(engine):
+    if engine.dialect.name == "mysql":
+        pytest.skip("SHOW REPLICA STATUS needs the REPLICATION CLIENT privilege")
+    with engine.connect() as conn:
+        assert probe_lag(conn) == 0.0
+
+
+def test_sessions_outside_requests_use_the_primary(replica_set: ReplicaSet):
+    with request_session() as db:
+        assert db.get_bind().url == SqlAlchemyConfig.engine().url
+
+
+def test_async_session_reads_the_replica(replica_set: ReplicaSet):
+    routing = replica_routing.RequestRouting(reads_replica=True)
+
+    async def read() -> str:
+        token = replica_routing._current.set(routing)
+        try:
+            async with await async_request_session() as db:
+                return await db.scalar(select(Building.address))
+        finally:
+            replica_routing._current.reset(token)
+
+    assert asyncio.run(read()) == "Replica"
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.api.cache import CACHE_HEADER, response_cache
+from app.api.pagination import NEXT_CURSOR_HEADER
+from app.config.settings import settings
+from app.model.entity_version import EntityVersion
+from tests.factories import create_activity, create_building, create_org, set_org_activities
+
+
+HEADERS = {"X-API-Key": "test-key"}
+
+
+@pytest.fixture()
+def cache(monkeypatch):
+    monkeypatch.setattr(response_cache, "_enabled", True)
+    monkeypatch.setattr(response_cache, "_check_interval", 60.0)
+    monkeypatch.setattr(response_cache, "_max_entries", 100)
+    monkeypatch.setattr(response_cache, "_ttl", 60.0)
+    response_cache.clear()
+    yield response_cache
+    response_cache.clear()
+
+
+def _get(client: TestClient, url: str, **params):
+    r = client.get(url, params=params or None, headers=HEADERS)
+    assert r.status_code == 200
+    return r
+
+
+def test_second_request_is_served_from_cache(client: TestClient, db_session: Session, cache):
+    create_building(db_session, "Cache 1", 1.0, 1.0)
+    create_building(db_session, "Cache 2", 1.0, 1.0)
+    db_session.commit()
+
+    first = _get(client, "/api/v1/buildings", limit=1)
+    second = _get(client, "/api/v1/buildings", limit=1)
+    assert first.headers[CACHE_HEADER] == "MISS"
+    assert second.headers[CACHE_HEADER] == "HIT"
+    assert second.json() == first.json()
+    # Handler headers are stored with the body
+    assert second.headers[NEXT_CURSOR_HEADER] == first.headers[NEXT_CURSOR_HEADER]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_query_parameters_are_normalized(client: TestClient, cache):
+    assert _get(client, "/api/v1/buildings?limit=2&offset=1").headers[CACHE_HEADER] == "MISS"
+    assert _get(client, "/api/v1/buildings?offset=1&limit=2").headers[CACHE_HEADER] == "HIT"
+    assert _get(client, "/api/v1/buildings?offset=0&limit=2").headers[CACHE_HEADER] == "MISS"
+
+
+def test_write_invalidates_its_family_only(client: TestClient, db_session: Session, cache):
+    _get(client, "/api/v1/activities", limit=1000)
+    _get(client, "/api/v1/buildings", limit=1000)
+
+    activity = create_activity(db_session, "Cache invalidation")
+    db_session.commit()
+
+    r = _get(client, "/api/v1/activities", limit=1000)
+    assert r.headers[CACHE_HEADER] == "MISS"
+    assert activity.id in [x["id"] for x in r.json()]
+    assert _get(client, "/api/v1/buildings", limit=1000).headers[CACHE_HEADER] == "HIT"
+
+
+def test_set_activities_invalidates_search(client: TestClient, db_session: Session, cache):
+    activity = create_activity(db_session, "Cache links")
+    org = create_org(db_session, "Cache linked", create_building(db_session, "Cache 3", 1.0, 1.0).id)
+    db_session.commit()
+
+    assert _get(client, "/api/v1/organizations/search", activity_name="Cache links").json() == []
+
+    set_org_activities(db_session, org.id, [activity.id])
+    db_session.commit()
+
+    r = _get(client, "/api/v1/organizations/search", activity_name="Cache links")
+    assert r.headers[CACHE_HEADER] == "MISS"
+    assert [x["id"] for x in r.json()] == [org.id]
+
+
+def test_uncommitted_write_bypasses_cache(client: TestClient, db_session: Session, cache):
+    _get(client, "/api/v1/buildings", limit=1000)
+    building = create_building(db_session, "Cache pending", 1.0, 1.0)
+
+    r = _get(client, "/api/v1/buildings", limit=1000)
+    assert CACHE_HEADER not in r.headers
+    assert building.id in [x["id"] for x in r.json()]
+    db_session.commit()
+
+
+def test_other_worker_write_is_seen_after_check_interval(client: TestClient, db_session: Session, cache):
+    create_building(db_session, "Cache worker", 1.0, 1.0)
+    db_session.commit()
+    _get(client, "/api/v1/buildings", limit=1000)
+
+    # A version bump committed elsewhere does not run this process' commit hooks
+    db_session.execute(update(EntityVersion).where(EntityVersion.name == "building").values(version=12345))
+    db_session.commit()
+    assert _get(client, "/api/v1/buildings", limit=1000).headers[CACHE_HEADER] == "HIT"
+
+    cache._checked_at = None
+    assert _get(client, "/api/v1/buildings", limit=1000).headers[CACHE_HEADER] == "MISS"
+
+
+def test_lru_eviction_and_ttl(client: TestClient, cache, monkeypatch):
+    monkeypatch.setattr(cache, "_max_entries", 2)
+    for limit in (1, 2, 3):
+        _get(client, "/api/v1/buildings", limit=limit)
+    assert cache.evictions == 1
+    assert _get(client, "/api/v1/buildings", limit=1).headers[CACHE_HEADER] == "MISS"
+    assert _get(client, "/api/v1/buildings", limit=3).headers[CACHE_HEADER] == "HIT"
+
+    monkeypatch.setattr(cache, "_ttl", 0.0)
+    _get(client, "/api/v1/buildings", limit=4)
+    assert _get(client, "/api/v1/buildings", limit=4).headers[CACHE_HEADER] == "MISS"
+
+
+def test_response_cache_stats(client: TestClient, cache):
+    _get(client, "/api/v1/buildings")
+    _get(client, "/api/v1/buildings")
+
+    body = _get(client, "/api/v1/system/response-cache").json()
+    assert body["enabled"] is True
+    assert (body["hits"], body["misses"], body["size"]) == (1, 1, 1)
+    assert body["hit_ratio"] == 0.5
+
+
+def test_if_none_match_returns_304_without_query(
+    client: TestClient, db_session: Session, statements: list[str], monkeypatch
+):
+    monkeypatch.setattr(response_cache, "_check_interval", 60.0)
+    response_cache.clear()
+    response_cache.refresh(db_session)
+
+    r = _get(client, "/api/v1/activities", limit=1000)
+    tag = r.headers["ETag"]
+    assert r.headers["Cache-Control"] == "private, no-cache"
+
+    statements.clear()
+    r = client.get("/api/v1/activities", params={"limit": 1000}, headers={**HEADERS, "If-None-Match": tag})
+    assert r.status_code == 304
+    assert r.content == b""
+    assert r.headers["ETag"] == tag
+    assert statements == []
+
+    # Weak comparison and lists of tags
+    r = client.get("/api/v1/activities", params={"limit": 1000}, headers={"If-None-Match": f'"other", W/{tag}'})
+    assert r.status_code == 304
+    # The tag belongs to the query
+    r = client.get("/api/v1/activities", params={"limit": 999}, headers={"If-None-Match": tag})
+    assert r.status_code == 200
+    assert r.headers["ETag"] != tag
+    response_cache.clear()
+
+
+def test_etag_changes_after_write(client: TestClient, db_session: Session, cache):
+    tag = _get(client, "/api/v1/organizations/search", activity_name="еда").headers["ETag"]
+
+    create_activity(db_session, "ETag write")
+    db_session.commit()
+
+    r = client.get("/api/v1/organizations/search", params={"activity_name": "еда"}, headers={"If-None-Match": tag})
+    assert r.status_code == 200
+    assert r.headers["ETag"] != tag
+    assert r.headers[CACHE_HEADER] == "MISS"
+    assert _get(client, "/api/v1/system/response-cache").json()["not_modified"] == 0
+
+
+def test_cache_control_max_age(client: TestClient, monkeypatch):
+    monkeypatch.setattr(settings, "http_cache_max_age", 30)
+    assert _get(client, "/api/v1/buildings").headers["Cache-Control"] == "private, max-age=30"
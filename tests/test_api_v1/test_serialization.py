@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import fastapi.routing
+import pytest
+from fastapi import APIRouter, FastAPI, Response
+from fastapi.testclient import TestClient
+from pydantic import BaseModel, ValidationError
+
+from app.api.serialization import JsonListRoute
+from app.config.settings import settings
+
+
+class ItemOut(BaseModel):
+    id: int
+    name: str
+
+
+class Row:
+    def __init__(self, id: int, name: str) -> None:
+        self.id, self.name = id, name
+
+
+@pytest.fixture()
+def serialize_calls(monkeypatch) -> list[object]:
+    calls: list[object] = []
+    original = fastapi.routing.serialize_response
+
+    async def spy(*args, **kwargs):
+        calls.append(kwargs.get("field"))
+        return await original(*args, **kwargs)
+
+    monkeypatch.setattr(fastapi.routing, "serialize_response", spy)
+    return calls
+
+
+def _app() -> FastAPI:
+    router = APIRouter(route_class=JsonListRoute)
+
+    @router.get("/rows", response_model=list[ItemOut])
+    def rows():
+        return [Row(1, "a"), {"id": 2, "name": "b"}, ItemOut(id=3, name="c")]
+
+    @router.post("/created", response_model=list[ItemOut], status_code=201)
+    async def created(response: Response):
+        response.headers["X-Extra"] = "1"
+        return [Row(4, "d")]
+
+    @router.get("/raw", response_model=list[ItemOut])
+    def raw():
+        return Response(b"[]", media_type="application/json", headers={"X-Raw": "1"})
+
+    @router.get("/one", response_model=ItemOut)
+    def one():
+        return Row(5, "e")
+
+    app = FastAPI()
+    app.include_router(router)
+    return app
+
+
+def test_list_routes_skip_response_serialization(serialize_calls):
+    client = TestClient(_app())
+
+    r = client.get("/rows")
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/json"
+    assert r.json() == [{"id": 1, "name": "a"}, {"id": 2, "name": "b"}, {"id": 3, "name": "c"}]
+    assert serialize_calls == []
+
+    # Non-list models keep FastAPI's own validation
+    assert client.get("/one").json() == {"id": 5, "name": "e"}
+    assert len(serialize_calls) == 1
+
+
+def test_status_headers_and_responses_pass_through():
+    client = TestClient(_app())
+
+    r = client.post("/created")
+    assert r.status_code == 201
+    assert r.headers["X-Extra"] == "1"
+    assert int(r.headers["content-length"]) == len(r.content)
+    assert r.json() == [{"id": 4, "name": "d"}]
+
+    r = client.get("/raw")
+    assert r.headers["X-Raw"] == "1" and r.json() == []
+
+
+def test_invalid_items_still_fail():
+    router = APIRouter(route_class=JsonListRoute)
+
+    @router.get("/bad", response_model=list[ItemOut])
+    def bad():
+        return [{"id": "x"}]
+
+    app = FastAPI()
+    app.include_router(router)
+    with pytest.raises(ValidationError):
+        TestClient(app).get("/bad")
+
+
+def test_setting_off_keeps_fastapi_serialization(serialize_calls, monkeypatch):
+    monkeypatch.setattr(settings, "fast_list_serialization", False)
+    assert TestClient(_app()).get("/rows").status_code == 200
+    assert len(serialize_calls) == 1
+
+
+def test_v1_list_endpoints(client: TestClient, serialize_calls):
+    r = client.get("/api/v1/buildings", params={"limit": 1})
+    assert r.status_code == 200
+    assert len(r.json()) == 1 and set(r.json()[0]) >= {"id", "address", "latitude", "longitude"}
+    assert "X-Next-Cursor" in r.headers and "ETag" in r.headers
+
+    r = client.get("/api/v1/buildings", params={"limit": 1, "cursor": r.headers["X-Next-Cursor"]})
+    assert r.status_code == 200
+    assert client.get("/api/v1/activities").status_code == 200
+    assert client.post("/api/v1/organizations/filter", json={}).status_code == 200
+    assert serialize_calls == []
+
+
+def test_openapi_schema_unchanged(client: TestClient):
+    paths = client.get("/openapi.json").json()["paths"]
+    schema = paths["/api/v1/buildings"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+    assert schema["type"] == "array"
+    assert schema["items"] == {"$ref": "#/components/schemas/BuildingOut"}
+    # The injected Response parameter is not a query parameter
+    names = {p["name"] for p in paths["/api/v1/activities"]["get"].get("parameters", [])}
+    assert not any(name.startswith("_") for name in names)
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.api.slow_queries import MAX_PARAMETER_ITEMS, slow_query_log
+from app.model.organization import Organization
+
+
+@pytest.fixture()
+def slow_log(monkeypatch, tmp_path):
+    # Every statement counts as slow
+    monkeypatch.setattr(slow_query_log, "_enabled", True)
+    monkeypatch.setattr(slow_query_log, "_threshold_ms", 0.0)
+    monkeypatch.setattr(slow_query_log, "_log_dir", str(tmp_path))
+    slow_query_log.clear()
+    yield slow_query_log
+    slow_query_log.clear()
+
+
+def test_capture_with_route_and_plan(client: TestClient, slow_log, tmp_path):
+    r = client.post("/api/v1/organizations/filter", json={"organization_name": "Еда"})
+    assert r.status_code == 200
+
+    captures = client.get("/api/v1/system/slow-queries").json()
+    assert captures
+    query = captures[0]
+    assert query["route"] == "POST /api/v1/organizations/filter"
+    assert "organization" in query["statement"].lower()
+    assert "%еда%" in json.dumps(query["parameters"], ensure_ascii=False).lower()
+    assert query["plan"]
+    assert "error" not in query["plan"]
+
+    lines = [json.loads(line) for f in tmp_path.glob("slow-queries-*.jsonl") for line in f.read_text().splitlines()]
+    assert query["statement"] in [line["statement"] for line in lines]
+
+    assert client.delete("/api/v1/system/slow-queries").status_code == 204
+    assert client.get("/api/v1/system/slow-queries").json() == []
+
+
+def test_ring_buffer_and_parameter_cap(db_session: Session, slow_log, monkeypatch):
+    monkeypatch.setattr(slow_log, "_log_dir", "")
+    monkeypatch.setattr(slow_log, "_entries", None)
+    monkeypatch.setattr(slow_log, "_max_entries", 2)
+
+    for _ in range(3):
+        db_session.execute(select(Organization.id).limit(1)).all()
+
+    captures = slow_log.recent()
+    assert len(captures) == 2
+    # Outside of a request
+    assert captures[0].route is None
+    slow_log.clear()
+
+    db_session.execute(select(Organization.id).where(Organization.id.in_(range(1, 500)))).all()
+    (query,) = slow_log.recent(1)
+    assert len(query.parameters) == MAX_PARAMETER_ITEMS + 1
+    assert query.parameters[-1] == f"... {499 - MAX_PARAMETER_ITEMS} more"
+
+
+def test_disabled_by_default(client: TestClient):
+    slow_query_log.clear()
+    client.post("/api/v1/organizations/filter", json={})
+    assert client.get("/api/v1/system/slow-queries").json() == []
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import json
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.api.instrumentation import SERVER_TIMING_HEADER, QueryBudgetExceeded, SqlTimingMiddleware, query_budget
+from app.config.settings import settings
+
+
+LOGGER = "app.api.instrumentation"
+
+
+@pytest.fixture()
+def budget_app(db_session: Session) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(SqlTimingMiddleware)
+
+    @app.get("/items/{count}")
+    @query_budget(1)
+    def items(count: int):
+        for _ in range(count):
+            db_session.execute(text("SELECT 1"))
+        return {"count": count}
+
+    return app
+
+
+def _records(caplog, level: int = logging.INFO) -> list[str]:
+    return [r.getMessage() for r in caplog.records if r.name == LOGGER and r.levelno == level]
+
+
+def test_server_timing_header(client: TestClient):
+    r = client.get("/api/v1/buildings", params={"limit": 1})
+    assert r.status_code == 200
+    db, app = r.headers[SERVER_TIMING_HEADER].split(", app;")
+    assert db.startswith("db;dur=")
+    assert 'statements, ' in db and db.endswith(' rows"')
+    assert app.startswith("dur=")
+
+
+def test_request_log_record(client: TestClient, caplog):
+    caplog.set_level(logging.INFO, logger=LOGGER)
+    client.get("/api/v1/organizations/search", params={"activity_name": "Еда"})
+
+    record = json.loads(_records(caplog)[-1])
+    assert record["method"] == "GET"
+    assert record["route"] == "/api/v1/organizations/search"
+    assert record["status"] == 200
+    assert 1 <= record["statements"] <= 4
+    assert record["db_ms"] >= 0 and record["duration_ms"] >= record["db_ms"]
+
+
+def test_budget_exceeded_raises_in_strict_mode(budget_app: FastAPI):
+    client = TestClient(budget_app)
+    assert client.get("/items/1").status_code == 200
+    with pytest.raises(QueryBudgetExceeded, match="ran 2 SQL statements, budget 1"):
+        client.get("/items/2")
+
+
+def test_budget_exceeded_logs_warning(budget_app: FastAPI, caplog, monkeypatch):
+    monkeypatch.setattr(settings, "sql_budget_strict", False)
+    caplog.set_level(logging.INFO, logger=LOGGER)
+
+    r = TestClient(budget_app).get("/items/2")
+    assert r.status_code == 200
+    assert json.loads(_records(caplog)[-1])["statements"] == 2
+    assert _records(caplog, logging.WARNING) == ["GET /items/2 ran 2 SQL statements, budget 1"]
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import sqlite3
+import time
+
+from fastapi.testclient import TestClient
+
+from app.config.db import InstrumentedQueuePool, SqlAlchemyConfig
+from app.config.settings import settings
+
+
+def test_db_pool_status(client: TestClient):
+    headers = {"X-API-Key": "test-key"}
+    r = client.get("/api/v1/system/db-pool", headers=headers)
+    assert r.status_code == 200
+    body = r.json()
+    assert body["size"] == settings.db_pool_size
+    assert body["checkouts"] >= 1
+    assert body["connects"] >= 1 and body["connect_avg_ms"] >= 0
+    assert 0.0 <= body["saturation"] <= 1.0
+
+
+def test_pool_wait_excludes_connect_time():
+    def slow_connect():
+        time.sleep(0.05)
+        return sqlite3.connect(":memory:")
+
+    pool = InstrumentedQueuePool(slow_connect, pool_size=1, max_overflow=0)
+    pool.connect().close()
+    pool.connect().close()
+
+    status = SqlAlchemyConfig.pool_status(pool)
+    assert (status["checkouts"], status["connects"]) == (2, 1)
+    assert status["connect_avg_ms"] >= 50
+    # The pool miss waited for no other checkout: its connect time is not wait time
+    assert status["wait_max_ms"] < 25
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.crud.activity import activity_crud
+from app.crud.base import ValidationError
+from app.model.activity import Activity
+from app.model.activity_closure import ActivityClosure
+
+
+def _expected_closure(db: Session, ids: set[int]) -> set[tuple[int, int, int]]:
+    parents = dict(db.execute(select(Activity.id, Activity.parent_id).where(Activity.id.in_(ids))).tuples().all())
+    rows = set()
+    for node in ids:
+        ancestor, depth = node, 0
+        while ancestor is not None:
+            rows.add((ancestor, node, depth))
+            ancestor, depth = parents.get(ancestor), depth + 1
+    return rows
+
+
+def _closure(db: Session, ids: set[int]) -> set[tuple[int, int, int]]:
+    stmt = select(ActivityClosure.ancestor_id, ActivityClosure.descendant_id, ActivityClosure.depth).where(
+        ActivityClosure.descendant_id.in_(ids)
+    )
+    return set(db.execute(stmt).tuples().all())
+
+
+def test_closure_maintained_on_create_move_delete(db_session: Session):
+    a = activity_crud.create(db_session, {"name": "Closure A", "parent_id": None})
+    b = activity_crud.create(db_session, {"name": "Closure B", "parent_id": a.id})
+    c = activity_crud.create(db_session, {"name": "Closure C", "parent_id": b.id})
+    d = activity_crud.create(db_session, {"name": "Closure D", "parent_id": None})
+    ids = {a.id, b.id, c.id, d.id}
+    assert _closure(db_session, ids) == _expected_closure(db_session, ids)
+    assert activity_crud.ancestor_ids(db_session, c.id) == [b.id, a.id]
+    assert activity_crud.subtree_ids(db_session, [a.id]) == {a.id, b.id, c.id}
+
+    # Move B (with C) under D
+    activity_crud.update(db_session, b, {"parent_id": d.id})
+    assert _closure(db_session, ids) == _expected_closure(db_session, ids)
+    assert activity_crud.subtree_ids(db_session, [a.id]) == {a.id}
+    assert activity_crud.search_ids(db_session, "closure d") == {d.id, b.id, c.id}
+
+    activity_crud.delete(db_session, d)
+    assert _closure(db_session, ids) == {(a.id, a.id, 0)}
+    db_session.rollback()
+
+
+def test_move_checks_subtree_height_and_cycles(db_session: Session):
+    a = activity_crud.create(db_session, {"name": "Move A", "parent_id": None})
+    b = activity_crud.create(db_session, {"name": "Move B", "parent_id": a.id})
+    x = activity_crud.create(db_session, {"name": "Move X", "parent_id": None})
+    y = activity_crud.create(db_session, {"name": "Move Y", "parent_id": x.id})
+
+    with pytest.raises(ValidationError):
+        activity_crud.update(db_session, a, {"parent_id": b.id})
+    with pytest.raises(ValidationError):
+        # A is two levels high, Y already sits on level 2
+        activity_crud.update(db_session, a, {"parent_id": y.id})
+    with pytest.raises(ValidationError):
+        activity_crud.create(db_session, {"name": "Orphan", "parent_id": 10**9})
+    db_session.rollback()
+
+
+def test_depth_stored_and_shifted_on_move(db_session: Session):
+    a = activity_crud.create(db_session, {"name": "Depth A", "parent_id": None})
+    b = activity_crud.create(db_session, {"name": "Depth B", "parent_id": None})
+    c = activity_crud.create(db_session, {"name": "Depth C", "parent_id": b.id})
+    assert (a.depth, b.depth, c.depth) == (1, 1, 2)
+
+    activity_crud.update(db_session, b, {"parent_id": a.id})
+    depths = dict(
+        db_session.execute(select(Activity.id, Activity.depth).where(Activity.id.in_([a.id, b.id, c.id]))).tuples().all()
+    )
+    assert depths == {a.id: 1, b.id: 2, c.id: 3}
+    assert c.id in set(db_session.scalars(select(Activity.id).where(Activity.depth == 3)))
+    db_session.rollback()
+
+
+def test_move_to_root_with_explicit_null(db_session: Session):
+    a = activity_crud.create(db_session, {"name": "Root A", "parent_id": None})
+    b = activity_crud.create(db_session, {"name": "Root B", "parent_id": a.id})
+    c = activity_crud.create(db_session, {"name": "Root C", "parent_id": b.id})
+
+    activity_crud.update(db_session, c, {"parent_id": None})
+    assert (c.parent_id, c.depth) == (None, 1)
+    ids = {a.id, b.id, c.id}
+    assert _closure(db_session, ids) == _expected_closure(db_session, ids)
+
+    # The stored depth matches the real level, so the depth limit still holds below C
+    d = activity_crud.create(db_session, {"name": "Root D", "parent_id": c.id})
+    e = activity_crud.create(db_session, {"name": "Root E", "parent_id": d.id})
+    assert (d.depth, e.depth) == (2, 3)
+    with pytest.raises(ValidationError):
+        activity_crud.create(db_session, {"name": "Root F", "parent_id": e.id})
+
+    # Updates without parent_id keep the parent
+    activity_crud.update(db_session, b, {"name": "Root B2"})
+    assert (b.parent_id, b.depth) == (a.id, 2)
+    db_session.rollback()
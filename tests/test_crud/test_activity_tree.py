@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.crud.activity import activity_crud
+from app.crud.activity_tree import ActivityTreeIndex, activity_tree_index
+from app.crud.local_index import LocalIndex
+
+
+@pytest.fixture(autouse=True)
+def _fresh_index():
+    activity_tree_index.invalidate()
+    yield
+    activity_tree_index.invalidate()
+
+
+def test_index_answers_subtree_without_queries(db_session: Session, statements: list[str]):
+    index = ActivityTreeIndex(check_interval=60.0, enabled=True)
+    index.ensure_fresh(db_session)
+    statements.clear()
+
+    ids = index.subtree_ids(index.ids_by_name("ЕДА"))
+    index.ensure_fresh(db_session)
+
+    assert statements == []
+    assert ids == activity_crud.subtree_ids(db_session, activity_crud.ids_by_name(db_session, "еда"))
+    assert len(ids) >= 2
+
+
+def test_index_patched_on_commit(db_session: Session, statements: list[str], monkeypatch):
+    monkeypatch.setattr(activity_tree_index, "_check_interval", 60.0)
+    activity_tree_index.ensure_fresh(db_session)
+    root = activity_crud.create(db_session, {"name": "Tree Root", "parent_id": None})
+    assert not activity_tree_index.usable(db_session)
+    child = activity_crud.create(db_session, {"name": "Tree Child", "parent_id": root.id})
+    db_session.commit()
+
+    assert activity_tree_index.usable(db_session)
+    statements.clear()
+    assert activity_crud.search_ids(db_session, "tree root") == {root.id, child.id}
+    assert statements == []
+
+    activity_crud.update(db_session, child, {"name": "Tree Leaf"})
+    db_session.commit()
+    assert activity_tree_index.ids_by_name("tree leaf") == {child.id}
+    assert activity_tree_index.ids_by_name("tree child") == set()
+
+
+def test_index_reloads_after_foreign_write(db_session: Session):
+    activity_tree_index.ensure_fresh(db_session)
+    # Another worker's commit shows up only as a new version token
+    activity_tree_index.commit(previous=-1, new=0, ops=[])
+    assert activity_crud.search_ids(db_session, "еда")
+
+
+def test_index_does_not_go_back_to_an_older_version(db_session: Session, statements: list[str]):
+    index = ActivityTreeIndex(check_interval=0.0, enabled=True)
+    index.ensure_fresh(db_session)
+    # A commit of this process moved the copy past the version a lagging replica still reports
+    index.commit(previous=index._version, new=index._version + 1, ops=[])
+    statements.clear()
+
+    index.ensure_fresh(db_session)
+    assert len(statements) == 1
+
+
+def test_index_without_patch_is_rejected():
+    class Partial(LocalIndex[dict]):
+        def empty(self) -> dict:
+            return {}
+
+    with pytest.raises(TypeError, match="patch"):
+        Partial()
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import mysql, postgresql
+
+from app.crud.activity import activity_crud
+from app.crud.base import BULK_CHUNK_SIZE, ConfigurationError, ValidationError
+from app.crud.building import building_crud
+
+
+def _rows(count: int, **extra) -> list[dict]:
+    return [{"address": f"B{i}", "latitude": 1.0, "longitude": 2.0, **extra} for i in range(count)]
+
+
+def test_mysql_bulk_insert_is_chunked_multi_row_insert():
+    parts = list(building_crud.bulk_statements(mysql.dialect(), _rows(BULK_CHUNK_SIZE + 5)))
+
+    assert [len(part.positions) for part in parts] == [BULK_CHUNK_SIZE, 5]
+    assert all(part.ids is None for part in parts)
+    sql = str(parts[1].stmt.compile(dialect=mysql.dialect()))
+    assert sql.count("%s, %s, %s") == 5
+
+    # Ids of each chunk follow LAST_INSERT_ID()
+    ids = [0] * (BULK_CHUNK_SIZE + 5)
+    parts[0].assign(ids, SimpleNamespace(returns_rows=False, lastrowid=100))
+    parts[1].assign(ids, SimpleNamespace(returns_rows=False, lastrowid=5000))
+    assert ids[:2] == [100, 101]
+    assert ids[-5:] == [5000, 5001, 5002, 5003, 5004]
+
+
+def test_mysql_bulk_upsert_keeps_input_order():
+    rows = [{"id": 7, **_rows(1)[0]}, _rows(1)[0], {"id": 3, **_rows(1)[0]}]
+    keyed, new = building_crud.bulk_statements(mysql.dialect(), rows, upsert=True)
+
+    assert "ON DUPLICATE KEY UPDATE" in str(keyed.stmt.compile(dialect=mysql.dialect()))
+    assert (keyed.positions, keyed.ids) == ([0, 2], [7, 3])
+    assert new.positions == [1]
+
+    ids = [0] * 3
+    keyed.assign(ids, SimpleNamespace(returns_rows=False, lastrowid=0))
+    new.assign(ids, SimpleNamespace(returns_rows=False, lastrowid=42))
+    assert ids == [7, 42, 3]
+
+
+def test_activities_have_no_bulk_upsert():
+    assert not hasattr(activity_crud, "bulk_upsert")
+    assert hasattr(building_crud, "bulk_upsert")
+
+
+def test_unsupported_dialect_is_a_configuration_error():
+    with pytest.raises(ConfigurationError, match="postgresql"):
+        list(building_crud.bulk_statements(postgresql.dialect(), _rows(1)))
+
+
+def test_bulk_placement_resolves_parents_in_the_batch():
+    rows = [
+        {"id": 10, "name": "Root", "parent_id": None},
+        {"id": 11, "name": "Child", "parent_id": 10},
+        {"name": "Grandchild", "parent_id": 11},
+    ]
+    placed, ancestors = activity_crud.bulk_placement(rows, [])
+    assert [row["stored_depth"] for row in placed] == [1, 2, 3]
+    links = activity_crud.bulk_closure_rows([10, 11, 12], rows, ancestors)
+    assert {(link["ancestor_id"], link["descendant_id"], link["depth"]) for link in links} == {
+        (10, 10, 0), (11, 11, 0), (12, 12, 0), (10, 11, 1), (11, 12, 1), (10, 12, 2)
+    }
+
+    with pytest.raises(ValidationError):
+        # A parent must come before its children
+        activity_crud.bulk_placement([{"name": "Early", "parent_id": 20}, {"id": 20, "name": "Late"}], [])
+    with pytest.raises(ValidationError):
+        activity_crud.bulk_placement([{"id": 5, "name": "A"}, {"id": 5, "name": "B"}], [])
+    with pytest.raises(ValidationError):
+        # Depth 4 through rows of the batch
+        deep = [*rows[:2], {"id": 12, "name": "G", "parent_id": 11}, {"name": "D", "parent_id": 12}]
+        activity_crud.bulk_placement(deep, [])
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import math
+
+import pytest
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.orm import Session
+
+from app.crud import geo
+from app.crud.building import building_crud
+from app.crud.organization import organization_crud
+from tests.factories import create_building, create_org
+
+
+def _destination(lat: float, lon: float, bearing: float, distance: float) -> tuple[float, float]:
+    angle = distance / geo.EARTH_RADIUS
+    lat1, lon1, b = math.radians(lat), math.radians(lon), math.radians(bearing)
+    lat2 = math.asin(math.sin(lat1) * math.cos(angle) + math.cos(lat1) * math.sin(angle) * math.cos(b))
+    lon2 = lon1 + math.atan2(
+        math.sin(b) * math.sin(angle) * math.cos(lat1), math.cos(angle) - math.sin(lat1) * math.sin(lat2)
+    )
+    return math.degrees(lat2), math.degrees(lon2)
+
+
+@pytest.mark.parametrize("lat, lon, radius", [(55.7558, 37.6176, 300), (-33.9, 18.4, 50_000), (70.0, 10.0, 200_000)])
+def test_bounding_box_covers_circle(lat: float, lon: float, radius: float):
+    lat_min, lat_max, lon_min, lon_max = geo.bounding_box(lat, lon, radius)
+    for bearing in range(0, 360, 5):
+        p_lat, p_lon = _destination(lat, lon, bearing, radius * 0.999)
+        assert lat_min <= p_lat <= lat_max
+        assert lon_min <= p_lon <= lon_max
+
+
+@pytest.mark.parametrize("lat, lon, radius", [(89.9, 0.0, 50_000), (0.0, 179.99, 10_000), (0.0, 0.0, 30_000_000)])
+def test_bounding_box_none_when_envelope_does_not_fit(lat: float, lon: float, radius: float):
+    assert geo.bounding_box(lat, lon, radius) is None
+
+
+def test_spatial_prefilter_is_mysql_only():
+    stmt = organization_crud.square_stmt(55.0, 56.0, 37.0, 38.0)
+    assert "MBRCovers(ST_GeomFromText(" in str(stmt.compile(dialect=mysql.dialect()))
+
+    # SQLite has no location column; the range check alone selects the buildings
+    sql = str(stmt.compile(dialect=sqlite.dialect()))
+    assert "location" not in sql and "building.latitude BETWEEN" in sql
+
+
+def test_location_follows_coordinates(db_session: Session):
+    building = create_building(db_session, "Moving", 12.0, 12.0)
+    org = create_org(db_session, "Moving org", building.id)
+
+    def nearby(lat: float, lon: float) -> list:
+        return list(db_session.scalars(organization_crud.radius_stmt(lat, lon, 100)))
+
+    assert org in nearby(12.0, 12.0)
+    building_crud.update(db_session, building, {"latitude": 13.0})
+    assert org not in nearby(12.0, 12.0)
+    assert org in nearby(13.0, 12.0)
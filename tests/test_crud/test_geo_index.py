@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import random
+
+import numpy as np
+import pytest
+from sqlalchemy.orm import Session
+
+from app.crud.building import building_crud
+from app.crud.geo_index import building_geo_index
+from app.crud.organization import RADIUS_WALK_BATCHES, _RadiusWalk, organization_crud
+from tests.factories import create_building, create_org
+
+
+@pytest.fixture()
+def geo_index(monkeypatch):
+    monkeypatch.setattr(building_geo_index, "_enabled", True)
+    monkeypatch.setattr(building_geo_index, "_check_interval", 60.0)
+    monkeypatch.setattr(building_geo_index, "_cell_size", 0.01)
+    building_geo_index.invalidate()
+    yield building_geo_index
+    building_geo_index.invalidate()
+
+
+@pytest.fixture()
+def cluster(db_session: Session):
+    rnd = random.Random(9)
+    for i in range(60):
+        lat, lon = 20 + rnd.uniform(-0.05, 0.05), 30 + rnd.uniform(-0.05, 0.05)
+        building = create_building(db_session, f"Cluster {i}", lat, lon)
+        for j in range(rnd.choice([0, 1, 1, 3])):
+            create_org(db_session, f"Cluster org {i}.{j}", building.id)
+    db_session.commit()
+
+
+def _walk(page_fn, limit: int) -> list[int]:
+    ids, cursor = [], None
+    while True:
+        page = page_fn(cursor=cursor, limit=limit)
+        ids.extend(o.id for o in page.items)
+        if page.next_cursor is None:
+            return ids
+        cursor = page.next_cursor
+
+
+@pytest.mark.parametrize("options", ["out", "row"])
+@pytest.mark.parametrize("limit", [1, 4, 50])
+def test_radius_matches_sql(db_session: Session, cluster: None, geo_index, monkeypatch, limit: int, options: str):
+    def radius(**kw):
+        return organization_crud.radius_page(db_session, 20.0, 30.0, 4000, options=options, **kw)
+
+    indexed = _walk(radius, limit)
+    monkeypatch.setattr(building_geo_index, "_enabled", False)
+    assert indexed == _walk(radius, limit)
+    assert indexed
+
+
+def test_square_matches_sql(db_session: Session, cluster: None, geo_index, monkeypatch):
+    def square(**kw):
+        return organization_crud.square_page(db_session, 19.98, 20.03, 29.97, 30.01, options="out", **kw)
+
+    indexed = _walk(square, 5)
+    monkeypatch.setattr(building_geo_index, "_enabled", False)
+    assert indexed == _walk(square, 5)
+    assert indexed
+
+
+def test_index_patched_on_commit(db_session: Session, geo_index, statements: list[str]):
+    geo_index.ensure_fresh(db_session)
+    building = create_building(db_session, "Geo patched", -10.0, -10.0)
+    org = create_org(db_session, "Geo patched org", building.id)
+    db_session.commit()
+
+    statements.clear()
+    assert organization_crud.radius_page(db_session, -10.0, -10.0, 10).items == [org]
+    # Only the organization fetch: coordinates came from the patched index, not a reload
+    assert len(statements) == 1
+
+    building_crud.update(db_session, building, {"latitude": -11.0})
+    db_session.commit()
+    assert organization_crud.radius_page(db_session, -10.0, -10.0, 10).items == []
+    assert organization_crud.radius_page(db_session, -11.0, -10.0, 10).items == [org]
+
+
+def test_index_reloads_after_foreign_write(db_session: Session, geo_index):
+    geo_index.ensure_fresh(db_session)
+    size = geo_index.size
+    geo_index.commit(previous=-1, new=0, ops=[("put", 10**9, 0.0, 0.0)])
+    geo_index.ensure_fresh(db_session)
+    assert geo_index.size == size
+
+
+@pytest.mark.parametrize("options", ["out", "row"])
+@pytest.mark.parametrize("k", [1, 7, 40])
+def test_nearest_matches_sql(db_session: Session, cluster: None, geo_index, monkeypatch, k: int, options: str):
+    indexed = organization_crud.nearest(db_session, 20.01, 29.99, k, options=options)
+    monkeypatch.setattr(building_geo_index, "_enabled", False)
+    plain = organization_crud.nearest(db_session, 20.01, 29.99, k, options=options)
+
+    assert [o.id for o, _ in indexed] == [o.id for o, _ in plain]
+    assert [d for _, d in indexed] == pytest.approx([d for _, d in plain])
+    assert len(indexed) == k
+
+
+def test_radius_walk_is_bounded():
+    # Buildings without organizations: the walk never fills the page
+    ids, distances = np.arange(1, 1001), np.arange(1000, dtype=np.float64)
+    walk = _RadiusWalk(ids, distances, None, limit=1, max_ids=1000)
+    batches = list(walk.batches())
+    assert len(batches) == RADIUS_WALK_BATCHES and not walk.overflow
+    # The last batch takes the rest of the radius
+    assert batches[-1][-1] == 1000
+
+    walk = _RadiusWalk(ids, distances, None, limit=1, max_ids=100)
+    assert len(list(walk.batches())) == RADIUS_WALK_BATCHES - 1 and walk.overflow
+
+
+def test_nearest_walk_widens_without_queries(db_session: Session, cluster: None, geo_index, statements: list[str]):
+    geo_index.ensure_fresh(db_session)
+    statements.clear()
+    # The cluster is ~30 km away: the radius grows in the index until the first batch has k + 1 buildings
+    rows = organization_crud.nearest(db_session, 20.3, 30.0, 3, options="row")
+    assert len(rows) == 3 and len(statements) == 1
+
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.crud.activity import activity_crud
+from app.crud.building import building_crud
+from app.crud.organization import organization_crud
+from app.schemas.activity import ActivityOut
+from app.schemas.building import BuildingOut
+from app.schemas.organization import OrganizationOut
+from tests.factories import create_building, create_org
+
+
+@pytest.mark.parametrize(
+    "crud, schema",
+    [(activity_crud, ActivityOut), (building_crud, BuildingOut), (organization_crud, OrganizationOut)],
+)
+def test_rows_match_entities(db_session: Session, crud, schema):
+    entities = crud.list_page(db_session, limit=1000, options="out")
+    db_session.expunge_all()
+    rows = crud.list_page(db_session, limit=1000, options="row")
+
+    assert [schema.model_validate(row, from_attributes=True) for row in rows.items] == [
+        schema.model_validate(o.__dict__) for o in entities.items
+    ]
+    assert rows.next_cursor == entities.next_cursor
+    # Nothing was loaded into the session
+    assert len(db_session.identity_map) == 0
+
+
+def test_projected_pages_and_filter(db_session: Session):
+    building = create_building(db_session, "Projection", 1.0, 1.0)
+    orgs = [create_org(db_session, f"Projection org {i}", building.id, phones=[str(i)]) for i in range(5)]
+    db_session.commit()
+
+    stmt = organization_crud.filter_stmt(building_id=building.id, options="row")
+    assert organization_crud.projected(stmt)
+    assert not organization_crud.projected(organization_crud.filter_stmt(building_id=building.id, options="out"))
+
+    first = organization_crud.page(db_session, stmt, limit=3)
+    second = organization_crud.page(db_session, stmt, cursor=first.next_cursor, limit=3)
+    assert [(r.id, r.name, r.phones) for r in first.items + second.items] == [(o.id, o.name, o.phones) for o in orgs]
+    assert second.next_cursor is None
+
+    assert [r.id for r in organization_crud.fetch(db_session, stmt)] == [o.id for o in orgs]
+    assert organization_crud.fetch(db_session, organization_crud.filter_stmt(building_id=building.id)) == orgs
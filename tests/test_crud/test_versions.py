@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from sqlalchemy import delete
+from sqlalchemy.dialects import mysql
+from sqlalchemy.orm import Session
+
+from app.crud.versions import _BUMPED_KEY, _bump_stmt, bump_version, get_versions
+from app.model.entity_version import EntityVersion
+
+
+def test_mysql_bump_is_one_upsert():
+    sql = str(_bump_stmt(mysql.dialect(), "building").compile(dialect=mysql.dialect()))
+
+    assert sql.startswith("INSERT INTO entity_version")
+    assert "ON DUPLICATE KEY UPDATE version = last_insert_id(entity_version.version + %s)" in sql
+    assert "FOR UPDATE" not in sql
+
+
+def test_bump_creates_and_increments_the_row(db_session: Session):
+    name = "versions_test"
+    try:
+        assert get_versions(db_session, [name]) == {name: 0}
+
+        bump_version(db_session, name)
+        bump_version(db_session, name)
+        assert db_session.info[_BUMPED_KEY][name] == (0, 1)
+        db_session.commit()
+
+        bump_version(db_session, name)
+        assert db_session.info[_BUMPED_KEY][name] == (1, 2)
+        db_session.commit()
+        assert get_versions(db_session, [name]) == {name: 2}
+    finally:
+        db_session.execute(delete(EntityVersion).where(EntityVersion.name == name))
+        db_session.commit()